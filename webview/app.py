@@ -2,6 +2,8 @@ import os
 import sys
 import asyncio
 import threading
+import time
+from collections import OrderedDict
 import pandas as pd
 from flask import Flask, request, jsonify, render_template, send_file
 from werkzeug.utils import secure_filename
@@ -9,9 +11,20 @@ from datetime import datetime
 
 # Ensure webview/ directory is on path so imports work regardless of CWD
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from browser_pool import BrowserPool
 from compare import scrape_website
-from enhanced_matching import enhanced_compare_companies
+from config import (BROWSER_POOL_SIZE, HISTORY_PAGE_SIZE, INCREMENTAL_MATCH, MATCH_ASSIGNMENT, NAME_CACHE_TTL_DAYS,
+                    PIPELINED_MATCHING, SCRAPE_CONCURRENCY, SCRAPE_MODE, SNAPSHOT_TTL, WEBSITE_URL,
+                    WHATIF_KEEP_RESULTS)
+from enhanced_matching import score_comparison
+from name_cache import NameResolutionCache
 from results_analyzer import ResultsSummarizer
+from retention import RetentionManager
+from scrape_stream import ScrapeStream
+from row_match_store import RowMatchStore
+from single_flight import SingleFlight
+from snapshot_cache import WebsiteSnapshot, WebsiteSnapshotCache, snapshot_fingerprint
+from stream_matching import StreamingMatcher
 from template_spec import detect_template
 
 # Create Flask app with custom template folder
@@ -24,7 +37,50 @@ os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
 # Global storage for processing results and summaries
 processing_results = {}
-summarizer = ResultsSummarizer()
+# Finished jobs still holding their ScoredComparison, least recently used first
+_scored_jobs = OrderedDict()
+_scored_lock = threading.Lock()
+# Services shared by the routes and upload jobs. init_services() creates them on the first
+# request (or at startup when run directly), not at import: matcher pool workers are
+# spawned and import the script that started the app, and need none of them
+summarizer = None
+retention = None
+browser_pool = None
+snapshot_cache = None
+scrape_flight = None
+name_cache = None
+row_store = None
+_services_ready = False
+_services_lock = threading.Lock()
+
+
+def init_services():
+    """Open the history database and create the caches and browser pool. Safe to call more than once."""
+    global summarizer, retention, browser_pool, snapshot_cache, scrape_flight, name_cache, row_store
+    global _services_ready
+    with _services_lock:
+        if _services_ready:
+            return
+        summarizer = ResultsSummarizer()
+        # Archives old history detail and keeps the uploads folder within its quota after each job
+        retention = RetentionManager(summarizer.tracker, uploads_dir=app.config['UPLOAD_FOLDER'])
+        # Warm browsers shared by every upload's scrape (None = launch per scrape)
+        browser_pool = BrowserPool(size=BROWSER_POOL_SIZE) if BROWSER_POOL_SIZE > 0 else None
+        # Latest scraped website list, reused by uploads that accept a recent snapshot
+        snapshot_cache = WebsiteSnapshotCache()
+        # Concurrent uploads that need a fresh scrape share the one already running
+        scrape_flight = SingleFlight()
+        # Baseline names already resolved to a website company by earlier runs
+        name_cache = NameResolutionCache() if NAME_CACHE_TTL_DAYS > 0 else None
+        # Per-row matches against the current snapshot, for re-uploads of an edited baseline
+        row_store = RowMatchStore() if INCREMENTAL_MATCH else None
+        _services_ready = True
+
+
+@app.before_request
+def _ensure_services():
+    if not _services_ready:
+        init_services()
 
 
 @app.route('/')
@@ -44,6 +100,11 @@ def upload_file():
     if not file.filename.endswith('.xlsx'):
         return jsonify({'error': 'File must be an Excel (.xlsx) file'}), 400
 
+    # Checked before the file is saved, so a rejected request leaves nothing in uploads/
+    scrape_mode = request.form.get('scrape_mode', SCRAPE_MODE)
+    if scrape_mode not in ('network', 'dom'):
+        return jsonify({'error': "scrape_mode must be 'network' or 'dom'"}), 400
+
     filename = secure_filename(file.filename)
     filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
     file.save(filepath)
@@ -65,6 +126,10 @@ def upload_file():
     headless_mode = request.form.get('headless', 'true').lower() == 'true'
     debug_mode = request.form.get('debug', 'true').lower() == 'true'
     timeout = int(request.form.get('timeout', '90000'))  # 90 seconds default
+    concurrency = int(request.form.get('concurrency', SCRAPE_CONCURRENCY))
+    # Reuse the cached website snapshot when younger than this (capped by SNAPSHOT_TTL)
+    snapshot_max_age = int(request.form.get('snapshot_max_age', SNAPSHOT_TTL))
+    force_refresh = request.form.get('force_refresh', 'false').lower() == 'true'
 
     result_id = datetime.now().strftime("%Y%m%d%H%M%S")
     output_path = os.path.join(app.config['UPLOAD_FOLDER'], f'results_{result_id}.xlsx')
@@ -75,7 +140,8 @@ def upload_file():
     # Run scraping in a background thread so this endpoint returns immediately
     # Clients should poll /status/<result_id> to check progress
     def run_in_thread():
-        asyncio.run(process_file(filepath, output_path, result_id, browser_type, headless_mode, debug_mode, timeout))
+        asyncio.run(process_file(filepath, output_path, result_id, browser_type, headless_mode, debug_mode, timeout,
+                                 concurrency, scrape_mode, snapshot_max_age, force_refresh))
 
     thread = threading.Thread(target=run_in_thread, daemon=True)
     thread.start()
@@ -86,10 +152,13 @@ def upload_file():
     })
 
 
-async def process_file(filepath, output_path, result_id, browser_type='firefox', headless=True, debug=True, timeout=90000):
+async def process_file(filepath, output_path, result_id, browser_type='firefox', headless=True, debug=True, timeout=90000,
+                       concurrency=SCRAPE_CONCURRENCY, scrape_mode=SCRAPE_MODE,
+                       snapshot_max_age=SNAPSHOT_TTL, force_refresh=False):
     try:
         print(f"Starting processing for result_id: {result_id}")
-        print(f"Scraping options: browser={browser_type}, headless={headless}, debug={debug}, timeout={timeout}ms")
+        print(f"Scraping options: browser={browser_type}, headless={headless}, debug={debug}, "
+              f"timeout={timeout}ms, concurrency={concurrency}, mode={scrape_mode}")
 
         baseline_df = pd.read_excel(filepath)
         print(f"Loaded {len(baseline_df)} companies from baseline file")
@@ -98,35 +167,87 @@ async def process_file(filepath, output_path, result_id, browser_type='firefox',
         template_spec = detect_template(baseline_df)
         print(f"Detected template: {template_spec.kind}")
 
-        print("Starting website scraping...")
-        try:
-            website_df = await scrape_website(
-                headless=headless,
-                browser_type=browser_type,
-                debug_mode=debug,
-                timeout=timeout,
-            )
-            if website_df is None:
+        snapshot = None if force_refresh else snapshot_cache.get(max_age_seconds=snapshot_max_age)
+        pipeline = None
+        shared = False
+        if snapshot is not None:
+            print(f"Using cached website snapshot {snapshot.snapshot_id} "
+                  f"({snapshot.source}, {snapshot.age_seconds():.0f}s old)")
+        else:
+            if PIPELINED_MATCHING:
+                # Match companies while the remaining facets are still being scraped
+                stream = ScrapeStream()
+                pipeline = StreamingMatcher(baseline_df, template_spec, name_cache=name_cache, row_store=row_store)
+                consumer = asyncio.create_task(pipeline.consume(stream))
+
+            async def scrape_snapshot():
+                print("Starting website scraping...")
+                scraped_df = await scrape_website(
+                    headless=headless,
+                    browser_type=browser_type,
+                    debug_mode=debug,
+                    timeout=timeout,
+                    concurrency=concurrency,
+                    mode=scrape_mode,
+                    pool=browser_pool,
+                    on_facet=stream.publish if pipeline is not None else None,
+                )
+                if scraped_df is None:
+                    return None
+                print(f"Scraped {len(scraped_df)} companies from website")
+                if scraped_df.empty:
+                    # Not cached: later uploads would otherwise report every company as missing
+                    print("Empty scrape; not keeping it as the website snapshot")
+                    return WebsiteSnapshot(scraped_df, time.time(), snapshot_fingerprint(scraped_df), 'scrape')
+                return snapshot_cache.put(scraped_df)
+
+            def on_wait():
+                print(f"{result_id}: joining the website scrape already in progress")
+                processing_results[result_id] = {
+                    'status': 'processing',
+                    'message': 'Waiting on a shared website scrape started by another upload',
+                    'shared_scrape': True,
+                }
+
+            try:
+                # Only a scrape run the same way is joined: a visible browser or another engine
+                # may get past a challenge the running one can't
+                flight_key = (WEBSITE_URL, browser_type, headless, scrape_mode)
+                snapshot, shared = await scrape_flight.run(flight_key, scrape_snapshot, on_wait=on_wait)
+            except Exception as e:
+                error_msg = f'Failed to scrape website: {str(e)}'
+                if 'ERR_NAME_NOT_RESOLVED' in str(e) or 'Cloudflare' in str(e) or '403' in str(e):
+                    error_msg += '\n\nSuggestions:\n- Try Firefox (better Cloudflare bypass)\n- Enable visible mode to solve CAPTCHA manually\n- Check internet connection'
+                processing_results[result_id] = {'status': 'error', 'message': error_msg}
+                print(f"ERROR: {error_msg}")
+                import traceback
+                traceback.print_exc()
+                return
+            finally:
+                if pipeline is not None:
+                    stream.close()
+                    await consumer
+            if snapshot is None:
                 processing_results[result_id] = {
                     'status': 'error',
                     'message': 'Failed to scrape website. Check server logs. Try Firefox or visible mode.',
                 }
                 print("ERROR: Website scraping returned None")
                 return
-        except Exception as e:
-            error_msg = f'Failed to scrape website: {str(e)}'
-            if 'ERR_NAME_NOT_RESOLVED' in str(e) or 'Cloudflare' in str(e) or '403' in str(e):
-                error_msg += '\n\nSuggestions:\n- Try Firefox (better Cloudflare bypass)\n- Enable visible mode to solve CAPTCHA manually\n- Check internet connection'
-            processing_results[result_id] = {'status': 'error', 'message': error_msg}
-            print(f"ERROR: {error_msg}")
-            import traceback
-            traceback.print_exc()
-            return
+            if shared:
+                processing_results[result_id] = {'status': 'processing'}
+                snapshot = WebsiteSnapshot(snapshot.website_df.copy(), snapshot.scraped_at,
+                                           snapshot.snapshot_id, 'shared')
 
-        print(f"Scraped {len(website_df)} companies from website")
+        website_df = snapshot.website_df
 
         print("Starting enhanced comparison...")
-        results_df, unmatched_df = enhanced_compare_companies(baseline_df, website_df, template_spec)
+        if pipeline is not None and not shared:
+            scored = await pipeline.finish(website_df, snapshot.snapshot_id)
+        else:
+            scored = score_comparison(baseline_df, website_df, template_spec, name_cache=name_cache,
+                                      row_store=row_store, snapshot_id=snapshot.snapshot_id)
+        results_df, unmatched_df = scored.evaluate()
 
         print("Generating summary and historical analysis...")
         summary = summarizer.save_and_summarize(
@@ -135,6 +256,10 @@ async def process_file(filepath, output_path, result_id, browser_type='firefox',
             len(website_df),
             template_spec,
         )
+        summary['website_snapshot'] = snapshot.describe()
+        for key in ('pipeline', 'row_reuse', 'name_cache'):
+            if key in results_df.attrs:
+                summary[key] = results_df.attrs[key]
 
         print("Saving results to Excel...")
         with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
@@ -150,16 +275,34 @@ async def process_file(filepath, output_path, result_id, browser_type='firefox',
                 {'Metric': k.replace('_', ' ').title(), 'Value': v}
                 for k, v in current['status_breakdown'].items()
             )
+            summary_rows.append({'Metric': 'Website Snapshot Age (s)', 'Value': summary['website_snapshot']['age_seconds']})
+            if 'row_reuse' in summary:
+                summary_rows.append({'Metric': 'Rows Reused From Previous Run', 'Value': summary['row_reuse']['reused']})
+            if 'name_cache' in summary:
+                summary_rows.append({'Metric': 'Name Cache Hits', 'Value': summary['name_cache']['hits']})
+                summary_rows.append({'Metric': 'Name Cache Misses', 'Value': summary['name_cache']['misses']})
             pd.DataFrame(summary_rows).to_excel(writer, sheet_name='Summary', index=False)
 
         processing_results[result_id] = {
             'status': 'complete',
             'output_path': output_path,
-            'summary': summary
+            'summary': summary,
+            # Kept for /whatif: re-evaluating the scores at other thresholds
+            'scored': scored,
+            'baseline_file': os.path.basename(filepath),
+            'baseline_status': results_df['Status'].iloc[:len(baseline_df)].tolist() if len(results_df) else [],
         }
 
+        _touch_scored(result_id)
         print(f"Processing completed successfully for result_id: {result_id}")
 
+        try:
+            # Results of finished jobs stay downloadable
+            retention.enforce(protected=[job['output_path'] for job in list(processing_results.values())
+                                         if 'output_path' in job])
+        except Exception as e:
+            print(f"Retention pass failed: {e}")
+
     except Exception as e:
         print(f"Error processing file: {e}")
         processing_results[result_id] = {'status': 'error', 'message': str(e)}
@@ -172,7 +315,8 @@ def get_status(result_id):
         return jsonify({
             'status': result['status'],
             'result_id': result_id,
-            'message': result.get('message', '')
+            'message': result.get('message', ''),
+            'shared_scrape': result.get('shared_scrape', False),
         })
     else:
         return jsonify({'status': 'processing'})
@@ -187,6 +331,120 @@ def get_summary(result_id):
         return jsonify({'error': 'Summary not available'}), 404
 
 
+def _touch_scored(result_id):
+    """Mark a job's scores as just used and drop those of jobs beyond WHATIF_KEEP_RESULTS."""
+    with _scored_lock:
+        if 'scored' not in processing_results.get(result_id, {}):
+            return
+        _scored_jobs[result_id] = None
+        _scored_jobs.move_to_end(result_id)
+        while len(_scored_jobs) > WHATIF_KEEP_RESULTS:
+            evicted, _ = _scored_jobs.popitem(last=False)
+            processing_results.get(evicted, {}).pop('scored', None)
+
+
+@app.route('/whatif/<result_id>')
+def threshold_whatif(result_id):
+    """Re-derive statuses, Remove rows and the summary of a finished job at other thresholds.
+
+    Query parameters: fuzzy_threshold, sector_threshold, exact_match_threshold
+    (omitted ones keep the job's values) and assignment.
+    """
+    job = processing_results.get(result_id)
+    scored = job.get('scored') if job is not None and job['status'] == 'complete' else None
+    if scored is None:
+        return jsonify({'error': 'Scores not available'}), 404
+    _touch_scored(result_id)
+
+    thresholds = {}
+    for name in scored.thresholds:
+        if name in request.args:
+            try:
+                thresholds[name] = float(request.args[name])
+            except ValueError:
+                return jsonify({'error': f'{name} must be a number'}), 400
+    assignment = request.args.get('assignment', MATCH_ASSIGNMENT)
+    if assignment not in ('one_to_one', 'independent'):
+        return jsonify({'error': "assignment must be 'one_to_one' or 'independent'"}), 400
+
+    started = time.perf_counter()
+    results_df, _ = scored.evaluate(assignment, **thresholds)
+    summary = summarizer.generate_summary(results_df, job['baseline_file'], len(scored.website_df),
+                                          scored.template_spec)
+    baseline_rows = results_df.iloc[:len(job['baseline_status'])]
+    changed = [
+        {'cr_name': cr_name, 'brand_name': brand_name, 'website_name': website_name,
+         'match_score': score, 'previous_status': previous, 'status': status}
+        for cr_name, brand_name, website_name, score, previous, status in zip(
+            baseline_rows['CR Name'], baseline_rows['Brand Name'], baseline_rows['Website Name'],
+            baseline_rows['Match Score'], job['baseline_status'], baseline_rows['Status'])
+        if previous != status
+    ]
+    return jsonify({
+        'thresholds': {**scored.thresholds, **thresholds},
+        'assignment': assignment,
+        'summary': summary,
+        'changed_rows': changed,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+    })
+
+
+def _page_args():
+    """`(page, per_page)` from the query string; raises ValueError when they aren't usable."""
+    page = int(request.args.get('page', 1))
+    per_page = int(request.args.get('per_page', HISTORY_PAGE_SIZE))
+    if page < 1 or not 1 <= per_page <= 500:
+        raise ValueError
+    return page, per_page
+
+
+@app.route('/history/companies/timeline')
+def company_timeline():
+    """One company's saved results across runs, newest first.
+
+    Query parameters: company_id, or name (any spelling that normalizes to
+    the company's); page and per_page.
+    """
+    try:
+        page, per_page = _page_args()
+        company_id = int(request.args['company_id']) if 'company_id' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'company_id, page and per_page must be positive integers (per_page up to 500)'}), 400
+
+    tracker = summarizer.tracker
+    if company_id is not None:
+        company = tracker.get_company(company_id)
+    elif request.args.get('name'):
+        company = tracker.find_company(request.args['name'])
+    else:
+        return jsonify({'error': 'company_id or name is required'}), 400
+    if company is None:
+        return jsonify({'error': 'Company not found in history'}), 404
+
+    total, entries = tracker.get_company_timeline(company['company_id'], per_page, (page - 1) * per_page)
+    return jsonify({'company': company, 'page': page, 'per_page': per_page, 'total': total, 'entries': entries})
+
+
+@app.route('/history/changes')
+def status_changes():
+    """Companies whose status differs between two saved runs.
+
+    Query parameters: from_run and to_run (default: the run before the
+    latest, and the latest); page and per_page.
+    """
+    try:
+        page, per_page = _page_args()
+        runs = {name: int(request.args[name]) for name in ('from_run', 'to_run') if name in request.args}
+    except ValueError:
+        return jsonify({'error': 'from_run, to_run, page and per_page must be positive integers (per_page up to 500)'}), 400
+
+    changes = summarizer.tracker.get_status_changes(runs.get('from_run'), runs.get('to_run'),
+                                                    per_page, (page - 1) * per_page)
+    if changes is None:
+        return jsonify({'error': 'Runs not found in history'}), 404
+    return jsonify({**changes, 'page': page, 'per_page': per_page})
+
+
 @app.route('/download/<result_id>')
 def download_file(result_id):
     if result_id in processing_results and processing_results[result_id]['status'] == 'complete':
@@ -198,5 +456,6 @@ def download_file(result_id):
 
 
 if __name__ == '__main__':
+    init_services()
     debug = os.environ.get('FLASK_DEBUG', 'false').lower() == 'true'
     app.run(debug=debug)
@@ -0,0 +1,224 @@
+import asyncio
+import atexit
+import os
+import threading
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+import psutil
+from playwright.async_api import async_playwright
+
+from config import BROWSER_MAX_MEMORY_MB, BROWSER_MAX_USES, BROWSER_POOL_SIZE
+
+
+async def launch_browser(playwright, browser_type, headless):
+    """Launch the requested browser engine with our anti-automation flags."""
+    if browser_type == 'firefox':
+        return await playwright.firefox.launch(headless=headless)
+    if browser_type == 'webkit':
+        return await playwright.webkit.launch(headless=headless)
+    return await playwright.chromium.launch(
+        headless=headless,
+        args=[
+            '--disable-blink-features=AutomationControlled',
+            '--disable-dev-shm-usage',
+            '--no-sandbox',
+            '--disable-setuid-sandbox',
+            '--disable-web-security',
+            '--disable-features=IsolateOrigins,site-per-process',
+        ],
+    )
+
+
+def browser_memory_mb(pids: Iterable[int]) -> float:
+    """Resident memory of the processes `pids` and everything under them, in MB."""
+    total = 0
+    for pid in pids:
+        try:
+            root = psutil.Process(pid)
+            tree = [root] + root.children(recursive=True)
+        except psutil.Error:
+            continue
+        for process in tree:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                pass
+    return total / (1024 * 1024)
+
+
+def _descendants() -> Dict[int, int]:
+    """pid → parent pid of every process under this one."""
+    parents = {}
+    for child in psutil.Process().children(recursive=True):
+        try:
+            parents[child.pid] = child.ppid()
+        except psutil.Error:
+            pass
+    return parents
+
+
+class _PooledBrowser:
+    __slots__ = ('key', 'browser', 'uses', 'pids')
+
+    def __init__(self, key, browser, pids=()):
+        self.key = key
+        self.browser = browser
+        self.uses = 0
+        # Root processes of this browser, for the memory probe
+        self.pids = tuple(pids)
+
+
+class BrowserPool:
+    """Process-wide pool of launched browsers shared by every scrape job.
+
+    Playwright objects belong to the event loop that created them, while each
+    upload runs its own `asyncio.run` on a fresh thread. The pool therefore owns
+    one long-lived loop on a daemon thread; `run()` can be awaited from any loop
+    and executes the job there with a leased browser.
+
+    At most `size` browsers are alive at once (idle ones of another engine are
+    closed to make room). A browser is health-checked before every lease and
+    recycled once it has served `max_uses` jobs, lost its connection, or the
+    pool's browsers together use more than `max_memory_mb`. Only their own
+    process trees count: the processes that appear under the pool's
+    Playwright driver during each launch, not matcher workers or browsers
+    launched outside the pool.
+    """
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE, max_uses: int = BROWSER_MAX_USES,
+                 max_memory_mb: float = BROWSER_MAX_MEMORY_MB,
+                 launch: Callable = launch_browser,
+                 start_playwright: Callable[[], Awaitable] = None,
+                 memory_probe: Callable[[Iterable[int]], float] = browser_memory_mb):
+        self.size = size
+        self.max_uses = max_uses
+        self.max_memory_mb = max_memory_mb
+        self._launch = launch
+        self._start_playwright = start_playwright or (lambda: async_playwright().start())
+        self._memory_probe = memory_probe
+        self._thread_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._playwright = None
+        self._driver_pid: Optional[int] = None
+        self._warned_untracked = False
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._launching: Optional[asyncio.Lock] = None
+        self._idle: List[_PooledBrowser] = []
+        self._entries: Set[_PooledBrowser] = set()
+        self._alive = 0
+        self.stats: Dict[str, int] = {'launched': 0, 'reused': 0, 'recycled': 0}
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._thread_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='browser-pool', daemon=True).start()
+                self._loop = loop
+                atexit.register(self.close)
+            return self._loop
+
+    async def run(self, browser_type: str, headless: bool, job: Callable[[object], Awaitable]):
+        """Run `await job(browser)` on the pool's loop with a leased browser."""
+        future = asyncio.run_coroutine_threadsafe(
+            self._run(browser_type, headless, job), self._ensure_loop(),
+        )
+        return await asyncio.wrap_future(future)
+
+    async def _run(self, browser_type, headless, job):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+            self._launching = asyncio.Lock()
+        async with self._slots:
+            entry = await self._acquire((browser_type, headless))
+            try:
+                return await job(entry.browser)
+            finally:
+                await self._release(entry)
+
+    async def _acquire(self, key) -> _PooledBrowser:
+        while True:
+            entry = next((e for e in self._idle if e.key == key), None)
+            if entry is None:
+                break
+            self._idle.remove(entry)
+            if entry.browser.is_connected():
+                entry.uses += 1
+                self.stats['reused'] += 1
+                return entry
+            await self._discard(entry)
+
+        # Make room by closing idle browsers of other engines/modes
+        while self._alive >= self.size and self._idle:
+            await self._discard(self._idle.pop(0))
+
+        browser_type, headless = key
+        # One launch at a time, so the driver's new children belong to this browser
+        async with self._launching:
+            if self._playwright is None:
+                self._playwright = await self._start_playwright()
+            before = _descendants()
+            browser = await self._launch(self._playwright, browser_type, headless)
+            entry = _PooledBrowser(key, browser, self._launched_pids(before))
+        self._entries.add(entry)
+        entry.uses = 1
+        self._alive += 1
+        self.stats['launched'] += 1
+        return entry
+
+    async def _release(self, entry: _PooledBrowser):
+        healthy = entry.browser.is_connected() and entry.uses < self.max_uses
+        if healthy and self.max_memory_mb and self._memory_probe(self._pids()) > self.max_memory_mb:
+            print(f"Browser pool: memory above {self.max_memory_mb}MB, recycling a browser")
+            healthy = False
+        if healthy:
+            self._idle.append(entry)
+        else:
+            self.stats['recycled'] += 1
+            await self._discard(entry)
+
+    def _launched_pids(self, before: Dict[int, int]) -> List[int]:
+        """Root processes of the browser just launched: those that appeared under the driver."""
+        new = {pid: parent for pid, parent in _descendants().items() if pid not in before}
+        # Tops of the new process trees, started by a driver rather than by this process
+        roots = [pid for pid, parent in new.items() if parent not in new and parent != os.getpid()]
+        if self._driver_pid is None and len({new[pid] for pid in roots}) == 1:
+            self._driver_pid = new[roots[0]]
+        roots = [pid for pid in roots if new[pid] == self._driver_pid]
+        if not roots and self.max_memory_mb and not self._warned_untracked:
+            print("Browser pool: couldn't find a launched browser's processes; "
+                  "its memory doesn't count towards BROWSER_MAX_MEMORY_MB")
+            self._warned_untracked = True
+        return roots
+
+    def _pids(self) -> List[int]:
+        return [pid for entry in self._entries for pid in entry.pids]
+
+    async def _discard(self, entry: _PooledBrowser):
+        self._alive -= 1
+        self._entries.discard(entry)
+        try:
+            await entry.browser.close()
+        except Exception:
+            pass
+
+    async def _shutdown(self):
+        while self._idle:
+            await self._discard(self._idle.pop())
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+            self._driver_pid = None
+        self._slots = None
+        self._launching = None
+
+    def close(self):
+        """Close idle browsers and stop Playwright. Safe to call more than once."""
+        with self._thread_lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout=30)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
@@ -0,0 +1,91 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from website_catalog import NameForms, WebsiteCatalog
+
+
+def _trigrams(word: str) -> Set[str]:
+    padded = f' {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _initials(forms: NameForms) -> str:
+    return ''.join(w[0] for w in forms.core_words) if len(forms.core_words) > 1 else ''
+
+
+class CandidateIndex:
+    """Inverted indexes over a WebsiteCatalog that shortlist website companies.
+
+    A website company is a candidate for a baseline name when the two share a
+    token, a word trigram, or when one name's initials spell a
+    word of the other ("STC" / "Saudi Telecom Company"). Only candidates go
+    through the full strategy scoring. Every pair a strategy can score at the
+    match threshold shares at least a trigram, so pruning only drops weak
+    pairs. With `recall_safety`, a baseline row with no candidates at all is
+    scanned against the whole catalog instead. A row whose candidates all
+    score below the threshold is rescanned too, by the caller (`rescanned()`),
+    so its reported best score is the same as without blocking.
+
+    `stats` counts rows looked up, rows that fell back to a full scan, rows
+    rescanned, and the pair scorings pruning saved.
+    """
+
+    def __init__(self, catalog: WebsiteCatalog, recall_safety: bool = True):
+        self.size = len(catalog)
+        self.recall_safety = recall_safety
+        self._by_token: Dict[str, List[int]] = defaultdict(list)
+        self._by_trigram: Dict[str, List[int]] = defaultdict(list)
+        self._by_initials: Dict[str, List[int]] = defaultdict(list)
+        for j, forms in enumerate(catalog.forms):
+            words = forms.tokens
+            for word in words:
+                self._by_token[word].append(j)
+            for trigram in set().union(*map(_trigrams, words)):
+                self._by_trigram[trigram].append(j)
+            initials = _initials(forms)
+            if initials:
+                self._by_initials[initials].append(j)
+        self.stats: Dict[str, int] = {'lookups': 0, 'full_scans': 0, 'rescans': 0, 'pairs_scored': 0,
+                                      'pairs_skipped': 0}
+
+    def _candidates_for(self, forms: NameForms, found: Set[int]):
+        words = forms.tokens
+        for word in words:
+            found.update(self._by_token.get(word, ()))
+            # The word may be the initials of a longer website name
+            found.update(self._by_initials.get(word, ()))
+            for trigram in _trigrams(word):
+                found.update(self._by_trigram.get(trigram, ()))
+        initials = _initials(forms)
+        if initials:
+            found.update(self._by_token.get(initials, ()))
+
+    def candidates(self, *names: NameForms) -> Optional[List[int]]:
+        """Catalog positions worth scoring for these baseline names, in catalog order.
+
+        None means "scan everything" (no candidates, with recall_safety on).
+        """
+        found: Set[int] = set()
+        for forms in names:
+            self._candidates_for(forms, found)
+        self.stats['lookups'] += 1
+        if not found and self.recall_safety:
+            self.stats['full_scans'] += 1
+            self.stats['pairs_scored'] += self.size
+            return None
+        self.stats['pairs_scored'] += len(found)
+        self.stats['pairs_skipped'] += self.size - len(found)
+        return sorted(found)
+
+    def rescanned(self, pairs: int):
+        """Record that a row's `pairs` pruned names were scored after all."""
+        self.stats['rescans'] += 1
+        self.stats['pairs_scored'] += pairs
+        self.stats['pairs_skipped'] -= pairs
+
+    def summary(self) -> str:
+        total = self.stats['pairs_scored'] + self.stats['pairs_skipped']
+        saved = 100 * self.stats['pairs_skipped'] / total if total else 0
+        return (f"Candidate blocking: scored {self.stats['pairs_scored']} of {total} pairs "
+                f"({saved:.0f}% pruned), {self.stats['full_scans']} of {self.stats['lookups']} rows fell back to a full scan, "
+                f"{self.stats['rescans']} rescanned below the match threshold")
@@ -0,0 +1,75 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Match info of a baseline row whose candidates were all assigned to other rows
+DUPLICATE_CLAIM = {'score': 0, 'match_type': 'duplicate_claim', 'confidence': 'none'}
+
+
+class CandidateMatrix:
+    """Sparse baseline × website matrix of each row's top-k match candidates.
+
+    Stored CSR-style: row i's candidates are positions[indptr[i]:indptr[i+1]],
+    best first, with their scores and match infos alongside. Built once from
+    the matchers' ranked lists; both the assignment and the runner-up
+    listing read from it.
+    """
+
+    def __init__(self, ranked: Sequence[Sequence[Tuple[int, Dict]]]):
+        counts = np.fromiter((len(row) for row in ranked), dtype=np.intp, count=len(ranked))
+        self.indptr = np.concatenate(([0], np.cumsum(counts))).astype(np.intp)
+        self.positions = np.array([j for row in ranked for j, _ in row], dtype=np.intp)
+        self.scores = np.array([info['score'] for row in ranked for _, info in row], dtype=float)
+        self.infos: List[Dict] = [info for row in ranked for _, info in row]
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    def row(self, i: int) -> List[Tuple[int, Dict]]:
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return [(int(self.positions[k]), self.infos[k]) for k in range(start, end)]
+
+    def best(self) -> List[Tuple[Optional[int], Dict]]:
+        """Each row's own best candidate, regardless of other rows' claims."""
+        return [
+            (int(self.positions[start]), self.infos[start]) if start < end
+            else (None, {'score': 0, 'match_type': 'none', 'confidence': 'none'})
+            for start, end in zip(self.indptr[:-1], self.indptr[1:])
+        ]
+
+    def assign_one_to_one(self, min_score: float) -> List[Tuple[Optional[int], Dict]]:
+        """Greedy one-to-one assignment over candidates scoring at least `min_score`.
+
+        Candidates are taken by descending score (ties: earlier baseline row,
+        then the row's own ranking); each website company goes to the first
+        row that claims it. A row whose qualifying candidates were all taken
+        gets DUPLICATE_CLAIM; rows with no qualifying candidate keep their
+        best, sub-threshold candidate as in best().
+        """
+        assigned = self.best()
+        rows = np.repeat(np.arange(len(self), dtype=np.intp), np.diff(self.indptr))
+        edges = np.nonzero(self.scores >= min_score)[0]
+        # lexsort: last key is primary; edge index already orders row, then rank
+        edges = edges[np.lexsort((edges, -self.scores[edges]))]
+
+        done = np.zeros(len(self), dtype=bool)
+        claimed = set()
+        for k in edges.tolist():
+            i, j = rows[k], int(self.positions[k])
+            if done[i] or j in claimed:
+                continue
+            assigned[i] = (j, self.infos[k])
+            done[i] = True
+            claimed.add(j)
+        for i in np.unique(rows[edges]).tolist():
+            if not done[i]:
+                assigned[i] = (None, dict(DUPLICATE_CLAIM))
+        return assigned
+
+    def runner_ups(self, assigned: Sequence[Tuple[Optional[int], Dict]],
+                   min_score: float) -> List[List[Tuple[int, Dict]]]:
+        """Each row's candidates scoring at least `min_score`, other than the one it was assigned."""
+        return [
+            [(j, info) for j, info in self.row(i) if j != position and info['score'] >= min_score]
+            for i, (position, _) in enumerate(assigned)
+        ]
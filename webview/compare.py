@@ -1,34 +1,29 @@
 import os
+import asyncio
 import pandas as pd
 from playwright.async_api import async_playwright
 from playwright_stealth import Stealth
 from datetime import datetime
+from browser_pool import launch_browser
 from config import *
+from request_router import RequestRouter, RoutePolicy
+from scrape_stream import FacetEvent
+from search_api import full_result_url, is_search_response, parse_search_payload
+from storage_state import StorageStateStore, has_consent
+from waits import (
+    WaitEngine, first_card_changed, list_changed, mark_list_stale, page_settled,
+    pager_rendered, search_response, selector_state,
+)
 
 
-async def _open_portfolio_page(playwright, headless, browser_type, timeout):
-    """Launch the browser, apply stealth, navigate, dismiss cookies, and wait for the company list.
+async def _new_context(browser, router=None, storage_state=None):
+    """Create a browser context that looks like a regular desktop Chrome session.
 
-    Returns (browser, context, page) so the caller can drive interactions and tear down.
+    When a RequestRouter is given, it is attached before any page opens.
+    `storage_state` seeds the context with saved cookies/localStorage.
     """
-    if browser_type == 'firefox':
-        browser = await playwright.firefox.launch(headless=headless)
-    elif browser_type == 'webkit':
-        browser = await playwright.webkit.launch(headless=headless)
-    else:
-        browser = await playwright.chromium.launch(
-            headless=headless,
-            args=[
-                '--disable-blink-features=AutomationControlled',
-                '--disable-dev-shm-usage',
-                '--no-sandbox',
-                '--disable-setuid-sandbox',
-                '--disable-web-security',
-                '--disable-features=IsolateOrigins,site-per-process',
-            ],
-        )
-
     context = await browser.new_context(
+        storage_state=storage_state,
         viewport={'width': 1920, 'height': 1080},
         user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
         locale='en-US',
@@ -51,42 +46,84 @@ async def _open_portfolio_page(playwright, headless, browser_type, timeout):
             'sec-ch-ua-platform': '"macOS"',
         },
     )
+    if router is not None:
+        await router.attach(context)
+    return context
+
+
+async def _prepare_page(page, headless, timeout, waits, consent_given=False) -> bool:
+    """Apply stealth, navigate, get past Cloudflare/cookies, and wait for the company list.
 
-    page = await context.new_page()
+    With `consent_given` (the context already holds the consent cookie) the
+    cookie banner isn't waited for. Returns True if a Cloudflare challenge was shown.
+    """
     await Stealth().apply_stealth_async(page)
 
     await page.mouse.move(100, 100)
-    await page.wait_for_timeout(500)
 
     try:
         await page.goto(WEBSITE_URL, wait_until='domcontentloaded', timeout=timeout)
-        await page.wait_for_timeout(5000)
     except Exception:
         await page.goto(WEBSITE_URL, wait_until='load', timeout=timeout)
-        await page.wait_for_timeout(5000)
+    await waits.until('page_settled', page_settled(page, SELECTORS["cookie_accept"]))
 
     content = await page.content()
-    if 'cloudflare' in content.lower() and ('challenge' in content.lower() or 'checking' in content.lower()):
-        print("⚠ CLOUDFLARE CHALLENGE DETECTED — waiting 30s...")
-        await page.wait_for_timeout(30000)
-        if not headless:
+    challenged = 'cloudflare' in content.lower() and ('challenge' in content.lower() or 'checking' in content.lower())
+    if challenged:
+        print("⚠ CLOUDFLARE CHALLENGE DETECTED — waiting up to 30s...")
+        cleared = await waits.until('challenge_cleared', selector_state(page, 'ul.search-result-list', 'attached'))
+        if not cleared and not headless:
             content = await page.content()
             if 'cloudflare' in content.lower() and 'challenge' in content.lower():
-                print("   Solve manually in browser; waiting 120s...")
-                await page.wait_for_timeout(120000)
+                print("   Solve manually in browser; waiting up to 120s...")
+                await waits.until(
+                    'challenge_solved_manually', selector_state(page, 'ul.search-result-list', 'attached'),
+                )
 
-    try:
-        await page.wait_for_selector(SELECTORS["cookie_accept"], timeout=5000)
-        await page.click(SELECTORS["cookie_accept"])
-        await page.wait_for_timeout(3000)
-    except Exception:
-        pass
+    if not consent_given and await waits.until('cookie_banner', selector_state(page, SELECTORS["cookie_accept"])):
+        try:
+            await page.click(SELECTORS["cookie_accept"])
+            await waits.until('cookie_dismissed', selector_state(page, SELECTORS["cookie_accept"], 'hidden'))
+        except Exception:
+            pass
+
+    await page.wait_for_selector('div.search-results', state='visible', timeout=waits.timeouts['list_visible'])
+    await page.wait_for_selector('ul.search-result-list', state='visible', timeout=waits.timeouts['list_visible'])
+    await waits.until('list_ready', selector_state(page, 'ul.search-result-list li a h4'))
+    await waits.until('list_ready', selector_state(page, SELECTORS["facet_item"], 'attached'))
+    return challenged
 
-    await page.wait_for_selector('div.search-results', state='visible', timeout=30000)
-    await page.wait_for_selector('ul.search-result-list', state='visible', timeout=30000)
-    await page.wait_for_timeout(3000)
 
-    return browser, context, page
+async def _open_portfolio_page(browser, headless, timeout, waits, router=None, debug_mode=False,
+                               storage_state=None):
+    """Open a context on `browser`, apply stealth, navigate, dismiss cookies, and wait for the company list.
+
+    Returns (context, page, challenged) so the caller can drive interactions and
+    tear down; `challenged` says whether a Cloudflare challenge was shown.
+    On failure the context is closed here (after a debug dump, if enabled).
+    """
+    context = await _new_context(browser, router, storage_state)
+    page = None
+    try:
+        page = await context.new_page()
+        challenged = await _prepare_page(page, headless, timeout, waits, consent_given=has_consent(storage_state))
+    except Exception:
+        if debug_mode and page is not None:
+            debug_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
+            os.makedirs(debug_dir, exist_ok=True)
+            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+            try:
+                await page.screenshot(path=os.path.join(debug_dir, f'error_screenshot_{ts}.png'))
+                with open(os.path.join(debug_dir, f'error_page_{ts}.html'), 'w', encoding='utf-8') as f:
+                    f.write(await page.content())
+            except Exception:
+                pass
+        try:
+            await context.close()
+        except Exception:
+            pass
+        raise
+    return context, page, challenged
 
 
 async def _discover_facets(page) -> dict:
@@ -116,201 +153,413 @@ async def _discover_facets(page) -> dict:
     return {"portfolio": portfolio, "ecosystem": ecosystem}
 
 
-async def _scrape_with_facet(page, panel_selector: str, facet_value: str) -> list[str]:
+# Reads everything _scrape_with_facet needs from the result list in one
+# round-trip: card names, the first-card sentinel, the card count and the
+# highest page number in the pager.
+_RESULT_LIST_JS = """
+() => {
+    const cards = Array.from(document.querySelectorAll('ul.search-result-list li a'));
+    const names = [];
+    for (const card of cards) {
+        const h4 = card.querySelector('h4');
+        if (h4) {
+            const name = h4.innerText.trim();
+            if (name) names.push(name);
+        }
+    }
+    const first = document.querySelector('ul.search-result-list li a h4');
+    const pages = Array.from(document.querySelectorAll('ul.page-selector-list li a'))
+        .map(link => link.innerText)
+        .filter(text => /^[0-9]+$/.test(text))
+        .map(Number);
+    return {
+        names: names,
+        first_name: first ? first.innerText : "",
+        count: document.querySelectorAll('ul.search-result-list li').length,
+        total_pages: pages.length ? Math.max(...pages) : 1,
+    };
+}
+"""
+
+
+async def _read_result_list(page) -> dict:
+    """Snapshot the result list with a single `page.evaluate` call.
+
+    Returns {"names": [...], "first_name": str, "count": int, "total_pages": int}.
+    """
+    return await page.evaluate(_RESULT_LIST_JS)
+
+
+def _facet_item_selector(panel_selector: str, facet_value: str) -> str:
+    from urllib.parse import quote
+
+    return (
+        f'{panel_selector} {SELECTORS["facet_item"]}'
+        f'[{SELECTORS["facet_value_attr"]}="{quote(facet_value)}"]'
+    )
+
+
+async def _facet_click_target(page, item_selector: str, timeout: int = 10000):
+    """The facet's checkbox, or the facet item itself when it has none."""
+    item = await page.wait_for_selector(item_selector, timeout=timeout)
+    checkbox = await item.query_selector(SELECTORS["facet_checkbox"])
+    return checkbox or item
+
+
+async def _uncheck_facet(page, item_selector: str, waits: WaitEngine, await_response: bool = False):
+    """Uncheck a facet and wait for the unfiltered list to come back.
+
+    With `await_response` the uncheck's own search request is also awaited, so a
+    response listener armed for the next facet can't pick it up by mistake.
+    """
+    try:
+        item = await page.query_selector(item_selector)
+        checkbox = await item.query_selector(SELECTORS["facet_checkbox"]) if item else None
+        target = checkbox or item
+        if target:
+            filtered = await _read_result_list(page)
+            await mark_list_stale(page)
+            response = waits.start('search_response', search_response(page))
+            await target.click()
+            await waits.until('facet_cleared', list_changed(page, filtered))
+            if await_response:
+                await response
+            else:
+                await waits.collect(response)
+    except Exception:
+        pass
+
+
+async def _scrape_with_facet(page, panel_selector: str, facet_value: str, waits: WaitEngine) -> list[str]:
     """Click one facet checkbox, paginate the filtered list, return company names, then uncheck.
 
     Asserts that the result list visibly changed after the click — if it didn't,
     we abort this facet and return an empty list rather than scrape the
     unfiltered list silently.
     """
-    from urllib.parse import quote
-
-    encoded = quote(facet_value)
-    item_selector = (
-        f'{panel_selector} {SELECTORS["facet_item"]}'
-        f'[{SELECTORS["facet_value_attr"]}="{encoded}"]'
-    )
+    item_selector = _facet_item_selector(panel_selector, facet_value)
 
     # Capture the first card's name so we can detect a change
-    before_card = await page.query_selector('ul.search-result-list li a h4')
-    before_name = await before_card.inner_text() if before_card else ""
-    before_count_elems = await page.query_selector_all('ul.search-result-list li')
-    before_count = len(before_count_elems)
+    before = await _read_result_list(page)
+    await mark_list_stale(page)
 
     # Click the facet's checkbox
+    response = waits.start('search_response', search_response(page))
     try:
-        item = await page.wait_for_selector(item_selector, timeout=10000)
-        checkbox = await item.query_selector(SELECTORS["facet_checkbox"])
-        target = checkbox or item
+        target = await _facet_click_target(page, item_selector)
         await target.click()
     except Exception as e:
+        await waits.collect(response)
         print(f"  ⚠ could not click facet '{facet_value}': {e}")
         return []
 
     # Wait for the list to actually change
-    changed = False
-    for _ in range(20):
-        await page.wait_for_timeout(500)
-        after_card = await page.query_selector('ul.search-result-list li a h4')
-        after_name = await after_card.inner_text() if after_card else ""
-        after_count = len(await page.query_selector_all('ul.search-result-list li'))
-        if after_name != before_name or after_count != before_count:
-            changed = True
-            break
+    changed = await waits.until('facet_applied', list_changed(page, before))
+    await waits.collect(response)
 
     if not changed:
         print(f"  ⚠ facet '{facet_value}' click had no visible effect; skipping")
         # Try to uncheck anyway to restore state
         try:
             await target.click()
-            await page.wait_for_timeout(1000)
+            await waits.until('facet_cleared', list_changed(page, before))
         except Exception:
             pass
         return []
 
-    # Determine total pages for the filtered list
-    page_links = await page.query_selector_all('ul.page-selector-list li a')
-    page_numbers = []
-    for link in page_links:
-        text = await link.inner_text()
-        if text.isdigit():
-            page_numbers.append(int(text))
-    total_pages = max(page_numbers) if page_numbers else 1
+    # The pager re-renders after the list; read page 1 and the page count once it has
+    await waits.until('pager_rendered', pager_rendered(page))
+    state = await _read_result_list(page)
+    total_pages = state["total_pages"]
 
     names: list[str] = []
     for page_num in range(1, total_pages + 1):
-        cards = await page.query_selector_all('ul.search-result-list li a')
-        for card in cards:
-            name_elem = await card.query_selector('h4')
-            if name_elem:
-                name = (await name_elem.inner_text()).strip()
-                if name:
-                    names.append(name)
+        names.extend(state["names"])
 
         if page_num < total_pages:
-            first_before = await page.query_selector('ul.search-result-list li a h4')
-            first_before_name = await first_before.inner_text() if first_before else ""
             next_link = await page.query_selector(
                 f'ul.page-selector-list li a[data-itemnumber="{page_num + 1}"]'
             )
             if next_link:
                 await next_link.click()
-                for _ in range(10):
-                    await page.wait_for_timeout(500)
-                    first_after = await page.query_selector('ul.search-result-list li a h4')
-                    first_after_name = await first_after.inner_text() if first_after else ""
-                    if first_after_name != first_before_name:
-                        break
+                await waits.until('page_turned', first_card_changed(page, state["first_name"]))
+                state = await _read_result_list(page)
 
     # Uncheck the facet to restore the unfiltered state for the next pass
+    await _uncheck_facet(page, item_selector, waits)
+
+    print(f"  ✓ facet '{facet_value}': {len(names)} companies")
+    return names
+
+
+# Replays a captured search request from inside the page, so it carries the
+# session's cookies and origin exactly like the site's own XHR.
+_FETCH_JSON_JS = """
+async (url) => {
+    const response = await fetch(url, {
+        credentials: 'same-origin',
+        headers: {'X-Requested-With': 'XMLHttpRequest'},
+    });
+    return response.ok ? await response.json() : null;
+}
+"""
+
+
+async def _scrape_with_facet_api(page, panel_selector: str, facet_value: str, waits: WaitEngine):
+    """Click one facet and read its companies from the search API instead of the DOM.
+
+    Captures the search response the click triggers; if it holds only the first
+    page, the same request is replayed in the page asking for every hit. Returns
+    None whenever the response can't be captured or parsed, so the caller can
+    fall back to `_scrape_with_facet`; the facet is unchecked again only when
+    the result list showed the click took effect.
+    """
+    item_selector = _facet_item_selector(panel_selector, facet_value)
+
     try:
-        item = await page.query_selector(item_selector)
-        checkbox = await item.query_selector(SELECTORS["facet_checkbox"]) if item else None
-        target = checkbox or item
-        if target:
+        target = await _facet_click_target(page, item_selector)
+    except Exception as e:
+        print(f"  ⚠ could not find facet '{facet_value}': {e}")
+        return None
+
+    before = await _read_result_list(page)
+    await mark_list_stale(page)
+    clicked = False
+    try:
+        async with page.expect_response(
+            is_search_response, timeout=waits.timeouts['search_response'],
+        ) as response_info:
             await target.click()
-            await page.wait_for_timeout(1000)
-    except Exception:
-        pass
+            clicked = True
+        response = await response_info.value
+        payload = await response.json()
+    except Exception as e:
+        if not clicked:
+            # The facet was never toggled; leave it alone
+            print(f"  ⚠ could not click facet '{facet_value}': {e}")
+            return None
+        print(f"  ⚠ facet '{facet_value}': no search response captured ({e})")
+        # Only a changed list shows the facet is on; unchecking otherwise would turn it on
+        if await waits.until('facet_applied', list_changed(page, before)):
+            await _uncheck_facet(page, item_selector, waits)
+        return None
 
-    print(f"  ✓ facet '{facet_value}': {len(names)} companies")
+    # Let the page finish rendering the filtered list before we uncheck
+    await waits.until('facet_applied', list_changed(page, before))
+
+    names = None
+    parsed = parse_search_payload(payload)
+    if parsed is not None:
+        names, count = parsed
+        if count > len(names):
+            try:
+                full = await page.evaluate(_FETCH_JSON_JS, full_result_url(response.url, count))
+            except Exception as e:
+                print(f"  ⚠ facet '{facet_value}': replaying search request failed ({e})")
+                full = None
+            parsed = parse_search_payload(full)
+            names = parsed[0] if parsed is not None and len(parsed[0]) >= count else None
+
+    await _uncheck_facet(page, item_selector, waits, await_response=True)
+
+    if names is None:
+        print(f"  ⚠ facet '{facet_value}': search response not usable")
+        return None
+    print(f"  ✓ facet '{facet_value}': {len(names)} companies (search API)")
     return names
 
 
-async def scrape_website(headless=True, browser_type='firefox', debug_mode=False, timeout=60000):
+async def _scrape_facet(page, panel_selector: str, facet_value: str, waits: WaitEngine, mode: str) -> list[str]:
+    """Scrape one facet in the requested mode, falling back from 'network' to the DOM."""
+    if mode == 'network':
+        names = await _scrape_with_facet_api(page, panel_selector, facet_value, waits)
+        if names is not None:
+            return names
+        print(f"  ↩ facet '{facet_value}': falling back to DOM scrape")
+    return await _scrape_with_facet(page, panel_selector, facet_value, waits)
+
+
+async def _scrape_facets(context, page, jobs, headless, timeout, concurrency, waits, mode='dom', on_result=None):
+    """Run `_scrape_facet` for every (panel_selector, facet_value) job.
+
+    With concurrency 1 the jobs run one after another on `page`. Otherwise up to
+    `concurrency` pages share the browser context — `page` plus freshly opened
+    ones — and each pulls the next facet from a shared queue. Results come back
+    in job order so the merge is identical to a sequential run. `on_result(index,
+    names)` is called as each job finishes, in completion order.
+    """
+    if concurrency <= 1 or len(jobs) <= 1:
+        results = []
+        for index, (panel_selector, value) in enumerate(jobs):
+            print(f"Scraping facet: {value}")
+            results.append(await _scrape_facet(page, panel_selector, value, waits, mode))
+            if on_result is not None:
+                on_result(index, results[-1])
+        return results
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for index, job in enumerate(jobs):
+        queue.put_nowait((index, job))
+    results: list = [None] * len(jobs)
+
+    async def worker(worker_page):
+        while True:
+            try:
+                index, (panel_selector, value) = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            print(f"Scraping facet: {value}")
+            results[index] = await _scrape_facet(worker_page, panel_selector, value, waits, mode)
+            if on_result is not None:
+                on_result(index, results[index])
+
+    async def extra_worker():
+        extra_page = None
+        try:
+            extra_page = await context.new_page()
+            # The first page already dealt with the cookie banner for this context
+            await _prepare_page(extra_page, headless, timeout, waits, consent_given=True)
+        except Exception as e:
+            # The other pages drain the queue without this one
+            print(f"  ⚠ extra page could not be prepared ({e}); continuing on the remaining pages")
+            if extra_page is not None:
+                await extra_page.close()
+            return
+        try:
+            await worker(extra_page)
+        finally:
+            await extra_page.close()
+
+    workers = min(concurrency, len(jobs))
+    print(f"Traversing {len(jobs)} facets on {workers} pages")
+    await asyncio.gather(worker(page), *(extra_worker() for _ in range(workers - 1)))
+    return results
+
+
+async def _scrape_with_browser(browser, browser_type, headless, debug_mode, timeout, concurrency, mode,
+                               on_facet=None):
+    """Run one full facet traversal in a fresh context on an already-launched browser.
+
+    The context starts from the storage state saved by the last successful
+    scrape (if still valid), and saves its own state on success so the next
+    run can skip the Cloudflare challenge and the cookie banner.
+    """
+    waits = WaitEngine()
+    router = RequestRouter(RoutePolicy.from_config(ROUTE_POLICY)) if ROUTE_POLICY else None
+    state_store = StorageStateStore(browser_type)
+    storage_state = state_store.load()
+    if storage_state is not None:
+        print("Reusing saved browser state (cookies + localStorage)")
+
+    context, page, challenged = await _open_portfolio_page(
+        browser, headless, timeout, waits, router, debug_mode, storage_state,
+    )
+    if challenged and storage_state is not None:
+        print("Saved browser state no longer passes the challenge; discarding")
+        state_store.discard()
+    try:
+        facets = await _discover_facets(page)
+
+        # Portfolio facets define the company universe; ecosystem facets
+        # enrich it. Passes are independent, so they can share the work
+        # across pages — the maps are built afterwards in facet order.
+        jobs = [(SELECTORS["portfolio_facet_panel"], value) for value in facets["portfolio"]]
+        jobs += [(SELECTORS["ecosystem_facet_panel"], value) for value in facets["ecosystem"]]
+        on_result = None
+        if on_facet is not None:
+            kinds = ["portfolio"] * len(facets["portfolio"]) + ["ecosystem"] * len(facets["ecosystem"])
+
+            def on_result(index, names):
+                on_facet(FacetEvent(kinds[index], jobs[index][1], tuple(names)))
+
+        results = await _scrape_facets(context, page, jobs, headless, timeout, concurrency, waits, mode, on_result)
+        portfolio_results = results[:len(facets["portfolio"])]
+        ecosystem_results = results[len(facets["portfolio"]):]
+
+        # Website tags portfolios with the suffix " Portfolio"
+        # (e.g. "Vision Portfolio") but the baseline template uses bare
+        # names ("Vision"); strip the suffix before storing.
+        portfolio_map: dict[str, str] = {}
+        for value, names in zip(facets["portfolio"], portfolio_results):
+            portfolio_label = value.removesuffix(" Portfolio")
+            for name in names:
+                portfolio_map[name] = portfolio_label
+
+        ecosystem_map: dict[str, str] = {}
+        for value, names in zip(facets["ecosystem"], ecosystem_results):
+            for name in names:
+                ecosystem_map[name] = value
+
+        # Merge into a single record per company
+        all_names = set(portfolio_map.keys()) | set(ecosystem_map.keys())
+        companies = []
+        for name in sorted(all_names):
+            portfolio = portfolio_map.get(name)
+            ecosystem = ecosystem_map.get(name)
+            if portfolio is None:
+                print(f"  ⚠ data inconsistency: '{name}' tagged with ecosystem but no portfolio")
+            companies.append({
+                "Company": name,
+                "Portfolio": portfolio,
+                "Ecosystem": ecosystem,
+            })
+
+        print(f"Scraped {len(companies)} companies "
+              f"({sum(1 for c in companies if c['Ecosystem'])} with ecosystem)")
+        inconsistency_count = sum(1 for c in companies if c['Portfolio'] is None)
+        if inconsistency_count > 0:
+            print(f"  ⚠ {inconsistency_count} companies tagged with ecosystem but no portfolio (included with Portfolio=None)")
+        print("Time spent waiting on the page:")
+        waits.print_summary()
+        if router is not None:
+            print("Request routing:")
+            router.print_summary()
+        if companies:
+            try:
+                state_store.save(await context.storage_state())
+            except Exception as e:
+                # The scrape itself succeeded; the next one just starts without saved state
+                print(f"  ⚠ could not save browser state ({e})")
+        return pd.DataFrame(companies)
+
+    finally:
+        await context.close()
+
+
+async def scrape_website(headless=True, browser_type='firefox', debug_mode=False, timeout=60000,
+                         concurrency=SCRAPE_CONCURRENCY, mode=SCRAPE_MODE, pool=None, on_facet=None):
     """Scrape company data from PIF portfolio site, traversing facets to extract
     Portfolio and Ecosystem per company.
 
+    `concurrency` caps how many pages traverse facets in parallel (1 = sequential).
+    `mode` is 'network' (read the search API responses, falling back to the DOM
+    per facet) or 'dom' (always paginate the rendered list).
+    With a BrowserPool, headless scrapes run on a warm pooled browser; visible
+    scrapes (used for solving CAPTCHAs by hand) always get a browser of their own.
+    `on_facet(FacetEvent)` is called as each facet's company list comes in
+    (e.g. ScrapeStream.publish), from the loop running the scrape.
+
     Returns a DataFrame with columns: Company, Portfolio, Ecosystem.
     """
     print("=" * 80)
     print("STARTING WEBSITE SCRAPING (facet traversal)")
-    print(f"Browser: {browser_type} | Headless: {headless} | Timeout: {timeout}ms")
+    print(f"Browser: {browser_type} | Headless: {headless} | Timeout: {timeout}ms | Concurrency: {concurrency} | Mode: {mode}")
     print("=" * 80)
 
-    debug_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
+    async def job(browser):
+        return await _scrape_with_browser(browser, browser_type, headless, debug_mode, timeout, concurrency, mode,
+                                          on_facet)
 
     try:
-        async with async_playwright() as p:
-            browser = context = page = None
-            try:
-                browser, context, page = await _open_portfolio_page(
-                    p, headless, browser_type, timeout,
-                )
-            except Exception as e:
-                if debug_mode and page is not None:
-                    os.makedirs(debug_dir, exist_ok=True)
-                    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    await page.screenshot(path=os.path.join(debug_dir, f'error_screenshot_{ts}.png'))
-                    with open(os.path.join(debug_dir, f'error_page_{ts}.html'), 'w', encoding='utf-8') as f:
-                        f.write(await page.content())
-                # Explicit cleanup — _open_portfolio_page may have allocated
-                # browser/context before failing
-                if context is not None:
-                    try:
-                        await context.close()
-                    except Exception:
-                        pass
-                if browser is not None:
-                    try:
-                        await browser.close()
-                    except Exception:
-                        pass
-                raise
+        if pool is not None and headless:
+            return await pool.run(browser_type, headless, job)
 
+        async with async_playwright() as p:
+            browser = await launch_browser(p, browser_type, headless)
             try:
-                facets = await _discover_facets(page)
-
-                # Pass 1: Portfolio facets — defines the company universe.
-                # Website tags portfolios with the suffix " Portfolio"
-                # (e.g. "Vision Portfolio") but the baseline template uses bare
-                # names ("Vision"); strip the suffix before storing.
-                portfolio_map: dict[str, str] = {}
-                for value in facets["portfolio"]:
-                    print(f"Scraping portfolio facet: {value}")
-                    names = await _scrape_with_facet(
-                        page, SELECTORS["portfolio_facet_panel"], value,
-                    )
-                    portfolio_label = value.removesuffix(" Portfolio")
-                    for name in names:
-                        portfolio_map[name] = portfolio_label
-
-                # Pass 2: Ecosystem facets — enriches the universe
-                ecosystem_map: dict[str, str] = {}
-                for value in facets["ecosystem"]:
-                    print(f"Scraping ecosystem facet: {value}")
-                    names = await _scrape_with_facet(
-                        page, SELECTORS["ecosystem_facet_panel"], value,
-                    )
-                    for name in names:
-                        ecosystem_map[name] = value
-
-                # Merge into a single record per company
-                all_names = set(portfolio_map.keys()) | set(ecosystem_map.keys())
-                companies = []
-                for name in sorted(all_names):
-                    portfolio = portfolio_map.get(name)
-                    ecosystem = ecosystem_map.get(name)
-                    if portfolio is None:
-                        print(f"  ⚠ data inconsistency: '{name}' tagged with ecosystem but no portfolio")
-                    companies.append({
-                        "Company": name,
-                        "Portfolio": portfolio,
-                        "Ecosystem": ecosystem,
-                    })
-
-                print(f"Scraped {len(companies)} companies "
-                      f"({sum(1 for c in companies if c['Ecosystem'])} with ecosystem)")
-                inconsistency_count = sum(1 for c in companies if c['Portfolio'] is None)
-                if inconsistency_count > 0:
-                    print(f"  ⚠ {inconsistency_count} companies tagged with ecosystem but no portfolio (included with Portfolio=None)")
-                return pd.DataFrame(companies)
-
+                return await job(browser)
             finally:
-                if context is not None:
-                    await context.close()
-                if browser is not None:
-                    await browser.close()
+                await browser.close()
 
     except Exception as e:
         print(f"Failed to scrape website: {e}")
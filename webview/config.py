@@ -2,6 +2,23 @@
 WEBSITE_URL = "https://www.pif.gov.sa/en/our-investments/our-portfolio/"
 FUZZY_MATCH_THRESHOLD = 90       # Minimum score for fuzzy matching (raised from 85 to reduce false positives)
 SECTOR_MATCH_THRESHOLD = 80      # Minimum score for categorical (portfolio/ecosystem) matching
+MATCH_DRIVER = "cascade"         # "cascade": strategy-by-strategy over the whole baseline; "pairwise": every row × website pair
+MATCH_PROCESSES = 0              # Match large baselines on a process pool of this size (0 = off, -1 = one per CPU)
+MATCH_PARALLEL_MIN_ROWS = 2000   # ...only when the baseline has at least this many rows
+MATCH_ASSIGNMENT = "one_to_one"  # "one_to_one": each website company goes to its best-scoring claimant; "independent": every row keeps its own best
+MATCH_TOP_K = 3                  # Candidates kept per baseline row for the assignment and the Runner-up Matches column
+CANDIDATE_BLOCKING = True        # MATCH_DRIVER "pairwise" only (unused by "cascade"): score only website names sharing a token/trigram/initials with the baseline name
+FUZZY_WORKERS = -1               # Cores for the batched fuzzy score matrix (-1 = all)
+FUZZY_SCORE_CUTOFF = 0           # Fuzzy scores below this are reported as 0 (0 = exact scores; higher skips work)
+NAME_CACHE_TTL_DAYS = 90         # Days an unused baseline-name → website-company resolution is kept (0 = no name cache)
+INCREMENTAL_MATCH = True         # Re-uploads against the same website snapshot reuse the stored match of every unchanged baseline row
+PIPELINED_MATCHING = True        # Fresh scrapes: match each facet's companies while the other facets are still loading
+HISTORY_BUSY_TIMEOUT_MS = 10000  # How long a history-database write waits for another writer's lock before failing
+HISTORY_PAGE_SIZE = 50           # Default page size of the /history endpoints (per_page, up to 500)
+HISTORY_DETAIL_RUNS = 20         # Runs whose per-company rows stay in the history database; older ones are archived to Parquet (0 = keep all)
+UPLOADS_QUOTA_MB = 1024          # Oldest files in webview/uploads are deleted once the folder is larger than this (0 = no quota)
+UPLOADS_MAX_AGE_DAYS = 90        # ...and files older than this many days (0 = no age limit)
+WHATIF_KEEP_RESULTS = 10         # Finished jobs whose match candidates stay in memory for /whatif, most recently used first
 
 # Selectors for web scraping
 SELECTORS = {
@@ -18,4 +35,49 @@ SELECTORS = {
     "facet_item": "p.facet-value",
     "facet_value_attr": "data-facetvalue",
     "facet_checkbox": "input[type='checkbox']",
-}
\ No newline at end of file
+}
+
+# Scraper tuning
+SCRAPE_CONCURRENCY = 3           # Pages traversing facets in parallel (1 = sequential on a single page)
+BROWSER_POOL_SIZE = 2            # Warm browsers kept across uploads (0 = launch a fresh browser per scrape)
+BROWSER_MAX_USES = 20            # Recycle a pooled browser after this many scrapes
+BROWSER_MAX_MEMORY_MB = 2048     # ...or once the pooled browsers together use more resident memory than this
+STORAGE_STATE_TTL = 12 * 3600    # Seconds a saved browser state (cookies/localStorage) is reused; capped by the clearance cookie's own expiry
+SNAPSHOT_TTL = 3600              # Seconds a scraped website list may be reused by later uploads (0 = always rescrape)
+SCRAPE_MODE = "network"          # "network": read facet results from the search API (DOM fallback); "dom": paginate the list
+
+# Path fragment of the site's background search requests (facet filtering and
+# pagination are both served by this endpoint)
+SEARCH_API_PATH = "/sxa/search/results"
+
+# Upper bounds (ms) for the scraper's event-driven waits. Each wait returns as
+# soon as its condition holds; these only cap how long we give it.
+WAIT_TIMEOUTS = {
+    "page_settled": 5000,                # list, cookie banner or challenge page after goto
+    "challenge_cleared": 30000,          # Cloudflare challenge resolving on its own
+    "challenge_solved_manually": 120000, # visible mode: user solving the challenge
+    "cookie_banner": 5000,               # cookie-consent button appearing
+    "cookie_dismissed": 3000,            # cookie-consent dialog going away
+    "list_visible": 30000,               # result container/list becoming visible
+    "list_ready": 3000,                  # first card and facet panels rendered
+    "facet_applied": 10000,              # list mutation after a facet click
+    "search_response": 10000,            # matching search XHR/fetch finishing
+    "pager_rendered": 2000,              # pager re-rendered for the new result set
+    "page_turned": 5000,                 # first card changing after a pager click
+    "facet_cleared": 1000,               # list mutation after unchecking a facet
+}
+
+# Request routing for the scraper's browser context (see request_router.RoutePolicy).
+# Only the page, its scripts/styles, the search XHRs, the cookie banner and the
+# Cloudflare challenge are needed; everything else is aborted. Set to None to
+# let every request through.
+ROUTE_POLICY = {
+    "block_resource_types": ["image", "media", "font", "texttrack", "manifest"],
+    "allow_domains": ["pif.gov.sa", "cloudflare.com", "cookiebot.com"],
+    "block_domains": [
+        "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+        "facebook.net", "facebook.com", "hotjar.com", "clarity.ms",
+        "linkedin.com", "licdn.com", "twitter.com", "youtube.com", "ytimg.com",
+    ],
+    "block_third_party": True,
+}
@@ -1,8 +1,24 @@
+import heapq
 import re
-from rapidfuzz import fuzz
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
 import pandas as pd
-from typing import Dict, Tuple, Optional
-from config import FUZZY_MATCH_THRESHOLD, SECTOR_MATCH_THRESHOLD
+from rapidfuzz import fuzz
+
+from candidate_index import CandidateIndex
+from candidate_matrix import CandidateMatrix
+from config import (CANDIDATE_BLOCKING, FUZZY_MATCH_THRESHOLD, MATCH_ASSIGNMENT, MATCH_DRIVER,
+                    MATCH_PARALLEL_MIN_ROWS, MATCH_PROCESSES, MATCH_TOP_K, SECTOR_MATCH_THRESHOLD)
+from fuzzy_matrix import FuzzyScoreMatrix
+from match_cascade import MatchCascade
+from name_cache import cache_key
+from parallel_matching import parallel_best_matches, resolve_processes
+from row_match_store import baseline_row_hashes
+from snapshot_cache import snapshot_fingerprint
+from website_catalog import NameForms, WebsiteCatalog
+
 
 class EnhancedCompanyMatcher:
     def __init__(self,
@@ -23,6 +39,8 @@ class EnhancedCompanyMatcher:
             'limited', 'ltd', 'limited liability company', 'llc',
             'holding', 'company', 'co', 'group', 'plc', 'sa', 'bsc', 'ksc'
         ]
+        # Longest first, as ' suffix' strings ready for endswith()
+        self._suffix_endings = tuple(f' {suffix}' for suffix in sorted(self.business_suffixes, key=len, reverse=True))
 
     def normalize_company_name(self, name: str) -> str:
         """Normalize company name by removing common suffixes and cleaning"""
@@ -44,9 +62,9 @@ class EnhancedCompanyMatcher:
         while changed and iterations < 3:  # Prevent infinite loops
             changed = False
             iterations += 1
-            for suffix in sorted(self.business_suffixes, key=len, reverse=True):
-                if normalized.endswith(f' {suffix}'):
-                    new_normalized = normalized[:-len(f' {suffix}')].strip()
+            for ending in self._suffix_endings:
+                if normalized.endswith(ending):
+                    new_normalized = normalized[:-len(ending)].strip()
                     if new_normalized:  # Don't remove if it would make the name empty
                         normalized = new_normalized
                         changed = True
@@ -56,23 +74,35 @@ class EnhancedCompanyMatcher:
 
     def extract_core_name(self, name: str) -> str:
         """Extract the core business name (most important words)"""
-        normalized = self.normalize_company_name(name)
-        
-        # Split into words
-        words = normalized.split()
-        
-        # Remove common filler words
-        filler_words = ['the', 'a', 'an', 'and', 'or', 'of', 'for', 'in', 'on', 'at']
-        core_words = [word for word in words if word not in filler_words]
-        
-        return ' '.join(core_words)
+        return self.name_forms(name).core
+
+    def name_forms(self, name: str) -> NameForms:
+        """Normalized, core and token forms of a name, as used by the match strategies"""
+        return NameForms(self.normalize_company_name(name))
+
+    def build_catalog(self, website_df: pd.DataFrame) -> WebsiteCatalog:
+        """Name forms for every website company, in row order"""
+        if 'Company' in website_df.columns:
+            names = website_df['Company'].tolist()
+        else:
+            names = [''] * len(website_df)
+        return WebsiteCatalog.build(names, self.name_forms)
 
     def calculate_match_score(self, baseline_name: str, website_name: str) -> Dict:
         """Calculate comprehensive match score using multiple strategies"""
+        return self.score_forms(self.name_forms(baseline_name), self.name_forms(website_name))
+
+    def score_forms(self, baseline: NameForms, website: NameForms,
+                    fuzzy_score: Optional[float] = None) -> Dict:
+        """calculate_match_score on precomputed name forms (see name_forms / build_catalog)
+
+        `fuzzy_score` is the pair's cell from a FuzzyScoreMatrix; when given,
+        strategy 5 uses it instead of running the three scorers itself.
+        """
         
         # Strategy 1: Exact match (after normalization)
-        norm_baseline = self.normalize_company_name(baseline_name)
-        norm_website = self.normalize_company_name(website_name)
+        norm_baseline = baseline.normalized
+        norm_website = website.normalized
         
         if norm_baseline == norm_website:
             return {
@@ -82,8 +112,8 @@ class EnhancedCompanyMatcher:
             }
         
         # Strategy 2: Core name match
-        core_baseline = self.extract_core_name(baseline_name)
-        core_website = self.extract_core_name(website_name)
+        core_baseline = baseline.core
+        core_website = website.core
         
         if core_baseline == core_website and core_baseline:
             return {
@@ -95,13 +125,11 @@ class EnhancedCompanyMatcher:
         # Strategy 3: Substring containment (both directions) - with stricter validation
         if core_baseline and core_website:
             # Check if one name is an acronym/abbreviation of the other
-            baseline_words = core_baseline.split()
-            website_words = core_website.split()
             
             # Special case: if baseline is short (potential acronym) and website contains it AS A SEPARATE WORD
-            if len(core_baseline) <= 10 and len(baseline_words) == 1:
+            if len(core_baseline) <= 10 and len(baseline.core_words) == 1:
                 # Check if the short name appears as a complete word in the longer name
-                if core_baseline in website_words or core_baseline.upper() in [w.upper() for w in website_words]:
+                if core_baseline in website.core_words or core_baseline.upper() in website.core_words_upper:
                     return {
                         'score': 96,
                         'match_type': 'acronym_match',
@@ -109,9 +137,9 @@ class EnhancedCompanyMatcher:
                     }
             
             # Special case: if website is short (potential acronym) and baseline contains it AS A SEPARATE WORD
-            if len(core_website) <= 10 and len(website_words) == 1:
+            if len(core_website) <= 10 and len(website.core_words) == 1:
                 # Check if the short name appears as a complete word in the longer name  
-                if core_website in baseline_words or core_website.upper() in [w.upper() for w in baseline_words]:
+                if core_website in baseline.core_words or core_website.upper() in baseline.core_words_upper:
                     return {
                         'score': 96,
                         'match_type': 'acronym_match',
@@ -137,17 +165,10 @@ class EnhancedCompanyMatcher:
                         }
         
         # Strategy 4: Token-based matching - with stricter requirements
-        baseline_tokens = set(norm_baseline.split())
-        website_tokens = set(norm_website.split())
-        
-        if baseline_tokens and website_tokens:
-            common_tokens = baseline_tokens.intersection(website_tokens)
-            total_tokens = baseline_tokens.union(website_tokens)
-            
-            # Remove generic business words that shouldn't count as meaningful matches
-            generic_words = {'company', 'group', 'holding', 'corp', 'inc', 'ltd', 'limited', 'co', 'investment'}
-            meaningful_common = common_tokens - generic_words
-            meaningful_total = total_tokens - generic_words
+        if baseline.tokens and website.tokens:
+            # Generic business words (GENERIC_WORDS) shouldn't count as meaningful matches
+            meaningful_common = baseline.meaningful & website.meaningful
+            meaningful_total = baseline.meaningful | website.meaningful
             
             if meaningful_common and meaningful_total:
                 token_ratio = len(meaningful_common) / len(meaningful_total)
@@ -178,11 +199,13 @@ class EnhancedCompanyMatcher:
                 'confidence': 'none'
             }
         
-        fuzzy_score = fuzz.ratio(norm_baseline, norm_website)
-        partial_score = fuzz.partial_ratio(norm_baseline, norm_website)
-        token_sort_score = fuzz.token_sort_ratio(norm_baseline, norm_website)
-        
-        best_fuzzy = max(fuzzy_score, partial_score, token_sort_score)
+        if fuzzy_score is not None:
+            best_fuzzy = float(fuzzy_score)
+        else:
+            ratio_score = fuzz.ratio(norm_baseline, norm_website)
+            partial_score = fuzz.partial_ratio(norm_baseline, norm_website)
+            token_sort_score = fuzz.token_sort_ratio(norm_baseline, norm_website)
+            best_fuzzy = max(ratio_score, partial_score, token_sort_score)
         
         return {
             'score': best_fuzzy,
@@ -216,136 +239,374 @@ class EnhancedCompanyMatcher:
                 "normalized_baseline": norm_baseline,
                 "normalized_website": norm_website}
 
-    def find_best_match(self, baseline_row: pd.Series, website_df: pd.DataFrame) -> Tuple[Optional[pd.Series], Dict]:
-        """Find the best match for a baseline company in website data"""
-        
-        best_match = None
-        best_score_info = {'score': 0, 'match_type': 'none', 'confidence': 'none'}
-        
-        baseline_cr = baseline_row.get('CR Name', '')
-        baseline_brand = baseline_row.get('Brand Name', '')
-        
-        for _, website_row in website_df.iterrows():
-            website_name = website_row.get('Company', '')
-            
-            # Try matching against both CR Name and Brand Name
-            cr_match = self.calculate_match_score(baseline_cr, website_name)
-            brand_match = self.calculate_match_score(baseline_brand, website_name)
-            
-            # Use the better match
-            current_match = cr_match if cr_match['score'] >= brand_match['score'] else brand_match
-            current_match['matched_field'] = 'CR Name' if cr_match['score'] >= brand_match['score'] else 'Brand Name'
-            
-            if current_match['score'] > best_score_info['score']:
-                best_score_info = current_match
-                best_match = website_row
-        
+    def categorical_match(self, comparison: dict) -> bool:
+        """compare_categorical's verdict on a stored comparison, at this matcher's sector threshold"""
+        norm_baseline, norm_website = comparison['normalized_baseline'], comparison['normalized_website']
+        if not norm_baseline or not norm_website:
+            return False
+        return norm_baseline == norm_website or comparison['score'] >= self.sector_threshold
+
+    def find_best_match(self, baseline_row: pd.Series, website_df: pd.DataFrame,
+                        catalog: Optional[WebsiteCatalog] = None,
+                        fuzzy: Optional[FuzzyScoreMatrix] = None,
+                        candidates: Optional[CandidateIndex] = None) -> Tuple[Optional[pd.Series], Dict]:
+        """Find the best match for a baseline company in website data
+
+        Pass the `catalog` built for website_df when matching many baseline
+        rows, so website names are normalized once rather than per row, and
+        a `fuzzy` matrix (baseline names × catalog.normalized) to take the
+        fuzzy-fallback scores from it. With a `candidates` index only the
+        shortlisted website companies are scored.
+        """
+        if catalog is None:
+            catalog = self.build_catalog(website_df)
+        best_index, best_score_info = self.best_match_position(
+            baseline_row.get('CR Name', ''), baseline_row.get('Brand Name', ''), catalog, fuzzy, candidates,
+        )
+        best_match = website_df.iloc[best_index] if best_index is not None else None
         return best_match, best_score_info
 
-def _compare_field(matcher, baseline_value, website_value, exists: bool) -> tuple:
-    """Compare one categorical field. Returns (match_label, mismatch_flag).
-
-    match_label is one of "Yes" / "No" / "N/A". mismatch_flag is True only
-    when the field has both sides present and they don't match.
+    def best_match_position(self, cr_name: str, brand_name: str, catalog: WebsiteCatalog,
+                            fuzzy: Optional[FuzzyScoreMatrix] = None,
+                            candidates: Optional[CandidateIndex] = None) -> Tuple[Optional[int], Dict]:
+        """find_best_match on plain names: returns the catalog position of the best match"""
+        ranked = self.ranked_match_positions(cr_name, brand_name, catalog, 1, fuzzy, candidates)
+        if not ranked:
+            return None, {'score': 0, 'match_type': 'none', 'confidence': 'none'}
+        return ranked[0]
+
+    def ranked_match_positions(self, cr_name: str, brand_name: str, catalog: WebsiteCatalog, top_k: int,
+                               fuzzy: Optional[FuzzyScoreMatrix] = None,
+                               candidates: Optional[CandidateIndex] = None) -> List[Tuple[int, Dict]]:
+        """Up to `top_k` (catalog position, match info), best first.
+
+        The first entry is best_match_position's match; runner-ups follow
+        only while they score at least the fuzzy threshold. Equal scores
+        keep website order.
+        """
+        baseline_cr = self.name_forms(cr_name)
+        baseline_brand = self.name_forms(brand_name)
+        cr_fuzzy = fuzzy.row(baseline_cr.normalized) if fuzzy is not None else None
+        brand_fuzzy = fuzzy.row(baseline_brand.normalized) if fuzzy is not None else None
+        
+        positions = candidates.candidates(baseline_cr, baseline_brand) if candidates is not None else None
+        if positions is None:
+            positions = range(len(catalog))
+
+        def score(positions):
+            scored = []
+            for j in positions:
+                website_forms = catalog.forms[j]
+                # Try matching against both CR Name and Brand Name
+                cr_match = self.score_forms(baseline_cr, website_forms, cr_fuzzy[j] if cr_fuzzy is not None else None)
+                brand_match = self.score_forms(baseline_brand, website_forms,
+                                               brand_fuzzy[j] if brand_fuzzy is not None else None)
+
+                # Use the better match
+                current_match = cr_match if cr_match['score'] >= brand_match['score'] else brand_match
+                current_match['matched_field'] = 'CR Name' if cr_match['score'] >= brand_match['score'] else 'Brand Name'
+
+                if current_match['score'] > 0:
+                    scored.append((j, current_match))
+            return scored
+
+        scored = score(positions)
+        if len(positions) < len(catalog) and max((m['score'] for _, m in scored), default=0) < self.fuzzy_threshold:
+            # Blocking only guarantees the matches at the threshold; below it the pruned
+            # names may hold the row's best score, which the report still shows
+            shortlisted = set(positions)
+            pruned = [j for j in range(len(catalog)) if j not in shortlisted]
+            candidates.rescanned(len(pruned))
+            scored = sorted(scored + score(pruned), key=lambda match: match[0])
+
+        ranked = heapq.nsmallest(top_k, scored, key=lambda match: -match[1]['score'])
+        return ranked[:1] + [match for match in ranked[1:] if match[1]['score'] >= self.fuzzy_threshold]
+
+
+def _compare_field(matcher, baseline_values: list, website_values: list, exists: np.ndarray,
+                   comparisons: Optional[dict] = None) -> tuple:
+    """Compare one categorical field for every result row.
+
+    Returns (match_labels, mismatch_mask). A label is "Yes" / "No" / "N/A";
+    the mask is True only where both sides are present and don't match.
+    compare_categorical runs once per distinct (baseline, website) pair —
+    portfolios and ecosystems are a handful of categories. Pass a
+    `comparisons` dict to keep those results for later calls.
+    """
+    labels = []
+    mismatch = np.zeros(len(baseline_values), dtype=bool)
+    compared = {}
+    if comparisons is None:
+        comparisons = {}
+    for i, (baseline_value, website_value) in enumerate(zip(baseline_values, website_values)):
+        if not baseline_value or pd.isna(baseline_value) or not exists[i]:
+            labels.append("N/A")
+            continue
+        key = (baseline_value, website_value)
+        matched = compared.get(key)
+        if matched is None:
+            comparison = comparisons.get(key)
+            if comparison is None:
+                comparison = comparisons[key] = matcher.compare_categorical(baseline_value, website_value)
+            matched = compared[key] = matcher.categorical_match(comparison)
+        labels.append("Yes" if matched else "No")
+        mismatch[i] = not matched
+    return labels, mismatch
+
+
+def _column_values(df: pd.DataFrame, column: str, default='') -> list:
+    return df[column].tolist() if column in df.columns else [default] * len(df)
+
+
+def _assemble_results(matcher, baseline_df: pd.DataFrame, website_df: pd.DataFrame,
+                      positions: list, infos: list, spec,
+                      runner_ups: Optional[list] = None,
+                      comparisons: Optional[dict] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Build the results and unmatched frames column by column.
+
+    `positions[i]` / `infos[i]` are the matched website row (or None) and
+    match info for baseline row i; `runner_ups[i]`, when given, fills the
+    "Runner-up Matches" column. `comparisons` is passed on to
+    _compare_field. Result rows come first, then one "Remove" row per
+    website company no baseline row matched.
     """
-    if not baseline_value or pd.isna(baseline_value):
-        return "N/A", False
-    if not exists:
-        return "N/A", False
-    cmp = matcher.compare_categorical(baseline_value, website_value)
-    return ("Yes" if cmp['match'] else "No"), not cmp['match']
-
-
-def _build_result_row(
-    matcher: 'EnhancedCompanyMatcher',
-    baseline_row: pd.Series,
-    best_match,
-    match_info: dict,
-    spec: 'TemplateSpec',
-) -> dict:
-    """Build a single result row, including spec-conditional columns."""
-    exists = match_info['score'] >= matcher.fuzzy_threshold and best_match is not None
-    website_name = best_match['Company'] if exists else ""
-
-    row = {
-        "CR Name": baseline_row.get(spec.name_field, ''),
-        "Brand Name": baseline_row.get(spec.brand_field, ''),
-        "Website Name": website_name,
+    scores = [info['score'] for info in infos]
+    has_match = np.array([j is not None for j in positions], dtype=bool)
+    exists = has_match & (np.array(scores, dtype=float) >= matcher.fuzzy_threshold)
+    name_matches = exists & (np.array(scores, dtype=float) >= matcher.exact_match_threshold)
+    # Best website row per baseline row, joined in one take (row 0 stands in for "no match")
+    take = np.array([j if e else 0 for j, e in zip(positions, exists)], dtype=np.intp)
+
+    def website_column(column, missing):
+        if not len(website_df):
+            return [missing] * len(positions)
+        values = website_df[column].to_numpy(dtype=object)[take]
+        return [v if e else missing for v, e in zip(values.tolist(), exists)]
+
+    website_names = website_column('Company', "")
+    matched_website_companies = {name for name, e in zip(website_names, exists) if e}
+    is_unmatched = [name not in matched_website_companies for name in _column_values(website_df, 'Company')]
+    removed = website_df[np.array(is_unmatched, dtype=bool)] if len(website_df) else website_df
+
+    columns = {
+        "CR Name": _column_values(baseline_df, spec.name_field) + [""] * len(removed),
+        "Brand Name": _column_values(baseline_df, spec.brand_field) + [""] * len(removed),
+        "Website Name": website_names + _column_values(removed, 'Company'),
     }
-
-    name_matches = exists and match_info['score'] >= matcher.exact_match_threshold
-    field_mismatch = False
-
-    if spec.portfolio_field is not None:
-        baseline_portfolio = baseline_row.get(spec.portfolio_field, '')
-        website_portfolio = best_match['Portfolio'] if exists else ''
-        portfolio_match, mismatch = _compare_field(matcher, baseline_portfolio, website_portfolio, exists)
-        if mismatch:
-            field_mismatch = True
-        row["Portfolio"] = baseline_portfolio
-        row["Website Portfolio"] = website_portfolio
-        row["Portfolio Match"] = portfolio_match
-
-    if spec.ecosystem_field is not None:
-        baseline_ecosystem = baseline_row.get(spec.ecosystem_field, '')
-        website_ecosystem = (best_match['Ecosystem'] if exists else '') or ''
-        ecosystem_match, mismatch = _compare_field(matcher, baseline_ecosystem, website_ecosystem, exists)
-        if mismatch:
-            field_mismatch = True
-        row["Ecosystem"] = baseline_ecosystem
-        row["Website Ecosystem"] = website_ecosystem
-        row["Ecosystem Match"] = ecosystem_match
-
-    row.update({
-        "Match Score": round(match_info['score'], 1),
-        "Match Type": match_info.get('match_type', 'none'),
-        "Match Confidence": match_info.get('confidence', 'none'),
-        "Matched Field": match_info.get('matched_field', 'N/A'),
-        "PC exist in website": "Yes" if exists else "No",
+    field_mismatch = np.zeros(len(positions), dtype=bool)
+    for field, website_field in ((spec.portfolio_field, 'Portfolio'), (spec.ecosystem_field, 'Ecosystem')):
+        if field is None:
+            continue
+        baseline_values = _column_values(baseline_df, field)
+        website_values = website_column(website_field, '')
+        if website_field == 'Ecosystem':
+            website_values = [v or '' for v in website_values]
+        labels, mismatch = _compare_field(matcher, baseline_values, website_values, exists, comparisons)
+        field_mismatch |= mismatch
+        columns[website_field] = baseline_values + [""] * len(removed)
+        columns[f"Website {website_field}"] = website_values + [v or '' for v in _column_values(removed, website_field)]
+        columns[f"{website_field} Match"] = labels + ["N/A"] * len(removed)
+
+    status = np.select([~exists, ~name_matches | field_mismatch], ["Add", "Requires update"], "OK")
+    columns.update({
+        "Match Score": [round(score, 1) for score in scores] + [0] * len(removed),
+        "Match Type": [info.get('match_type', 'none') for info in infos] + ["unmatched"] * len(removed),
+        "Match Confidence": [info.get('confidence', 'none') for info in infos] + ["none"] * len(removed),
+        "Matched Field": [info.get('matched_field', 'N/A') for info in infos] + ["N/A"] * len(removed),
     })
+    if runner_ups is not None:
+        columns["Runner-up Matches"] = runner_ups + [""] * len(removed)
+    columns.update({
+        "PC exist in website": np.where(exists, "Yes", "No").tolist() + ["Yes"] * len(removed),
+        "Status": status.tolist() + ["Remove"] * len(removed),
+    })
+    results_df = pd.DataFrame(columns) if len(positions) + len(removed) else pd.DataFrame([])
 
-    if not exists:
-        row["Status"] = "Add"
-    elif not name_matches or field_mismatch:
-        row["Status"] = "Requires update"
-    else:
-        row["Status"] = "OK"
-
-    return row
+    unmatched_columns = {"Company": _column_values(removed, 'Company')} if len(removed) else {}
+    for column in ('Portfolio', 'Ecosystem'):
+        if unmatched_columns and column in website_df.columns:
+            unmatched_columns[column] = removed[column].tolist()
+    unmatched_df = pd.DataFrame(unmatched_columns) if unmatched_columns else pd.DataFrame([])
+    return results_df, unmatched_df
 
 
-def _build_remove_row(website_row: pd.Series, spec: 'TemplateSpec') -> dict:
-    """Build a result row for an unmatched website company."""
-    row = {
-        "CR Name": "",
-        "Brand Name": "",
-        "Website Name": website_row['Company'],
-    }
-    if spec.portfolio_field is not None:
-        row["Portfolio"] = ""
-        row["Website Portfolio"] = website_row.get('Portfolio', '') or ''
-        row["Portfolio Match"] = "N/A"
-    if spec.ecosystem_field is not None:
-        row["Ecosystem"] = ""
-        row["Website Ecosystem"] = website_row.get('Ecosystem', '') or ''
-        row["Ecosystem Match"] = "N/A"
-    row.update({
-        "Match Score": 0,
-        "Match Type": "unmatched",
-        "Match Confidence": "none",
-        "Matched Field": "N/A",
-        "PC exist in website": "Yes",
-        "Status": "Remove",
-    })
-    return row
+def _pairwise_ranked_matches(matcher, cr_names: list, brand_names: list, catalog,
+                             top_k: int = MATCH_TOP_K, report: bool = True) -> List[list]:
+    """ranked_match_positions for every baseline row, sharing the catalog, fuzzy matrix and blocking index."""
+    fuzzy = FuzzyScoreMatrix([matcher.normalize_company_name(name) for name in cr_names + brand_names],
+                             catalog.normalized)
+    candidates = CandidateIndex(catalog) if CANDIDATE_BLOCKING else None
+    ranked = [
+        matcher.ranked_match_positions(cr_name, brand_name, catalog, top_k, fuzzy, candidates)
+        for cr_name, brand_name in zip(cr_names, brand_names)
+    ]
+    if report and candidates is not None:
+        print(candidates.summary())
+    return ranked
+
+
+def _cascade_ranked_matches(matcher, cr_names: list, brand_names: list, catalog,
+                            top_k: int = MATCH_TOP_K, report: bool = True) -> List[list]:
+    """Same ranked candidates per row as the pairwise driver, computed strategy by strategy."""
+    cascade = MatchCascade(catalog)
+    ranked = cascade.ranked_matches(
+        [matcher.name_forms(name) for name in cr_names],
+        [matcher.name_forms(name) for name in brand_names],
+        top_k, matcher.fuzzy_threshold,
+    )
+    if report:
+        print(cascade.summary())
+    return ranked
+
+
+class ScoredComparison:
+    """Match candidates of a comparison, before thresholds turn them into a report.
+
+    score_comparison does the expensive part — scoring baseline names against
+    the website list — once. `evaluate()` then applies the assignment and the
+    fuzzy / sector / exact-match thresholds to the stored candidates and
+    categorical comparisons, so a report at other thresholds takes
+    milliseconds. Runner-ups are only kept down to the fuzzy threshold the
+    comparison was scored at; lowering it re-judges each row's best match
+    but cannot bring in weaker runner-ups.
+    """
 
+    def __init__(self, baseline_df: pd.DataFrame, website_df: pd.DataFrame, template_spec,
+                 matcher: EnhancedCompanyMatcher, website_names: tuple, candidates: CandidateMatrix, top_k: int):
+        self.baseline_df = baseline_df
+        self.website_df = website_df
+        self.template_spec = template_spec
+        self.thresholds = {
+            'fuzzy_threshold': matcher.fuzzy_threshold,
+            'sector_threshold': matcher.sector_threshold,
+            'exact_match_threshold': matcher.exact_match_threshold,
+        }
+        self.website_names = website_names
+        self.candidates = candidates
+        self.top_k = top_k
+        # compare_categorical results per (baseline, website) value pair, shared by every evaluate()
+        self.comparisons: Dict[tuple, dict] = {}
+        # Cache/reuse counts, copied into each report's attrs
+        self.reports: Dict[str, dict] = {}
+
+    def evaluate(self, assignment: str = MATCH_ASSIGNMENT, **thresholds) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """(results_df, unmatched_df) at the given thresholds (default: the ones scored at)."""
+        unknown = set(thresholds) - set(self.thresholds)
+        if unknown:
+            raise ValueError(f"Unknown thresholds: {', '.join(sorted(unknown))}")
+        matcher = EnhancedCompanyMatcher(**{**self.thresholds, **thresholds})
+
+        if assignment == 'one_to_one':
+            matches = self.candidates.assign_one_to_one(matcher.fuzzy_threshold)
+        else:
+            matches = self.candidates.best()
+        positions = [j for j, _ in matches]
+        infos = [info for _, info in matches]
+        runner_ups = None
+        if self.top_k > 1:
+            runner_ups = [
+                "; ".join(f"{self.website_names[j]} ({round(info['score'], 1):g})" for j, info in candidates)
+                for candidates in self.candidates.runner_ups(matches, matcher.fuzzy_threshold)
+            ]
+
+        results_df, unmatched_df = _assemble_results(matcher, self.baseline_df, self.website_df, positions, infos,
+                                                     self.template_spec, runner_ups, self.comparisons)
+        for key, report in self.reports.items():
+            results_df.attrs[key] = dict(report)
+        return results_df, unmatched_df
+
+
+class StoredMatches:
+    """The rows of a comparison served by the row store or the name cache.
+
+    `lookup()` takes, in that order, the stored candidates of rows unchanged
+    since a run against the same snapshot and the cached candidates of rows
+    whose names resolved before; `todo` is every other row. Once those are
+    scored, `record(comparison, ranked)` stores the new matches in both and
+    leaves the counts in `comparison.reports`.
+    """
 
-def enhanced_compare_companies(
+    def __init__(self, matcher: EnhancedCompanyMatcher, website_names: tuple, n_rows: int):
+        self.matcher = matcher
+        self.website_names = website_names
+        self.name_cache = None
+        self.row_store = None
+        self.snapshot_id: Optional[str] = None
+        self.row_hashes: List[str] = []
+        self.keys: Dict[int, str] = {}
+        self.reused: Dict[int, list] = {}
+        self.cached: Dict[int, list] = {}
+        self.stale = 0
+        self.pending = list(range(n_rows))
+        self.todo = list(self.pending)
+
+    @classmethod
+    def lookup(cls, matcher: EnhancedCompanyMatcher, baseline_df: pd.DataFrame, website_df: pd.DataFrame,
+               website_names: tuple, name_cache=None, row_store=None,
+               snapshot_id: Optional[str] = None) -> 'StoredMatches':
+        stored = cls(matcher, website_names, len(baseline_df))
+        if row_store is not None:
+            stored.row_store = row_store
+            stored.snapshot_id = snapshot_id or snapshot_fingerprint(website_df)
+            stored.row_hashes = baseline_row_hashes(baseline_df)
+            stored.reused = row_store.lookup(stored.snapshot_id, stored.row_hashes)
+            stored.pending = [i for i in stored.pending if i not in stored.reused]
+        if name_cache is not None:
+            stored.name_cache = name_cache
+            keys = baseline_cache_keys(matcher, baseline_df)
+            stored.keys = {i: keys[i] for i in stored.pending}
+            hits, stored.stale = name_cache.lookup([keys[i] for i in stored.pending], website_names)
+            stored.cached = {stored.pending[k]: candidates for k, candidates in hits.items()}
+        stored.todo = [i for i in stored.pending if i not in stored.cached]
+        return stored
+
+    @property
+    def served(self) -> Dict[int, list]:
+        return {**self.reused, **self.cached}
+
+    def record(self, comparison: 'ScoredComparison', ranked: List[list]):
+        names = self.website_names
+        if self.row_store is not None:
+            self.row_store.record(self.snapshot_id, [self.row_hashes[i] for i in self.pending],
+                                  [ranked[i] for i in self.pending])
+            print(f"Row reuse: {len(self.reused)} unchanged rows taken from snapshot {self.snapshot_id}, "
+                  f"{len(self.pending)} new or edited rows matched")
+            comparison.reports['row_reuse'] = {'snapshot_id': self.snapshot_id, 'reused': len(self.reused),
+                                               'rematched': len(self.pending)}
+        if self.name_cache is not None:
+            resolved = [
+                (self.keys[i], [(names[j], info) for j, info in ranked[i]])
+                for i in self.todo
+                if ranked[i] and ranked[i][0][1]['score'] >= self.matcher.fuzzy_threshold
+                and all(isinstance(names[j], str) for j, _ in ranked[i])
+            ]
+            evicted = self.name_cache.record(resolved, [self.keys[i] for i in self.cached])
+            report = {'hits': len(self.cached), 'misses': len(self.todo), 'stale': self.stale,
+                      'stored': len(resolved), 'evicted': evicted}
+            print(f"Name cache: {report['hits']} hits, {report['misses']} misses "
+                  f"({self.stale} cached targets no longer listed), {len(resolved)} stored, {evicted} evicted")
+            comparison.reports['name_cache'] = report
+
+
+def baseline_cache_keys(matcher: EnhancedCompanyMatcher, baseline_df: pd.DataFrame) -> List[str]:
+    """Name cache key of each baseline row."""
+    return [cache_key(matcher.normalize_company_name(cr_name), matcher.normalize_company_name(brand_name))
+            for cr_name, brand_name in zip(_column_values(baseline_df, 'CR Name'),
+                                           _column_values(baseline_df, 'Brand Name'))]
+
+
+def score_comparison(
     baseline_df: pd.DataFrame,
     website_df: pd.DataFrame,
     template_spec,
-) -> Tuple[pd.DataFrame, pd.DataFrame]:
-    """Compare baseline against website using the supplied TemplateSpec."""
+    driver: str = MATCH_DRIVER,
+    processes: int = MATCH_PROCESSES,
+    name_cache=None,
+    row_store=None,
+    snapshot_id: Optional[str] = None,
+    top_k: int = MATCH_TOP_K,
+) -> ScoredComparison:
+    """Score the baseline against the website; see enhanced_compare_companies for the options."""
     matcher = EnhancedCompanyMatcher()
     if template_spec.portfolio_field is not None:
         assert 'Portfolio' in website_df.columns, (
@@ -355,33 +616,77 @@ def enhanced_compare_companies(
         assert 'Ecosystem' in website_df.columns, (
             "TemplateSpec declares ecosystem_field but website_df is missing 'Ecosystem' column"
         )
-    results = []
-    matched_website_companies = set()
-
     print(f"Comparing {len(baseline_df)} baseline companies against "
           f"{len(website_df)} website companies (template={template_spec.kind})...")
 
-    for idx, baseline_row in baseline_df.iterrows():
-        best_match, match_info = matcher.find_best_match(baseline_row, website_df)
-        if best_match is not None and match_info['score'] >= matcher.fuzzy_threshold:
-            matched_website_companies.add(best_match['Company'])
-        results.append(_build_result_row(matcher, baseline_row, best_match, match_info, template_spec))
-
-    for _, website_row in website_df.iterrows():
-        if website_row['Company'] not in matched_website_companies:
-            results.append(_build_remove_row(website_row, template_spec))
-
-    results_df = pd.DataFrame(results)
-
-    unmatched_rows = []
-    for _, website_row in website_df.iterrows():
-        if website_row['Company'] not in matched_website_companies:
-            entry = {"Company": website_row['Company']}
-            if 'Portfolio' in website_df.columns:
-                entry["Portfolio"] = website_row.get('Portfolio', '')
-            if 'Ecosystem' in website_df.columns:
-                entry["Ecosystem"] = website_row.get('Ecosystem', '')
-            unmatched_rows.append(entry)
-    unmatched_df = pd.DataFrame(unmatched_rows)
+    catalog = matcher.build_catalog(website_df)
+    cr_names = _column_values(baseline_df, 'CR Name')
+    brand_names = _column_values(baseline_df, 'Brand Name')
+    ranked: List[Optional[list]] = [None] * len(cr_names)
+    stored = StoredMatches.lookup(matcher, baseline_df, website_df, catalog.names, name_cache, row_store, snapshot_id)
+    todo = stored.todo
+
+    match_fn = partial(_cascade_ranked_matches if driver == 'cascade' else _pairwise_ranked_matches, top_k=top_k)
+    todo_cr = [cr_names[i] for i in todo]
+    todo_brand = [brand_names[i] for i in todo]
+    processes = resolve_processes(processes)
+    if processes > 1 and len(todo) >= MATCH_PARALLEL_MIN_ROWS:
+        scored = parallel_best_matches(match_fn, matcher, todo_cr, todo_brand, catalog, processes)
+    else:
+        scored = match_fn(matcher, todo_cr, todo_brand, catalog)
+    for i, candidates in list(stored.served.items()) + list(zip(todo, scored)):
+        ranked[i] = candidates
+
+    comparison = ScoredComparison(baseline_df, website_df, template_spec, matcher, catalog.names,
+                                  CandidateMatrix(ranked), top_k)
+    stored.record(comparison, ranked)
+    return comparison
 
-    return results_df, unmatched_df
+
+def enhanced_compare_companies(
+    baseline_df: pd.DataFrame,
+    website_df: pd.DataFrame,
+    template_spec,
+    driver: str = MATCH_DRIVER,
+    processes: int = MATCH_PROCESSES,
+    name_cache=None,
+    row_store=None,
+    snapshot_id: Optional[str] = None,
+    assignment: str = MATCH_ASSIGNMENT,
+    top_k: int = MATCH_TOP_K,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Compare baseline against website using the supplied TemplateSpec.
+
+    `driver` picks how best matches are found: "cascade" (MatchCascade,
+    strategy by strategy over the whole baseline) or "pairwise"
+    (find_best_match per row). Both give the same results. CANDIDATE_BLOCKING
+    only applies to the pairwise driver.
+
+    Each row gets up to `top_k` candidates (its best match, then runner-ups
+    at or above the fuzzy threshold), kept in a CandidateMatrix. With
+    `assignment` "one_to_one" a website company is matched to one baseline
+    row only — the highest-scoring claimant — and the others fall back to
+    their runner-ups; "independent" lets every row keep its own best. With
+    `top_k` > 1 the other qualifying candidates are listed in a
+    "Runner-up Matches" column.
+
+    With `processes` > 1 (-1 = one per CPU), baselines of at least
+    MATCH_PARALLEL_MIN_ROWS rows are matched in shards on a process pool.
+
+    With a `name_cache` (NameResolutionCache), rows whose names resolved in
+    an earlier run take the cached website company while it is still
+    listed; only the rest are scored. Hit/miss counts are left in
+    `results_df.attrs['name_cache']`.
+
+    With a `row_store` (RowMatchStore), rows unchanged since an earlier run
+    against the same website snapshot (`snapshot_id`, by default the
+    fingerprint of website_df) reuse that run's match; counts are left in
+    `results_df.attrs['row_reuse']`. Status and Remove rows are always
+    rebuilt from the whole baseline.
+
+    This is score_comparison(...).evaluate(assignment); keep the
+    ScoredComparison to re-evaluate at other thresholds.
+    """
+    comparison = score_comparison(baseline_df, website_df, template_spec, driver, processes,
+                                  name_cache, row_store, snapshot_id, top_k)
+    return comparison.evaluate(assignment)
@@ -0,0 +1,83 @@
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from config import FUZZY_SCORE_CUTOFF, FUZZY_WORKERS
+
+# Strategy 5 of EnhancedCompanyMatcher.score_forms: best of these three
+FUZZY_SCORERS = (fuzz.ratio, fuzz.partial_ratio, fuzz.token_sort_ratio)
+# Rows of the score matrix computed per cdist call, to bound peak memory
+_CHUNK_ROWS = 1024
+# Cores used when a matrix doesn't ask for a number; see limit_workers()
+_default_workers = FUZZY_WORKERS
+
+
+def limit_workers(workers: int):
+    """Change the default cdist worker count for this process.
+
+    Matching worker processes set this to 1 so N processes don't each
+    start a thread per core.
+    """
+    global _default_workers
+    _default_workers = workers
+
+
+class FuzzyScoreMatrix:
+    """Strategy-5 fuzzy scores for every baseline × website name pair, batched.
+
+    Built with `rapidfuzz.process.cdist` (one call per scorer, spread over
+    `workers` cores) on the distinct normalized names of each side, instead of
+    three scorer calls per pair from Python. Each cell is the max of ratio,
+    partial_ratio and token_sort_ratio — the same scorers, with no processor,
+    on the same normalized strings — so it equals what the per-pair fallback
+    computes. Pairs the too_short / length_mismatch guards reject score 0.
+
+    Scores below `score_cutoff` come back as 0; the default 0 keeps every
+    score exact, a higher cutoff lets rapidfuzz skip work on weak pairs.
+    """
+
+    def __init__(self, queries: Sequence[str], choices: Sequence[str],
+                 workers: Optional[int] = None, score_cutoff: float = FUZZY_SCORE_CUTOFF):
+        self._query_index: Dict[str, int] = {q: i for i, q in enumerate(dict.fromkeys(queries))}
+        unique_choices = list(dict.fromkeys(choices))
+        choice_index = {c: i for i, c in enumerate(unique_choices)}
+        # Column of the matrix holding each choice, in the caller's order
+        self._choice_columns = np.fromiter((choice_index[c] for c in choices), dtype=np.intp, count=len(choices))
+        if workers is None:
+            workers = _default_workers
+        self.scores = self._score(list(self._query_index), unique_choices, workers, score_cutoff)
+
+    @staticmethod
+    def _score(queries, choices, workers, score_cutoff) -> np.ndarray:
+        scores = np.zeros((len(queries), len(choices)), dtype=np.float64)
+        if not queries or not choices:
+            return scores
+
+        choice_lengths = np.fromiter(map(len, choices), dtype=np.int64, count=len(choices))
+        for start in range(0, len(queries), _CHUNK_ROWS):
+            chunk = queries[start:start + _CHUNK_ROWS]
+            block = scores[start:start + len(chunk)]
+            for scorer in FUZZY_SCORERS:
+                np.maximum(block, process.cdist(chunk, choices, scorer=scorer, dtype=np.float64,
+                                                workers=workers, score_cutoff=score_cutoff), out=block)
+
+            # Same guards as score_forms: too_short, then length_mismatch
+            query_lengths = np.fromiter(map(len, chunk), dtype=np.int64, count=len(chunk))[:, None]
+            shorter = np.minimum(query_lengths, choice_lengths)
+            longer = np.maximum(query_lengths, choice_lengths)
+            too_short = shorter < 3
+            with np.errstate(divide='ignore', invalid='ignore'):
+                length_mismatch = shorter / longer < 0.3
+            block[too_short | length_mismatch] = 0
+        return scores
+
+    def row(self, query: str) -> Optional[np.ndarray]:
+        """Scores of `query` against every choice, in the order the choices were given.
+
+        None when `query` was not among the names the matrix was built for.
+        """
+        i = self._query_index.get(query)
+        if i is None:
+            return None
+        return self.scores[i][self._choice_columns]
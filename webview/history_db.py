@@ -0,0 +1,137 @@
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+from config import HISTORY_BUSY_TIMEOUT_MS
+
+
+class HistoryDatabase:
+    """Connections to one SQLite history file, shared by every tracker in the process.
+
+    Uploads save their runs from their own job threads while Flask reads
+    history from request threads. The database is in WAL mode, so:
+
+    - `read()` hands each thread its own long-lived connection, opened on
+      first use. Readers run in parallel with each other and with the
+      writer, each seeing the last committed state.
+    - `write(fn)` runs `fn(conn)` in one `BEGIN IMMEDIATE` transaction on a
+      single writer thread, in submission order, and returns its result (or
+      raises its exception, after rolling back). Tracker writes are never
+      concurrent, so they can't lock each other out; the history tracker,
+      the name cache and the row store all write through it, and the busy
+      timeout covers another process writing to the file.
+
+    `for_path(db_path)` returns the process-wide instance for a file.
+    """
+
+    _instances: Dict[str, 'HistoryDatabase'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, db_path: str, busy_timeout_ms: int = HISTORY_BUSY_TIMEOUT_MS):
+        self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._queue: Optional[queue.Queue] = None
+        self._writer: Optional[threading.Thread] = None
+        self._writer_conn: Optional[sqlite3.Connection] = None
+        self.stats: Dict[str, int] = {'writes': 0, 'read_connections': 0}
+
+    @classmethod
+    def for_path(cls, db_path: str) -> 'HistoryDatabase':
+        key = os.path.abspath(db_path)
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(db_path)
+            return cls._instances[key]
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit: reads see the latest commit, writes manage their own transaction
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000, isolation_level=None)
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout_ms)}')
+        # WAL makes a commit an append to the log; NORMAL only syncs it at checkpoints
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        return conn
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        """This thread's read connection."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Closed when the thread exits and its locals are dropped
+            conn = self._local.conn = self._connect()
+            self.stats['read_connections'] += 1
+        yield conn
+
+    def write(self, fn: Callable[[sqlite3.Connection], object], transaction: bool = True):
+        """Run `fn(conn)` on the writer thread and return its result.
+
+        `fn` runs in a transaction unless `transaction` is False, which is
+        for statements SQLite won't run inside one, such as VACUUM.
+        """
+        if threading.current_thread() is self._writer:
+            # Called from inside another write: already in its transaction
+            return fn(self._writer_conn)
+        future: Future = Future()
+        self._ensure_writer().put((fn, transaction, future))
+        return future.result()
+
+    def _ensure_writer(self) -> queue.Queue:
+        with self._lock:
+            if self._queue is None:
+                self._queue = queue.Queue()
+                self._writer = threading.Thread(target=self._run_writer, args=(self._queue,),
+                                                name='history-writer', daemon=True)
+                self._writer.start()
+                atexit.register(self.close)
+            return self._queue
+
+    def _run_writer(self, jobs: queue.Queue):
+        conn = None
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+            fn, transaction, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if conn is None:
+                    opened = self._connect()
+                    # Both persistent. auto_vacuum only takes effect on a new file (or after
+                    # a VACUUM), so that freed pages can later be returned incrementally
+                    opened.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                    opened.execute('PRAGMA journal_mode = WAL')
+                    self._writer_conn = conn = opened
+                if not transaction:
+                    result = fn(conn)
+                else:
+                    conn.execute('BEGIN IMMEDIATE')
+                    try:
+                        result = fn(conn)
+                        conn.execute('COMMIT')
+                    except BaseException:
+                        conn.execute('ROLLBACK')
+                        raise
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                self.stats['writes'] += 1
+                future.set_result(result)
+        if conn is not None:
+            conn.close()
+
+    def close(self):
+        """Stop the writer once queued writes are done. Safe to call more than once."""
+        with self._lock:
+            jobs, writer = self._queue, self._writer
+            self._queue = self._writer = None
+        if jobs is not None:
+            jobs.put(None)
+            writer.join(timeout=30)
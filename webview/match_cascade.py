@@ -0,0 +1,206 @@
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from fuzzy_matrix import FuzzyScoreMatrix
+from website_catalog import NameForms, WebsiteCatalog
+
+# Hash-join results, as score_forms returns them
+_EXACT = (100, 'exact_normalized', 'high')
+_CORE = (98, 'core_exact', 'high')
+_ACRONYM = (96, 'acronym_match', 'high')
+_SUBSTRING_LONG = (95, 'substring', 'high')
+_SUBSTRING_SHORT = (88, 'substring', 'medium')
+# Baseline cores compared per substring block, to bound the n × m temporaries
+_SUBSTRING_CHUNK = 256
+
+
+def _result(score, match_type, confidence) -> Dict:
+    return {'score': score, 'match_type': match_type, 'confidence': confidence}
+
+
+def _fuzzy_result(score: float) -> Dict:
+    return _result(score, 'fuzzy', 'high' if score >= 92 else 'medium' if score >= 85 else 'low')
+
+
+class MatchCascade:
+    """Whole-baseline matching driver that runs the strategies pass by pass.
+
+    Instead of scoring every baseline × website pair through all five
+    strategies, each strategy runs once for the whole baseline:
+
+      1. exact_normalized — dict join on the normalized name
+      2. core_exact       — dict join on the core name
+      3. acronym_match    — dict joins on single short core words;
+         substring        — vectorized containment test on long cores
+      4. token_based      — inverted index on meaningful tokens, counting overlap
+      5. fuzzy            — FuzzyScoreMatrix, with the row's best hash-join
+                            score as cdist score_cutoff
+
+    A pair takes the first pass that hits it, which is score_forms'
+    precedence. Passes 1–4 give each row a lower bound on its best score, so
+    the fuzzy pass only has to find cells that reach it: a row with an exact
+    hit just needs a cutoff-100 check, a row with no hit gets full fuzzy
+    scores. The chosen match (first website row with the best CR/Brand
+    score) and its score, match_type and confidence equal find_best_match's.
+    """
+
+    def __init__(self, catalog: WebsiteCatalog):
+        self.catalog = catalog
+        self._by_normalized: Dict[str, List[int]] = defaultdict(list)
+        self._by_core: Dict[str, List[int]] = defaultdict(list)
+        self._by_upper_word: Dict[str, List[int]] = defaultdict(list)
+        self._by_short_core: Dict[str, List[int]] = defaultdict(list)
+        self._by_meaningful: Dict[str, List[int]] = defaultdict(list)
+        long_cores = []
+        for j, forms in enumerate(catalog.forms):
+            self._by_normalized[forms.normalized].append(j)
+            if not forms.core:
+                continue
+            self._by_core[forms.core].append(j)
+            for word in forms.core_words_upper:
+                self._by_upper_word[word].append(j)
+            if len(forms.core) <= 10 and len(forms.core_words) == 1:
+                self._by_short_core[forms.core.upper()].append(j)
+            if len(forms.core) >= 8:
+                long_cores.append(j)
+            for token in forms.meaningful:
+                self._by_meaningful[token].append(j)
+        self._long_core_positions = np.array(long_cores, dtype=np.intp)
+        self._long_cores = np.array([catalog.core[j] for j in long_cores], dtype=str)
+        self._long_core_lengths = np.fromiter(map(len, self._long_cores), dtype=np.int64, count=len(long_cores))
+        self.stats: Dict[str, int] = Counter()
+
+    def _hash_joins(self, forms: NameForms) -> Dict[int, tuple]:
+        """Strategies 1–4 (minus substring) for one baseline name: {website position: result}."""
+        hits: Dict[int, tuple] = {}
+
+        def add(positions, result):
+            for j in positions:
+                hits.setdefault(j, result)
+
+        add(self._by_normalized.get(forms.normalized, ()), _EXACT)
+        if not forms.core:
+            return hits
+        add(self._by_core.get(forms.core, ()), _CORE)
+        if len(forms.core) <= 10 and len(forms.core_words) == 1:
+            add(self._by_upper_word.get(forms.core.upper(), ()), _ACRONYM)
+        for word in forms.core_words_upper:
+            add(self._by_short_core.get(word, ()), _ACRONYM)
+        return hits
+
+    def _substring_hits(self, names: Sequence[NameForms]) -> Dict[str, Dict[int, tuple]]:
+        """Substring containment for every long baseline core, keyed by core."""
+        cores = sorted({f.core for f in names if len(f.core) >= 8})
+        found: Dict[str, Dict[int, tuple]] = {}
+        if not cores or not len(self._long_cores):
+            return found
+        website = self._long_cores[None, :]
+        website_lengths = self._long_core_lengths[None, :]
+        for start in range(0, len(cores), _SUBSTRING_CHUNK):
+            chunk = np.array(cores[start:start + _SUBSTRING_CHUNK], dtype=str)[:, None]
+            lengths = np.fromiter(map(len, chunk[:, 0]), dtype=np.int64, count=len(chunk))[:, None]
+            contained = (np.char.find(website, chunk) >= 0) | (np.char.find(chunk, website) >= 0)
+            contained &= np.minimum(lengths, website_lengths) / np.maximum(lengths, website_lengths) >= 0.6
+            for row, col in zip(*np.nonzero(contained)):
+                core = str(chunk[row, 0])
+                result = _SUBSTRING_LONG if len(core) > 10 else _SUBSTRING_SHORT
+                found.setdefault(core, {})[int(self._long_core_positions[col])] = result
+        return found
+
+    def _token_hits(self, forms: NameForms, hits: Dict[int, tuple]):
+        shared = Counter()
+        for token in forms.meaningful:
+            shared.update(self._by_meaningful.get(token, ()))
+        for j, common in shared.items():
+            if common < 2 or j in hits:
+                continue
+            token_ratio = common / (len(forms.meaningful) + len(self.catalog.forms[j].meaningful) - common)
+            if token_ratio >= 0.75:
+                hits[j] = (int(token_ratio * 92), 'token_based', 'high' if token_ratio >= 0.85 else 'medium')
+
+    def _resolve(self, names: Sequence[NameForms]) -> Dict[str, Dict[int, tuple]]:
+        """Passes 1–4 for each distinct baseline name, keyed by normalized name."""
+        substrings = self._substring_hits(names)
+        resolved: Dict[str, Dict[int, tuple]] = {}
+        for forms in names:
+            if forms.normalized in resolved:
+                continue
+            hits = self._hash_joins(forms)
+            for j, result in substrings.get(forms.core, {}).items():
+                hits.setdefault(j, result)
+            self._token_hits(forms, hits)
+            resolved[forms.normalized] = hits
+        return resolved
+
+    def best_matches(self, cr_names: Sequence[NameForms],
+                     brand_names: Sequence[NameForms]) -> List[Tuple[Optional[int], Dict]]:
+        """(best website position or None, match info) per baseline row."""
+        return [
+            ranked[0] if ranked else (None, _result(0, 'none', 'none'))
+            for ranked in self.ranked_matches(cr_names, brand_names, 1)
+        ]
+
+    def ranked_matches(self, cr_names: Sequence[NameForms], brand_names: Sequence[NameForms],
+                       top_k: int, min_score: float = 100) -> List[List[Tuple[int, Dict]]]:
+        """Up to `top_k` (website position, match info) per baseline row, best first.
+
+        The first entry is best_matches' match; runner-ups follow while they
+        score at least `min_score`, which also caps the fuzzy cutoff so they
+        are not cut off with the rest.
+        """
+        resolved = self._resolve(list(cr_names) + list(brand_names))
+        rows = list(zip(cr_names, brand_names))
+
+        # Best score passes 1–4 already guarantee each row
+        floors = [
+            max((r[0] for f in row for r in resolved[f.normalized].values()), default=0)
+            for row in rows
+        ]
+        by_floor: Dict[int, List[int]] = defaultdict(list)
+        for i, floor in enumerate(floors):
+            by_floor[floor].append(i)
+
+        matches: List[List[Tuple[int, Dict]]] = [[] for _ in rows]
+        for floor, row_indexes in by_floor.items():
+            queries = [f.normalized for i in row_indexes for f in rows[i]]
+            cutoff = floor if top_k == 1 else min(floor, min_score)
+            fuzzy = FuzzyScoreMatrix(queries, self.catalog.normalized, score_cutoff=cutoff)
+            self.stats['fuzzy_cells'] += fuzzy.scores.size
+            self.stats['rows_resolved' if floor else 'rows_unresolved'] += len(row_indexes)
+            for i in row_indexes:
+                matches[i] = self._rank(rows[i], resolved, fuzzy, top_k, min_score)
+        return matches
+
+    def _rank(self, row, resolved, fuzzy: FuzzyScoreMatrix, top_k: int,
+              min_score: float) -> List[Tuple[int, Dict]]:
+        scores = []
+        for forms in row:
+            field_scores = fuzzy.row(forms.normalized).copy()
+            for j, result in resolved[forms.normalized].items():
+                field_scores[j] = result[0]
+            scores.append(field_scores)
+        cr_scores, brand_scores = scores
+        pair_scores = np.maximum(cr_scores, brand_scores)
+        if top_k == 1:
+            order = [int(np.argmax(pair_scores))] if len(pair_scores) else []
+        else:
+            order = np.argsort(-pair_scores, kind='stable')[:top_k].tolist()
+
+        ranked = []
+        for j in order:
+            if pair_scores[j] <= 0 or (ranked and pair_scores[j] < min_score):
+                break
+            use_cr = cr_scores[j] >= brand_scores[j]
+            forms = row[0] if use_cr else row[1]
+            hit = resolved[forms.normalized].get(j)
+            info = _result(*hit) if hit is not None else _fuzzy_result(float((cr_scores if use_cr else brand_scores)[j]))
+            info['matched_field'] = 'CR Name' if use_cr else 'Brand Name'
+            ranked.append((j, info))
+        return ranked
+
+    def summary(self) -> str:
+        return (f"Match cascade: {self.stats['rows_resolved']} rows resolved by strategies 1-4 "
+                f"(fuzzy pass cut off at their score), {self.stats['rows_unresolved']} rows needed full "
+                f"fuzzy scoring; {self.stats['fuzzy_cells']} fuzzy cells")
@@ -0,0 +1,130 @@
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from config import MATCH_TOP_K, NAME_CACHE_TTL_DAYS
+from history_db import HistoryDatabase
+
+_DEFAULT_DB_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "comparison_history.db"
+)
+
+# Bump whenever a change to EnhancedCompanyMatcher's strategies could pick a
+# different website company or score for the same names; entries written by
+# another version (or with another number of candidates) are ignored and evicted.
+MATCHER_VERSION = f"2-top{MATCH_TOP_K}"
+
+
+def cache_key(normalized_cr: str, normalized_brand: str) -> str:
+    """Cache key of a baseline row: its normalized CR and Brand names."""
+    return f"{normalized_cr}\x1f{normalized_brand}"
+
+
+class NameResolutionCache:
+    """Baseline names → the website company they matched, kept in a
+    `name_resolutions` table of the comparison history database.
+
+    Only matches at or above the fuzzy threshold are stored, with their
+    runner-up candidates. A cached entry is used as long as its website
+    company is still in the current scrape (runner-ups no longer listed are
+    dropped); a row whose target has disappeared, or that has no entry, is
+    scored as usual.
+    Entries from another MATCHER_VERSION, or unused for `ttl_days`, are evicted.
+    """
+
+    def __init__(self, db_path: str = _DEFAULT_DB_PATH, ttl_days: float = NAME_CACHE_TTL_DAYS,
+                 version: str = MATCHER_VERSION):
+        self.db_path = db_path
+        self.ttl_days = ttl_days
+        self.version = version
+        self.db = HistoryDatabase.for_path(db_path)
+        self.init_database()
+
+    def init_database(self):
+        self.db.write(self._create_schema)
+
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection):
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(name_resolutions)')}
+        if columns and 'candidates' not in columns:
+            # Written before runner-up candidates were kept; it is only a cache
+            conn.execute('DROP TABLE name_resolutions')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS name_resolutions (
+                baseline_key TEXT PRIMARY KEY,
+                website_name TEXT NOT NULL,
+                candidates TEXT NOT NULL,
+                matcher_version TEXT NOT NULL,
+                resolved_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            )
+        ''')
+
+    def lookup(self, keys: Sequence[str],
+               website_names: Sequence[str]) -> Tuple[Dict[int, List[Tuple[int, Dict]]], int]:
+        """Cached candidates for `keys` against the current website list.
+
+        Returns ({row: [(website position, match info), ...]}, stale), where
+        stale counts rows whose cached website company is no longer listed.
+        """
+        positions: Dict[str, int] = {}
+        for j, name in enumerate(website_names):
+            positions.setdefault(name, j)
+
+        with self.db.read() as conn:
+            entries = dict(conn.execute(
+                'SELECT baseline_key, candidates FROM name_resolutions WHERE matcher_version = ?',
+                (self.version,),
+            ))
+
+        hits: Dict[int, List[Tuple[int, Dict]]] = {}
+        stale = 0
+        for i, key in enumerate(keys):
+            entry = entries.get(key)
+            if entry is None:
+                continue
+            candidates = json.loads(entry)
+            if candidates[0][0] not in positions:
+                stale += 1
+                continue
+            hits[i] = [(positions[name], info) for name, info in candidates if name in positions]
+        return hits, stale
+
+    def known(self, keys: Sequence[str]) -> List[int]:
+        """Indexes of the `keys` that have an entry, whether or not its target is still listed."""
+        with self.db.read() as conn:
+            entries = {key for (key,) in conn.execute(
+                'SELECT baseline_key FROM name_resolutions WHERE matcher_version = ?', (self.version,),
+            )}
+        return [i for i, key in enumerate(keys) if key in entries]
+
+    def record(self, resolved: Sequence[Tuple[str, List[Tuple[str, Dict]]]], used: Sequence[str]) -> int:
+        """Store new (key, [(website name, info), ...]) resolutions, best
+        first; touch the `used` keys, then evict stale entries. Returns the
+        number evicted."""
+        now = time.time()
+        rows = [(key, candidates[0][0], json.dumps(candidates), self.version, now, now)
+                for key, candidates in resolved]
+
+        def store(conn: sqlite3.Connection) -> int:
+            conn.executemany('''
+                INSERT OR REPLACE INTO name_resolutions
+                (baseline_key, website_name, candidates, matcher_version, resolved_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+            conn.executemany(
+                'UPDATE name_resolutions SET last_used_at = ? WHERE baseline_key = ?',
+                [(now, key) for key in used],
+            )
+            return conn.execute(
+                'DELETE FROM name_resolutions WHERE matcher_version != ? OR last_used_at < ?',
+                (self.version, now - self.ttl_days * 86400),
+            ).rowcount
+
+        return self.db.write(store)
+
+    def __len__(self) -> int:
+        with self.db.read() as conn:
+            return conn.execute('SELECT COUNT(*) FROM name_resolutions').fetchone()[0]
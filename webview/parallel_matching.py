@@ -0,0 +1,109 @@
+import math
+import multiprocessing
+import os
+import pickle
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Optional, Sequence
+
+import fuzzy_matrix
+from website_catalog import WebsiteCatalog
+
+# Per-worker state: the comparison whose matcher and catalog are loaded
+_loaded_path = None
+_match_fn = None
+_matcher = None
+_catalog = None
+
+# Shards per process: enough to even out slow shards without much per-task overhead
+_SHARDS_PER_PROCESS = 4
+
+# One pool for the life of the process; starting workers costs about a second
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+
+def resolve_processes(processes: int) -> int:
+    """-1 means one per CPU; 0 or 1 means don't use a pool."""
+    if processes < 0:
+        return os.cpu_count() or 1
+    return processes
+
+
+def _init_worker():
+    fuzzy_matrix.limit_workers(1)
+
+
+def _match_shard(payload_path: str, cr_names: list, brand_names: list) -> list:
+    global _loaded_path, _match_fn, _matcher, _catalog
+    if payload_path != _loaded_path:
+        with open(payload_path, 'rb') as f:
+            _match_fn, _matcher, _catalog = pickle.load(f)
+        _loaded_path = payload_path
+    return _match_fn(_matcher, cr_names, brand_names, _catalog, report=False)
+
+
+def _get_pool(processes: int) -> ProcessPoolExecutor:
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None or _pool_size != processes:
+            if _pool is not None:
+                # Work already submitted to the old pool still finishes
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+            )
+            _pool_size = processes
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+
+
+def parallel_best_matches(match_fn: Callable, matcher, cr_names: Sequence, brand_names: Sequence,
+                          catalog: WebsiteCatalog, processes: int) -> List[tuple]:
+    """Run `match_fn` over shards of the baseline on a process pool.
+
+    `match_fn(matcher, cr_names, brand_names, catalog, report=...)` must be a
+    module-level function (or a functools.partial of one) returning one
+    result per row. The pool stays up between comparisons. The matcher and
+    catalog are pickled once to a temporary file that each worker loads on
+    its first shard of the comparison; tasks only carry the file name and
+    their shard of names. Results come back in baseline order.
+
+    Workers are spawned fresh rather than forked, since the app calling this
+    runs browser and upload threads.
+    """
+    n = len(cr_names)
+    shard_size = max(1, math.ceil(n / (processes * _SHARDS_PER_PROCESS)))
+    starts = range(0, n, shard_size)
+    print(f"Matching {n} rows in {len(starts)} shards on {processes} processes...")
+    fd, payload_path = tempfile.mkstemp(prefix=f'match_{uuid.uuid4().hex}_', suffix='.pickle')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((match_fn, matcher, catalog), f, protocol=pickle.HIGHEST_PROTOCOL)
+        pool = _get_pool(processes)
+        try:
+            shards = list(pool.map(
+                _match_shard,
+                [payload_path] * len(starts),
+                [list(cr_names[i:i + shard_size]) for i in starts],
+                [list(brand_names[i:i + shard_size]) for i in starts],
+            ))
+        except BrokenProcessPool:
+            # A worker died; the next comparison starts a fresh pool
+            _discard_pool(pool)
+            raise
+        return [match for shard in shards for match in shard]
+    finally:
+        os.remove(payload_path)
@@ -2,24 +2,250 @@ import os
 import pandas as pd
 import json
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 import sqlite3
 
+from enhanced_matching import EnhancedCompanyMatcher
+from history_db import HistoryDatabase
+
 _DEFAULT_DB_PATH = os.path.join(
     os.path.dirname(os.path.abspath(__file__)), "comparison_history.db"
 )
 
 
+# Name columns of a result row, stored once per distinct combination in company_names,
+# and the results_df column each is saved from, with the value used when it's missing
+_NAME_COLUMNS = (
+    ('cr_name', 'CR Name', ''),
+    ('brand_name', 'Brand Name', ''),
+    ('website_name', 'Website Name', ''),
+)
+
+# The other columns of company_history, likewise
+_HISTORY_COLUMNS = (
+    ('portfolio', 'Portfolio', None),
+    ('website_portfolio', 'Website Portfolio', None),
+    ('ecosystem', 'Ecosystem', None),
+    ('website_ecosystem', 'Website Ecosystem', None),
+    ('match_score', 'Match Score', 0),
+    ('status', 'Status', ''),
+)
+
+# Per-run counts kept in run_aggregates; all but the last two are always present
+_AGGREGATE_COLUMNS = (
+    'total_rows', 'ok', 'missing_from_website', 'extra_on_website', 'requires_update',
+    'name_mismatches', 'portfolio_mismatches', 'ecosystem_mismatches',
+)
+
+
+def _add_company_dimension(cursor: sqlite3.Cursor):
+    """Migration 3: move company names out of company_history into companies/company_names."""
+    cursor.execute('''
+        CREATE TABLE companies (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            company_key TEXT NOT NULL UNIQUE,
+            display_name TEXT NOT NULL,
+            first_run_id INTEGER
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE company_names (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name_key TEXT NOT NULL UNIQUE,
+            company_id INTEGER,
+            cr_name TEXT,
+            brand_name TEXT,
+            website_name TEXT,
+            FOREIGN KEY (company_id) REFERENCES companies (id)
+        )
+    ''')
+    cursor.execute('ALTER TABLE company_history ADD COLUMN company_id INTEGER REFERENCES companies (id)')
+    cursor.execute('ALTER TABLE company_history ADD COLUMN name_id INTEGER REFERENCES company_names (id)')
+
+    rows = cursor.execute(
+        'SELECT id, run_id, cr_name, brand_name, website_name FROM company_history ORDER BY id'
+    ).fetchall()
+    company_ids, name_ids = _ensure_identities(
+        cursor, [row[2:] for row in rows], [row[1] for row in rows],
+    )
+    cursor.executemany(
+        'UPDATE company_history SET company_id = ?, name_id = ? WHERE id = ?',
+        zip(company_ids, name_ids, (row[0] for row in rows)),
+    )
+
+    cursor.execute('DROP INDEX IF EXISTS idx_company_history_cr_name')
+    for column, _, _ in _NAME_COLUMNS:
+        cursor.execute(f'ALTER TABLE company_history DROP COLUMN {column}')
+    cursor.execute('CREATE INDEX idx_company_history_company ON company_history (company_id, run_id)')
+    cursor.execute('''
+        CREATE VIEW company_history_named AS
+        SELECT h.id, h.run_id, h.company_id, n.cr_name, n.brand_name, n.website_name,
+               h.portfolio, h.website_portfolio, h.ecosystem, h.website_ecosystem,
+               h.match_score, h.status, h.created_at
+        FROM company_history h LEFT JOIN company_names n ON n.id = h.name_id
+    ''')
+
+
+_normalizer = EnhancedCompanyMatcher()
+
+
+def company_key(name) -> str:
+    """Stable identity of a company name: its normalized form, '' for no name."""
+    if name is None or pd.isna(name) or not str(name).strip():
+        return ''
+    return _normalizer.normalize_company_name(name) or str(name).lower().strip()
+
+
+def _lookup(cursor, table: str, key_column: str, columns: str, keys: List[str]) -> Dict[str, tuple]:
+    """`{key: (columns...)}` for those of `keys` that are in `table`."""
+    found = {}
+    # Chunked to stay under SQLite's bound-parameter limit
+    for start in range(0, len(keys), 500):
+        chunk = keys[start:start + 500]
+        for key, *values in cursor.execute(
+            f'SELECT {key_column}, {columns} FROM {table} WHERE {key_column} IN ({", ".join("?" * len(chunk))})',
+            chunk,
+        ):
+            found[key] = tuple(values)
+    return found
+
+
+def _ensure_identities(cursor, names: Iterable[tuple], run_ids: Iterable[int]) -> Tuple[List, List[int]]:
+    """Company and name ids of each row's (cr_name, brand_name, website_name).
+
+    A row belongs to the company its CR Name normalizes to, or, for
+    website-only rows, its website name; rows with neither get no company.
+    Only name combinations no earlier run saved are normalized and added.
+    """
+    rows = list(names)
+    first_run: Dict[tuple, int] = {}
+    for triple, run_id in zip(rows, run_ids):
+        first_run.setdefault(triple, run_id)
+    # repr keeps None apart from '' (and a number from its string)
+    name_keys = {triple: repr(triple) for triple in first_run}
+    known = _lookup(cursor, 'company_names', 'name_key', 'id, company_id', list(name_keys.values()))
+
+    new = [triple for triple in first_run if name_keys[triple] not in known]
+    keys_by_name: Dict = {}
+    identities = {}
+    for triple in new:
+        cr_name, _, website_name = triple
+        identities[triple] = (None, None)
+        for name in (cr_name, website_name):
+            if name not in keys_by_name:
+                keys_by_name[name] = company_key(name)
+            if keys_by_name[name]:
+                identities[triple] = (keys_by_name[name], str(name).strip())
+                break
+
+    company_ids = {
+        key: company_id for key, (company_id,) in _lookup(
+            cursor, 'companies', 'company_key', 'id', list({key for key, _ in identities.values() if key}),
+        ).items()
+    }
+    for triple in new:
+        key, display = identities[triple]
+        if key and key not in company_ids:
+            company_ids[key] = cursor.execute(
+                'INSERT INTO companies (company_key, display_name, first_run_id) VALUES (?, ?, ?)',
+                (key, display, first_run[triple]),
+            ).lastrowid
+        name_id = cursor.execute(
+            'INSERT INTO company_names (name_key, company_id, cr_name, brand_name, website_name) VALUES (?, ?, ?, ?, ?)',
+            (name_keys[triple], company_ids.get(key), *triple),
+        ).lastrowid
+        known[name_keys[triple]] = (name_id, company_ids.get(key))
+
+    ids = [known[name_keys[triple]] for triple in rows]
+    return [company_id for _, company_id in ids], [name_id for name_id, _ in ids]
+
+
+# Schema migrations; a database at user_version n gets migrations n+1 onwards
+_MIGRATIONS = (
+    # 1: indexes for per-run and per-company lookups and for picking recent runs
+    (
+        'CREATE INDEX IF NOT EXISTS idx_company_history_run_id ON company_history (run_id)',
+        'CREATE INDEX IF NOT EXISTS idx_company_history_cr_name ON company_history (cr_name)',
+        'CREATE INDEX IF NOT EXISTS idx_comparison_runs_created_at ON comparison_runs (created_at)',
+    ),
+    # 2: per-run aggregates, backfilled from the saved rows. Portfolio/ecosystem
+    # match results were never saved, so older runs have no mismatch counts
+    (
+        '''
+        CREATE TABLE IF NOT EXISTS run_aggregates (
+            run_id INTEGER PRIMARY KEY,
+            total_rows INTEGER NOT NULL,
+            ok INTEGER NOT NULL,
+            missing_from_website INTEGER NOT NULL,
+            extra_on_website INTEGER NOT NULL,
+            requires_update INTEGER NOT NULL,
+            name_mismatches INTEGER NOT NULL,
+            portfolio_mismatches INTEGER,
+            ecosystem_mismatches INTEGER,
+            FOREIGN KEY (run_id) REFERENCES comparison_runs (id)
+        )
+        ''',
+        '''
+        INSERT OR IGNORE INTO run_aggregates
+        (run_id, total_rows, ok, missing_from_website, extra_on_website, requires_update, name_mismatches)
+        SELECT run_id, COUNT(*),
+               TOTAL(status = 'OK'), TOTAL(status = 'Add'), TOTAL(status = 'Remove'),
+               TOTAL(status = 'Requires update'),
+               TOTAL(cr_name != '' AND status != 'Add' AND match_score < 95)
+        FROM company_history
+        WHERE run_id IS NOT NULL
+        GROUP BY run_id
+        ''',
+    ),
+    # 3: company dimension; company_history refers to companies and name combinations by id
+    (
+        _add_company_dimension,
+    ),
+    # 4: where a run's per-company rows went once retention archived them
+    (
+        'ALTER TABLE comparison_runs ADD COLUMN detail_archive TEXT',
+    ),
+)
+
+
+def aggregate_results(results_df: pd.DataFrame) -> Dict[str, Optional[int]]:
+    """Status and mismatch counts of one comparison's results.
+
+    Portfolio/ecosystem mismatches are None when the results have no
+    Portfolio Match/Ecosystem Match column (legacy template).
+    """
+    status = results_df['Status']
+    is_baseline = results_df['CR Name'] != ''
+    exists = results_df['PC exist in website'] == 'Yes'
+    return {
+        'total_rows': len(results_df),
+        'ok': int((status == 'OK').sum()),
+        'missing_from_website': int((status == 'Add').sum()),
+        'extra_on_website': int((status == 'Remove').sum()),
+        'requires_update': int((status == 'Requires update').sum()),
+        'name_mismatches': int((exists & is_baseline & (results_df['Match Score'] < 95)).sum()),
+        'portfolio_mismatches': (int((results_df['Portfolio Match'] == 'No').sum())
+                                 if 'Portfolio Match' in results_df.columns else None),
+        'ecosystem_mismatches': (int((results_df['Ecosystem Match'] == 'No').sum())
+                                 if 'Ecosystem Match' in results_df.columns else None),
+    }
+
+
 class HistoricalTracker:
     def __init__(self, db_path: str = _DEFAULT_DB_PATH):
         self.db_path = db_path
+        self.db = HistoryDatabase.for_path(db_path)
         self.init_database()
-    
+
     def init_database(self):
-        """Create tables if they don't exist (with current schema)."""
-        conn = sqlite3.connect(self.db_path)
+        """Create tables if they don't exist and bring older databases up to the current schema."""
+        self.db.write(self._create_schema)
+
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection):
         cursor = conn.cursor()
 
+        # The original schema; everything since is in _MIGRATIONS
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS comparison_runs (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -50,80 +276,211 @@ class HistoricalTracker:
             )
         ''')
 
-        conn.commit()
-        conn.close()
-    
+        # Databases from before the new template lack the portfolio/ecosystem columns
+        existing = {row[1] for row in cursor.execute('PRAGMA table_info(company_history)')}
+        for column in ('portfolio', 'website_portfolio', 'ecosystem', 'website_ecosystem'):
+            if column not in existing:
+                cursor.execute(f'ALTER TABLE company_history ADD COLUMN {column} TEXT')
+
+        version = cursor.execute('PRAGMA user_version').fetchone()[0]
+        for number, statements in enumerate(_MIGRATIONS[version:], start=version + 1):
+            for statement in statements:
+                if callable(statement):
+                    statement(cursor)
+                else:
+                    cursor.execute(statement)
+            cursor.execute(f'PRAGMA user_version = {number}')
+
     def save_comparison_run(self, results_df: pd.DataFrame, baseline_file: str,
                            website_count: int, summary: Dict) -> int:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            INSERT INTO comparison_runs
-            (run_date, baseline_file, total_baseline_companies, total_website_companies, summary_stats)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (
+        """Save the run and all its result rows in one transaction."""
+        n = len(results_df)
+        names = [
+            results_df[source].astype(object).where(results_df[source].notna(), None).tolist()
+            if source in results_df.columns else [default] * n
+            for _, source, default in _NAME_COLUMNS
+        ]
+        values = [
+            results_df[source].tolist() if source in results_df.columns else [default] * n
+            for _, source, default in _HISTORY_COLUMNS
+        ]
+        aggregates = aggregate_results(results_df)
+        run = (
             datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             baseline_file,
             len(results_df[results_df['CR Name'] != '']),
             website_count,
             json.dumps(summary),
-        ))
-
-        run_id = cursor.lastrowid
-
-        for _, row in results_df.iterrows():
-            cursor.execute('''
-                INSERT INTO company_history
-                (run_id, cr_name, brand_name, website_name,
-                 portfolio, website_portfolio, ecosystem, website_ecosystem,
-                 match_score, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                run_id,
-                row.get('CR Name', ''),
-                row.get('Brand Name', ''),
-                row.get('Website Name', ''),
-                row.get('Portfolio', None),
-                row.get('Website Portfolio', None),
-                row.get('Ecosystem', None),
-                row.get('Website Ecosystem', None),
-                row.get('Match Score', 0),
-                row.get('Status', ''),
-            ))
-
-        conn.commit()
-        conn.close()
-        return run_id
+        )
+
+        def insert(conn: sqlite3.Connection) -> int:
+            cursor = conn.execute('''
+                INSERT INTO comparison_runs
+                (run_date, baseline_file, total_baseline_companies, total_website_companies, summary_stats)
+                VALUES (?, ?, ?, ?, ?)
+            ''', run)
+            run_id = cursor.lastrowid
+            company_ids, name_ids = _ensure_identities(conn.cursor(), zip(*names), [run_id] * n)
+
+            columns = ', '.join(column for column, _, _ in _HISTORY_COLUMNS)
+            conn.executemany(
+                f'INSERT INTO company_history (run_id, company_id, name_id, {columns}) '
+                f'VALUES (?, ?, ?, {", ".join("?" * len(_HISTORY_COLUMNS))})',
+                zip([run_id] * n, company_ids, name_ids, *values),
+            )
+            conn.execute(
+                f'INSERT INTO run_aggregates (run_id, {", ".join(_AGGREGATE_COLUMNS)}) '
+                f'VALUES (?, {", ".join("?" * len(_AGGREGATE_COLUMNS))})',
+                (run_id, *(aggregates[column] for column in _AGGREGATE_COLUMNS)),
+            )
+            return run_id
+
+        return self.db.write(insert)
     
-    def get_historical_comparison(self, quarters_back: int = 1) -> Optional[pd.DataFrame]:
-        """Get comparison data from previous quarters"""
-        conn = sqlite3.connect(self.db_path)
-        
-        # Get the most recent run that's not the current one
-        query = '''
-            SELECT * FROM comparison_runs 
-            ORDER BY created_at DESC 
-            LIMIT ? OFFSET 1
+    def get_run_aggregates(self, limit: int = 1, before_run_id: Optional[int] = None) -> List[Dict]:
+        """Counts of the latest `limit` saved runs (before `before_run_id`, if given), newest first."""
+        # Run ids only grow; created_at has one-second resolution
+        where, params = ('WHERE r.id < ?', (before_run_id,)) if before_run_id is not None else ('', ())
+        query = f'''
+            SELECT r.id, r.run_date, r.baseline_file, {", ".join(f"a.{column}" for column in _AGGREGATE_COLUMNS)}
+            FROM comparison_runs r JOIN run_aggregates a ON a.run_id = r.id
+            {where}
+            ORDER BY r.id DESC
+            LIMIT ?
         '''
-        
-        runs = pd.read_sql_query(query, conn, params=(quarters_back,))
-        
-        if runs.empty:
-            conn.close()
-            return None
-        
-        # Get company data for the selected run
-        run_id = runs.iloc[0]['id']
-        company_query = '''
-            SELECT * FROM company_history 
-            WHERE run_id = ?
-        '''
-        
-        historical_data = pd.read_sql_query(company_query, conn, params=(run_id,))
-        conn.close()
-        
-        return historical_data
+        with self.db.read() as conn:
+            rows = conn.execute(query, (*params, limit)).fetchall()
+        return [dict(zip(('run_id', 'run_date', 'baseline_file') + _AGGREGATE_COLUMNS, row)) for row in rows]
+
+    def find_company(self, name: str) -> Optional[Dict]:
+        """The company a name belongs to (matched by its normalized form), if any run saved it."""
+        with self.db.read() as conn:
+            row = conn.execute('SELECT id, company_key, display_name FROM companies WHERE company_key = ?',
+                               (company_key(name),)).fetchone()
+        return dict(zip(('company_id', 'company_key', 'name'), row)) if row else None
+
+    def get_company(self, company_id: int) -> Optional[Dict]:
+        with self.db.read() as conn:
+            row = conn.execute('SELECT id, company_key, display_name FROM companies WHERE id = ?',
+                               (company_id,)).fetchone()
+        return dict(zip(('company_id', 'company_key', 'name'), row)) if row else None
+
+    def get_company_timeline(self, company_id: int, limit: int = 50, offset: int = 0) -> Tuple[int, List[Dict]]:
+        """`(total, entries)`: the company's saved result rows, newest run first."""
+        name_columns = [column for column, _, _ in _NAME_COLUMNS]
+        history_columns = [column for column, _, _ in _HISTORY_COLUMNS]
+        with self.db.read() as conn:
+            total = conn.execute('SELECT COUNT(*) FROM company_history WHERE company_id = ?',
+                                 (company_id,)).fetchone()[0]
+            rows = conn.execute(f'''
+                SELECT h.run_id, r.run_date, r.baseline_file,
+                       {", ".join(f"n.{column}" for column in name_columns)},
+                       {", ".join(f"h.{column}" for column in history_columns)}
+                FROM company_history h
+                JOIN comparison_runs r ON r.id = h.run_id
+                LEFT JOIN company_names n ON n.id = h.name_id
+                WHERE h.company_id = ?
+                ORDER BY h.run_id DESC, h.id
+                LIMIT ? OFFSET ?
+            ''', (company_id, limit, offset)).fetchall()
+        columns = ('run_id', 'run_date', 'baseline_file', *name_columns, *history_columns)
+        return total, [dict(zip(columns, row)) for row in rows]
+
+    def get_status_changes(self, from_run_id: Optional[int] = None, to_run_id: Optional[int] = None,
+                           limit: int = 50, offset: int = 0) -> Optional[Dict]:
+        """Companies whose status differs between two runs, by name.
+
+        `to_run_id` defaults to the latest run and `from_run_id` to the run
+        before it. A company missing from one of the runs has status None
+        there. Returns None when either run doesn't exist.
+        """
+        with self.db.read() as conn:
+            if to_run_id is None:
+                to_run_id = conn.execute('SELECT MAX(id) FROM comparison_runs').fetchone()[0]
+            if from_run_id is None and to_run_id is not None:
+                from_run_id = conn.execute('SELECT MAX(id) FROM comparison_runs WHERE id < ?',
+                                           (to_run_id,)).fetchone()[0]
+            found = conn.execute('SELECT COUNT(*) FROM comparison_runs WHERE id IN (?, ?)',
+                                 (from_run_id, to_run_id)).fetchone()[0]
+            if from_run_id is None or to_run_id is None or found < len({from_run_id, to_run_id}):
+                return None
+
+            changed = '''
+                SELECT company_id,
+                       MAX(CASE WHEN run_id = :from_run THEN status END) AS previous_status,
+                       MAX(CASE WHEN run_id = :to_run THEN status END) AS current_status
+                FROM company_history
+                WHERE run_id IN (:from_run, :to_run) AND company_id IS NOT NULL
+                GROUP BY company_id
+                HAVING previous_status IS NOT current_status
+            '''
+            params = {'from_run': from_run_id, 'to_run': to_run_id, 'limit': limit, 'offset': offset}
+            total = conn.execute(f'SELECT COUNT(*) FROM ({changed})', params).fetchone()[0]
+            rows = conn.execute(f'''
+                SELECT c.id, c.display_name, x.previous_status, x.current_status
+                FROM ({changed}) x JOIN companies c ON c.id = x.company_id
+                ORDER BY c.display_name COLLATE NOCASE, c.id
+                LIMIT :limit OFFSET :offset
+            ''', params).fetchall()
+        return {
+            'from_run_id': from_run_id,
+            'to_run_id': to_run_id,
+            'total': total,
+            'changes': [dict(zip(('company_id', 'name', 'previous_status', 'status'), row)) for row in rows],
+        }
+
+    def runs_to_archive(self, keep: int) -> List[int]:
+        """Runs whose per-company rows are still in the database, other than the latest `keep`."""
+        with self.db.read() as conn:
+            return [row[0] for row in conn.execute('''
+                SELECT id FROM comparison_runs
+                WHERE detail_archive IS NULL
+                  AND id NOT IN (SELECT id FROM comparison_runs ORDER BY id DESC LIMIT ?)
+                ORDER BY id
+            ''', (keep,))]
+
+    def export_run_detail(self, run_id: int) -> pd.DataFrame:
+        """A run's per-company rows, names included, with the run's date and baseline file."""
+        with self.db.read() as conn:
+            return pd.read_sql_query('''
+                SELECT h.*, r.run_date, r.baseline_file
+                FROM company_history_named h JOIN comparison_runs r ON r.id = h.run_id
+                WHERE h.run_id = ?
+                ORDER BY h.id
+            ''', conn, params=(run_id,))
+
+    def drop_run_detail(self, archives: Dict[int, str]) -> int:
+        """Delete the per-company rows of runs archived to `archives[run_id]`; returns rows deleted."""
+        def drop(conn: sqlite3.Connection) -> int:
+            deleted = 0
+            for run_id, path in archives.items():
+                deleted += conn.execute('DELETE FROM company_history WHERE run_id = ?', (run_id,)).rowcount
+                conn.execute('UPDATE comparison_runs SET detail_archive = ? WHERE id = ?', (path, run_id))
+            # Name combinations only the archived rows used; companies keep their ids
+            conn.execute('''
+                DELETE FROM company_names
+                WHERE id NOT IN (SELECT name_id FROM company_history WHERE name_id IS NOT NULL)
+            ''')
+            return deleted
+
+        return self.db.write(drop)
+
+    def reclaim_space(self) -> int:
+        """Return free pages to the file system; returns how many were freed."""
+        def vacuum(conn: sqlite3.Connection) -> int:
+            free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+                # Databases created before incremental auto-vacuum: one full VACUUM converts them
+                conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                conn.execute('VACUUM')
+            else:
+                # executescript steps it to completion; execute() would free a single page
+                conn.executescript('PRAGMA incremental_vacuum;')
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchall()
+            return free - conn.execute('PRAGMA freelist_count').fetchone()[0]
+
+        return self.db.write(vacuum, transaction=False)
+
 
 class ResultsSummarizer:
     def __init__(self, db_path: str = _DEFAULT_DB_PATH):
@@ -133,22 +490,19 @@ class ResultsSummarizer:
                         website_count: int, template_spec) -> Dict:
         """Generate comprehensive summary of comparison results"""
         total_baseline = len(results_df[results_df['CR Name'] != ''])
-
         exists = results_df['PC exist in website'] == 'Yes'
-        is_baseline = results_df['CR Name'] != ''
+        aggregates = aggregate_results(results_df)
 
         breakdown = {
-            "ok": int((results_df['Status'] == 'OK').sum()),
-            "missing_from_website": int((results_df['Status'] == 'Add').sum()),
-            "extra_on_website": int((results_df['Status'] == 'Remove').sum()),
-            "name_mismatches": int((exists & is_baseline & (results_df['Match Score'] < 95)).sum()),
+            key: aggregates[key]
+            for key in ('ok', 'missing_from_website', 'extra_on_website', 'name_mismatches')
         }
 
-        if template_spec.portfolio_field is not None and 'Portfolio Match' in results_df.columns:
-            breakdown["portfolio_mismatches"] = int((results_df['Portfolio Match'] == 'No').sum())
+        if template_spec.portfolio_field is not None and aggregates['portfolio_mismatches'] is not None:
+            breakdown["portfolio_mismatches"] = aggregates['portfolio_mismatches']
 
-        if template_spec.ecosystem_field is not None and 'Ecosystem Match' in results_df.columns:
-            breakdown["ecosystem_mismatches"] = int((results_df['Ecosystem Match'] == 'No').sum())
+        if template_spec.ecosystem_field is not None and aggregates['ecosystem_mismatches'] is not None:
+            breakdown["ecosystem_mismatches"] = aggregates['ecosystem_mismatches']
 
         matched = int(exists.sum())
         accuracy_rate = round(matched / total_baseline * 100, 1) if total_baseline else 0.0
@@ -167,23 +521,21 @@ class ResultsSummarizer:
         }
     
     def generate_historical_comparison(self, current_summary: Dict) -> Dict:
-        """Compare current results with historical data"""
-        historical_data = self.tracker.get_historical_comparison()
+        """Compare current results with the last saved run"""
+        previous = self.tracker.get_run_aggregates(limit=1)
 
-        if historical_data is None:
+        if not previous:
             return {'has_historical_data': False, 'message': 'No historical data available'}
 
-        historical_status_counts = historical_data['status'].value_counts().to_dict()
+        previous = previous[0]
         current_breakdown = current_summary['status_breakdown']
 
-        # Map status_breakdown keys back to Status string values for historical comparison
-        status_label_map = {
-            'ok': 'OK', 'missing_from_website': 'Add', 'extra_on_website': 'Remove',
-        }
-
         changes = {}
         for key, current_count in current_breakdown.items():
-            historical_count = historical_status_counts.get(status_label_map.get(key, ''), 0)
+            historical_count = previous.get(key)
+            if historical_count is None:
+                # Legacy-template run, or saved before mismatch counts were kept
+                continue
             change = current_count - historical_count
             changes[key] = {
                 'current': current_count,
@@ -194,6 +546,7 @@ class ResultsSummarizer:
 
         return {
             'has_historical_data': True,
+            'previous_run_id': previous['run_id'],
             'changes': changes,
             'overall_trend': self._calculate_overall_trend(changes),
         }
@@ -0,0 +1,123 @@
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import HISTORY_DETAIL_RUNS, UPLOADS_MAX_AGE_DAYS, UPLOADS_QUOTA_MB
+from results_analyzer import HistoricalTracker
+
+_WEBVIEW_DIR = os.path.dirname(os.path.abspath(__file__))
+_DEFAULT_ARCHIVE_DIR = os.path.join(_WEBVIEW_DIR, "history_archive")
+_DEFAULT_UPLOADS_DIR = os.path.join(_WEBVIEW_DIR, "uploads")
+
+# Uploads modified this recently may belong to a job that is still running
+_IN_FLIGHT_SECONDS = 3600
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    detail_runs: int = HISTORY_DETAIL_RUNS           # 0 = keep every run's per-company rows
+    uploads_quota_mb: float = UPLOADS_QUOTA_MB       # 0 = no quota
+    uploads_max_age_days: float = UPLOADS_MAX_AGE_DAYS  # 0 = no age limit
+
+
+class RetentionManager:
+    """Keeps the history database and the uploads folder from growing without bound.
+
+    History: the per-company rows of runs older than the latest
+    `detail_runs` are written to `<archive_dir>/run_<id>.parquet` (zstd) and
+    deleted from the database. The runs themselves and their aggregate
+    counts stay, so trend comparisons still cover them. The pages freed are
+    then handed back with an incremental vacuum.
+
+    Uploads: files older than `uploads_max_age_days` are deleted, then the
+    oldest remaining ones until the folder fits in `uploads_quota_mb`.
+    Files passed as `protected` (results a finished job still serves) and
+    files modified within the last hour are never deleted.
+
+    `enforce()` runs both; concurrent calls skip rather than queue up.
+    """
+
+    def __init__(self, tracker: HistoricalTracker, uploads_dir: str = _DEFAULT_UPLOADS_DIR,
+                 archive_dir: str = _DEFAULT_ARCHIVE_DIR, policy: RetentionPolicy = RetentionPolicy()):
+        self.tracker = tracker
+        self.uploads_dir = uploads_dir
+        self.archive_dir = archive_dir
+        self.policy = policy
+        self._lock = threading.Lock()
+
+    def enforce(self, protected: Iterable[str] = ()) -> Optional[Dict]:
+        """Apply the policy; returns what was done, or None if another pass is running."""
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            return {'history': self.compact_history(), 'uploads': self.enforce_uploads(protected)}
+        finally:
+            self._lock.release()
+
+    def compact_history(self) -> Dict:
+        if self.policy.detail_runs <= 0:
+            return {'archived_runs': [], 'deleted_rows': 0, 'freed_pages': 0}
+        run_ids = self.tracker.runs_to_archive(self.policy.detail_runs)
+        if not run_ids:
+            return {'archived_runs': [], 'deleted_rows': 0, 'freed_pages': 0}
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        archives = {}
+        for run_id in run_ids:
+            path = os.path.join(self.archive_dir, f"run_{run_id}.parquet")
+            # Written before the rows are deleted, so an interrupted pass loses nothing.
+            # The temp file is unique, since another process may be archiving the same run
+            fd, tmp_path = tempfile.mkstemp(dir=self.archive_dir, prefix=f"run_{run_id}_", suffix='.tmp')
+            os.close(fd)
+            try:
+                self.tracker.export_run_detail(run_id).to_parquet(tmp_path, index=False, compression='zstd')
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+            archives[run_id] = path
+        deleted = self.tracker.drop_run_detail(archives)
+        freed = self.tracker.reclaim_space()
+        print(f"Archived {deleted} history rows of {len(run_ids)} runs to {self.archive_dir}; "
+              f"{freed} database pages freed")
+        return {'archived_runs': run_ids, 'deleted_rows': deleted, 'freed_pages': freed}
+
+    def enforce_uploads(self, protected: Iterable[str] = ()) -> Dict:
+        keep = {os.path.abspath(path) for path in protected}
+        now = time.time()
+        files: List[Tuple[float, int, str]] = []
+        try:
+            entries = list(os.scandir(self.uploads_dir))
+        except FileNotFoundError:
+            entries = []
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+
+        total = sum(size for _, size, _ in files)
+        quota = self.policy.uploads_quota_mb * 1024 * 1024
+        max_age = self.policy.uploads_max_age_days * 86400
+        removed, freed = 0, 0
+        for mtime, size, path in files:
+            expired = max_age > 0 and now - mtime > max_age
+            over_quota = quota > 0 and total > quota
+            if not (expired or over_quota):
+                continue
+            if os.path.abspath(path) in keep or now - mtime < _IN_FLIGHT_SECONDS:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            removed += 1
+            freed += size
+            total -= size
+        if removed:
+            print(f"Removed {removed} old files ({freed / (1024 * 1024):.1f} MB) from {self.uploads_dir}")
+        return {'removed_files': removed, 'freed_bytes': freed, 'remaining_bytes': total}
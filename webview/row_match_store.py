@@ -0,0 +1,104 @@
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from history_db import HistoryDatabase
+from name_cache import MATCHER_VERSION
+
+_DEFAULT_DB_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "comparison_history.db"
+)
+
+# Baseline columns that make up a row's content hash
+HASHED_COLUMNS = ('CR Name', 'Brand Name', 'Portfolio', 'Ecosystem')
+
+
+def baseline_row_hashes(baseline_df: pd.DataFrame) -> List[str]:
+    """Content hash of each baseline row's name, brand, portfolio and ecosystem."""
+    columns = pd.DataFrame({
+        column: (baseline_df[column] if column in baseline_df.columns else pd.Series([''] * len(baseline_df)))
+        .astype(object).reset_index(drop=True)
+        for column in HASHED_COLUMNS
+    })
+    return [f"{h:016x}" for h in pd.util.hash_pandas_object(columns, index=False).tolist()]
+
+
+class RowMatchStore:
+    """Per-row match candidates of the latest website snapshot, keyed by row hash.
+
+    A re-uploaded baseline compared against the same snapshot takes the
+    stored ranked candidates (website position, match info) of every
+    unchanged row, so only new or edited rows are matched. Results are kept
+    for one snapshot at a time in a `row_matches` table of the comparison
+    history database; recording against a new snapshot drops the previous
+    one's rows.
+    """
+
+    def __init__(self, db_path: str = _DEFAULT_DB_PATH, version: str = MATCHER_VERSION):
+        self.db_path = db_path
+        self.version = version
+        self.db = HistoryDatabase.for_path(db_path)
+        self.init_database()
+
+    def init_database(self):
+        self.db.write(self._create_schema)
+
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection):
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(row_matches)')}
+        if columns and 'candidates' not in columns:
+            # Written before runner-up candidates were kept; it is only a cache
+            conn.execute('DROP TABLE row_matches')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS row_matches (
+                snapshot_id TEXT NOT NULL,
+                row_hash TEXT NOT NULL,
+                candidates TEXT NOT NULL,
+                matcher_version TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (snapshot_id, row_hash)
+            )
+        ''')
+
+    def lookup(self, snapshot_id: str, row_hashes: Sequence[str]) -> Dict[int, List[Tuple[int, Dict]]]:
+        """Stored candidates for rows already matched against `snapshot_id`."""
+        with self.db.read() as conn:
+            stored = dict(conn.execute(
+                'SELECT row_hash, candidates FROM row_matches WHERE snapshot_id = ? AND matcher_version = ?',
+                (snapshot_id, self.version),
+            ))
+        return {
+            i: [(position, info) for position, info in json.loads(stored[row_hash])]
+            for i, row_hash in enumerate(row_hashes)
+            if row_hash in stored
+        }
+
+    def latest_snapshot(self) -> Optional[str]:
+        """The snapshot the stored rows were matched against, if any."""
+        with self.db.read() as conn:
+            row = conn.execute(
+                'SELECT snapshot_id FROM row_matches WHERE matcher_version = ? ORDER BY created_at DESC LIMIT 1',
+                (self.version,),
+            ).fetchone()
+        return row[0] if row else None
+
+    def record(self, snapshot_id: str, row_hashes: Sequence[str],
+               ranked: Sequence[Sequence[Tuple[int, Dict]]]):
+        """Store newly matched rows for `snapshot_id`, dropping other snapshots' rows."""
+        now = time.time()
+        rows = [(snapshot_id, row_hash, json.dumps(candidates), self.version, now)
+                for row_hash, candidates in zip(row_hashes, ranked)]
+
+        def store(conn: sqlite3.Connection):
+            conn.execute('DELETE FROM row_matches WHERE snapshot_id != ? OR matcher_version != ?',
+                         (snapshot_id, self.version))
+            conn.executemany('''
+                INSERT OR REPLACE INTO row_matches (snapshot_id, row_hash, candidates, matcher_version, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', rows)
+
+        self.db.write(store)
@@ -0,0 +1,46 @@
+import asyncio
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class FacetEvent:
+    kind: str                    # "portfolio" or "ecosystem"
+    facet: str                   # facet value as shown on the site
+    companies: Tuple[str, ...]   # company names listed under it
+
+
+class ScrapeStream:
+    """Facet results of a running scrape, handed to a consumer as they finish.
+
+    `publish` may be called from any thread or event loop — pooled scrapes
+    run on the BrowserPool's loop — and queues the event on the loop that
+    created the stream. The consumer awaits `next_batch()` until it returns
+    None, which follows `close()`.
+    """
+
+    def __init__(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self.published = 0
+
+    def publish(self, event: FacetEvent):
+        self.published += 1
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+
+    def close(self):
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, None)
+
+    async def next_batch(self) -> Optional[List[FacetEvent]]:
+        """Every event queued so far (waiting for at least one), or None once closed."""
+        batch = [await self._queue.get()]
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        events = [event for event in batch if event is not None]
+        if len(events) < len(batch):
+            # Closed: hand over what arrived before close(), then None
+            if events:
+                self._queue.put_nowait(None)
+                return events
+            return None
+        return events
@@ -0,0 +1,84 @@
+"""Parsing for the portfolio page's background search API.
+
+Facet filtering and pagination on the PIF page are served by JSON search
+requests (see SEARCH_API_PATH). Each response carries the total hit count and
+one page of results, where every result holds the rendered card HTML. These
+helpers turn a response into the same company names the DOM scraper reads, and
+build the request that returns the whole result set in one page.
+"""
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from config import SEARCH_API_PATH
+
+# Query parameters the search endpoint uses for page size and offset
+PAGE_SIZE_PARAM = "p"
+OFFSET_PARAM = "e"
+
+
+def is_search_request(request) -> bool:
+    """True for the page's XHR/fetch calls to the search endpoint."""
+    return request.resource_type in ('xhr', 'fetch') and SEARCH_API_PATH in request.url
+
+
+def is_search_response(response) -> bool:
+    """True for a successful response to a search request."""
+    return response.ok and is_search_request(response.request)
+
+
+class _CardTitleParser(HTMLParser):
+    """Collects the text of the first <h4> in a card's HTML."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._depth = 0
+        self._done = False
+        self.parts: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'h4' and not self._done:
+            self._depth += 1
+
+    def handle_endtag(self, tag):
+        if tag == 'h4' and self._depth:
+            self._depth -= 1
+            if not self._depth:
+                self._done = True
+
+    def handle_data(self, data):
+        if self._depth and not self._done:
+            self.parts.append(data)
+
+
+def card_name(result: dict) -> str:
+    """Company name for one search result: the card's <h4> text, else its Name field."""
+    html = result.get('Html') or ''
+    if html:
+        parser = _CardTitleParser()
+        parser.feed(html)
+        name = ' '.join(''.join(parser.parts).split())
+        if name:
+            return name
+    return ' '.join(str(result.get('Name') or '').split())
+
+
+def parse_search_payload(payload) -> Optional[Tuple[List[str], int]]:
+    """Return (names, total_count) from a search response, or None if it isn't one."""
+    if not isinstance(payload, dict):
+        return None
+    results = payload.get('Results')
+    count = payload.get('Count')
+    if not isinstance(results, list) or not isinstance(count, int):
+        return None
+    names = [name for name in (card_name(r) for r in results if isinstance(r, dict)) if name]
+    return names, count
+
+
+def full_result_url(url: str, count: int) -> str:
+    """Rewrite a captured search URL to return all `count` hits from offset 0."""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if k not in (PAGE_SIZE_PARAM, OFFSET_PARAM)]
+    query += [(PAGE_SIZE_PARAM, str(count)), (OFFSET_PARAM, '0')]
+    return urlunsplit(parts._replace(query=urlencode(query)))
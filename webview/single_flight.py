@@ -0,0 +1,58 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+
+class SingleFlight:
+    """Collapses concurrent calls for the same key into one execution.
+
+    Each upload runs its own `asyncio.run` on its own thread, so the in-flight
+    work is tracked with thread-safe `concurrent.futures.Future`s: the first
+    caller for a key (the leader) runs `fn` on its loop, later callers await
+    the leader's future from theirs and receive the same result or exception.
+    The key is released as soon as the leader finishes, so the next call after
+    that starts a fresh execution.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, Future] = {}
+        self.stats: Dict[str, int] = {'executions': 0, 'shared': 0}
+
+    def in_flight(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._in_flight
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable],
+                  on_wait: Optional[Callable[[], None]] = None):
+        """Return `(result, shared)`; `shared` is True when another caller's run was joined."""
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+                self.stats['executions'] += 1
+            else:
+                self.stats['shared'] += 1
+
+        if not leader:
+            if on_wait is not None:
+                on_wait()
+            return await asyncio.wrap_future(future), True
+
+        try:
+            result = await fn()
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            if not future.done():
+                # Leader was cancelled; don't leave followers waiting forever
+                future.set_exception(RuntimeError(f"single-flight leader for {key!r} was cancelled"))
@@ -0,0 +1,107 @@
+import glob
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import pandas as pd
+
+from config import SNAPSHOT_TTL, WEBSITE_URL
+
+_DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "snapshots"
+)
+
+
+def snapshot_fingerprint(website_df: pd.DataFrame) -> str:
+    """Stable content hash of a scraped frame (row order and values)."""
+    row_hashes = pd.util.hash_pandas_object(website_df, index=False).to_numpy()
+    digest = hashlib.sha1(row_hashes.tobytes())
+    digest.update(','.join(map(str, website_df.columns)).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class WebsiteSnapshot:
+    website_df: pd.DataFrame
+    scraped_at: float
+    snapshot_id: str
+    source: str  # "scrape", "shared", "memory" or "disk"
+
+    def age_seconds(self) -> float:
+        return max(0.0, time.time() - self.scraped_at)
+
+    def describe(self) -> dict:
+        """Summary-friendly view: where the data came from and how old it is."""
+        return {
+            'snapshot_id': self.snapshot_id,
+            'source': self.source,
+            'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.scraped_at)),
+            'age_seconds': round(self.age_seconds()),
+            'companies': len(self.website_df),
+        }
+
+
+class WebsiteSnapshotCache:
+    """Latest scraped website_df, kept in memory and as a Parquet file on disk.
+
+    `get()` returns the latest snapshot while it is younger than both the cache
+    TTL and the caller's `max_age_seconds`; the disk copy lets a restarted app
+    reuse a recent scrape. Only the newest file per site is kept.
+    """
+
+    def __init__(self, cache_dir: str = _DEFAULT_CACHE_DIR, ttl_seconds: int = SNAPSHOT_TTL,
+                 site_url: str = WEBSITE_URL):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self._site_key = hashlib.sha1(site_url.encode('utf-8')).hexdigest()[:12]
+        self._lock = threading.Lock()
+        self._latest: Optional[WebsiteSnapshot] = None
+
+    def _pattern(self) -> str:
+        return os.path.join(self.cache_dir, f"website_{self._site_key}_*.parquet")
+
+    def get(self, max_age_seconds: Optional[float] = None) -> Optional[WebsiteSnapshot]:
+        limit = self.ttl_seconds if max_age_seconds is None else min(self.ttl_seconds, max_age_seconds)
+        with self._lock:
+            snapshot, source = self._latest, 'memory'
+            if snapshot is None:
+                snapshot, source = self._load_latest_file(), 'disk'
+                if snapshot is None:
+                    return None
+                self._latest = snapshot
+        if snapshot.age_seconds() > limit:
+            return None
+        return WebsiteSnapshot(snapshot.website_df.copy(), snapshot.scraped_at, snapshot.snapshot_id, source)
+
+    def put(self, website_df: pd.DataFrame) -> WebsiteSnapshot:
+        snapshot = WebsiteSnapshot(website_df, time.time(), snapshot_fingerprint(website_df), 'scrape')
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, f"website_{self._site_key}_{int(snapshot.scraped_at * 1000)}.parquet")
+        tmp_path = f"{path}.tmp"
+        with self._lock:
+            website_df.to_parquet(tmp_path, index=False, compression='zstd')
+            os.replace(tmp_path, path)
+            for old in glob.glob(self._pattern()):
+                if old != path:
+                    try:
+                        os.remove(old)
+                    except OSError:
+                        pass
+            self._latest = snapshot
+        return snapshot
+
+    def _load_latest_file(self) -> Optional[WebsiteSnapshot]:
+        paths = sorted(glob.glob(self._pattern()))
+        if not paths:
+            return None
+        path = paths[-1]
+        try:
+            scraped_at = int(path.rsplit('_', 1)[1].split('.', 1)[0]) / 1000
+            website_df = pd.read_parquet(path)
+        except (OSError, ValueError, IndexError) as e:
+            print(f"Ignoring unreadable website snapshot {path}: {e}")
+            return None
+        return WebsiteSnapshot(website_df, scraped_at, snapshot_fingerprint(website_df), 'disk')
@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+import time
+from typing import Optional
+
+from config import STORAGE_STATE_TTL
+
+_DEFAULT_STATE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "browser_state"
+)
+
+# Cloudflare's clearance cookie and Cookiebot's consent cookie
+CLEARANCE_COOKIE = "cf_clearance"
+CONSENT_COOKIE = "CookieConsent"
+
+
+class StorageStateStore:
+    """Browser storage state (cookies + localStorage) saved after a successful scrape.
+
+    One file per browser engine, since Cloudflare ties its clearance to the
+    browser's fingerprint. A saved state expires after `ttl_seconds`, or earlier
+    when its clearance cookie does; expired or unreadable files are deleted on
+    load, and callers `discard()` a state the site no longer accepts.
+    """
+
+    def __init__(self, browser_type: str, state_dir: str = _DEFAULT_STATE_DIR,
+                 ttl_seconds: int = STORAGE_STATE_TTL):
+        self.path = os.path.join(state_dir, f"{browser_type}.json")
+        self.ttl_seconds = ttl_seconds
+
+    def load(self) -> Optional[dict]:
+        """Return the saved state if it is still valid, else None."""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                saved = json.load(f)
+            state = saved['state']
+            saved_at = float(saved['saved_at'])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError):
+            self.discard()
+            return None
+
+        now = time.time()
+        expires_at = saved_at + self.ttl_seconds
+        for cookie in state.get('cookies', []):
+            # Session cookies carry expires == -1
+            if cookie.get('name') == CLEARANCE_COOKIE and cookie.get('expires', -1) > 0:
+                expires_at = min(expires_at, cookie['expires'])
+        if now >= expires_at:
+            print("Saved browser state expired; discarding")
+            self.discard()
+            return None
+        return state
+
+    def save(self, state: dict):
+        state_dir = os.path.dirname(self.path)
+        os.makedirs(state_dir, exist_ok=True)
+        # A temp file of its own, so concurrent scrapes never write into each other's
+        fd, tmp_path = tempfile.mkstemp(dir=state_dir, prefix=os.path.basename(self.path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'saved_at': time.time(), 'state': state}, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def discard(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def has_consent(state: Optional[dict]) -> bool:
+    """True when the state already carries the cookie-banner consent."""
+    if not state:
+        return False
+    now = time.time()
+    return any(
+        c.get('name') == CONSENT_COOKIE and (c.get('expires', -1) <= 0 or c['expires'] > now)
+        for c in state.get('cookies', [])
+    )
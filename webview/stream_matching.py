@@ -0,0 +1,145 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from candidate_matrix import CandidateMatrix
+from config import MATCH_TOP_K
+from enhanced_matching import (EnhancedCompanyMatcher, ScoredComparison, StoredMatches, baseline_cache_keys,
+                               score_comparison)
+from match_cascade import MatchCascade
+from row_match_store import baseline_row_hashes
+from scrape_stream import ScrapeStream
+from website_catalog import WebsiteCatalog
+
+
+class StreamingMatcher:
+    """Matches a baseline against website companies while they are being scraped.
+
+    `consume(stream)` takes the company names of each finished facet from a
+    ScrapeStream and, on a worker thread, runs the match cascade for every
+    baseline row against the names not seen before. Each row keeps its top-k
+    candidates by (score, name), which is the order score_comparison ranks
+    them in on the scraper's name-sorted website_df.
+
+    `finish(website_df)` is the reconciliation pass: it scores any company the
+    stream did not carry, maps the candidates to website_df positions and
+    returns the same ScoredComparison as score_comparison. If the streamed
+    names and website_df disagree (a shared scrape this stream did not see,
+    a company dropped in the merge, a frame not sorted by name), or the
+    stream failed, it scores website_df from scratch instead.
+
+    With a `name_cache` or `row_store`, rows that either already holds (the
+    row store's latest snapshot, any cached name) are left out of the
+    streamed scoring. `finish()` serves rows from both exactly as
+    score_comparison does, scores any left-out row they turn out not to
+    cover (a changed snapshot, a cached target no longer listed) and records
+    the new matches.
+    """
+
+    def __init__(self, baseline_df: pd.DataFrame, template_spec, top_k: int = MATCH_TOP_K,
+                 name_cache=None, row_store=None):
+        self.baseline_df = baseline_df
+        self.template_spec = template_spec
+        self.top_k = top_k
+        self.name_cache = name_cache
+        self.row_store = row_store
+        self.matcher = EnhancedCompanyMatcher()
+        cr_names = baseline_df['CR Name'].tolist() if 'CR Name' in baseline_df.columns else [''] * len(baseline_df)
+        brand_names = (baseline_df['Brand Name'].tolist() if 'Brand Name' in baseline_df.columns
+                       else [''] * len(baseline_df))
+        self._cr_forms = [self.matcher.name_forms(name) for name in cr_names]
+        self._brand_forms = [self.matcher.name_forms(name) for name in brand_names]
+        self._seen: set = set()
+        # Per baseline row: [(website name, match info)], best first
+        self._ranked: List[List[Tuple[str, Dict]]] = [[] for _ in cr_names]
+        self._failed: Optional[BaseException] = None
+        self._skipped = self._stored_rows()
+        self._streamed_rows = [i for i in range(len(cr_names)) if i not in self._skipped]
+        self.stats = {'batches': 0, 'streamed_companies': 0, 'reconciled_companies': 0,
+                      'skipped_rows': len(self._skipped)}
+
+    def _stored_rows(self) -> set:
+        """Rows the row store or the name cache will likely serve at finish()."""
+        rows = set()
+        if self.row_store is not None:
+            latest = self.row_store.latest_snapshot()
+            if latest is not None:
+                rows.update(self.row_store.lookup(latest, baseline_row_hashes(self.baseline_df)))
+        if self.name_cache is not None:
+            rows.update(self.name_cache.known(baseline_cache_keys(self.matcher, self.baseline_df)))
+        return rows
+
+    async def consume(self, stream: ScrapeStream):
+        """Match each batch of new company names as the stream delivers it, until it closes."""
+        try:
+            while True:
+                events = await stream.next_batch()
+                if events is None:
+                    return
+                new_names = sorted({name for event in events for name in event.companies} - self._seen)
+                if not new_names:
+                    continue
+                self._seen.update(new_names)
+                self.stats['batches'] += 1
+                self.stats['streamed_companies'] += len(new_names)
+                await asyncio.to_thread(self._match_names, new_names)
+        except Exception as e:
+            print(f"Pipelined matching stopped ({e}); the comparison will be scored after the scrape")
+            self._failed = e
+            # Keep draining so the producer's events don't pile up
+            while await stream.next_batch() is not None:
+                pass
+
+    def _match_names(self, names: List[str], rows: Optional[List[int]] = None):
+        """Merge the candidates among `names` (sorted) into the top-k of `rows` (by default the streamed ones)."""
+        rows = self._streamed_rows if rows is None else rows
+        catalog = WebsiteCatalog.build(names, self.matcher.name_forms)
+        cascade = MatchCascade(catalog)
+        ranked = cascade.ranked_matches([self._cr_forms[i] for i in rows], [self._brand_forms[i] for i in rows],
+                                        self.top_k, self.matcher.fuzzy_threshold)
+        threshold = self.matcher.fuzzy_threshold
+        for i, candidates in zip(rows, ranked):
+            if not candidates:
+                continue
+            merged = sorted(self._ranked[i] + [(names[j], info) for j, info in candidates],
+                            key=lambda candidate: (-candidate[1]['score'], candidate[0]))
+            self._ranked[i] = merged[:1] + [c for c in merged[1:self.top_k] if c[1]['score'] >= threshold]
+
+    async def finish(self, website_df: pd.DataFrame, snapshot_id: Optional[str] = None) -> ScoredComparison:
+        website_names = website_df['Company'].tolist() if 'Company' in website_df.columns else []
+        consistent = (
+            self._failed is None
+            and len(website_names) == len(website_df)
+            and all(isinstance(name, str) for name in website_names)
+            and website_names == sorted(set(website_names))
+            and self._seen <= set(website_names)
+        )
+        if not consistent:
+            print("Streamed companies don't line up with the scraped list; scoring it from scratch")
+            return score_comparison(self.baseline_df, website_df, self.template_spec, name_cache=self.name_cache,
+                                    row_store=self.row_store, snapshot_id=snapshot_id, top_k=self.top_k)
+
+        missing = sorted(set(website_names) - self._seen)
+        if missing:
+            self.stats['reconciled_companies'] = len(missing)
+            await asyncio.to_thread(self._match_names, missing)
+        stored = StoredMatches.lookup(self.matcher, self.baseline_df, website_df, tuple(website_names),
+                                      self.name_cache, self.row_store, snapshot_id)
+        # Left out of the stream, but not served after all
+        late = [i for i in stored.todo if i in self._skipped]
+        if late:
+            await asyncio.to_thread(self._match_names, website_names, late)
+        print(f"Pipelined matching: {self.stats['streamed_companies']} companies matched in "
+              f"{self.stats['batches']} batches during the scrape, {len(missing)} at reconciliation, "
+              f"{len(self._skipped) - len(late)} rows served from stored matches")
+
+        positions = {name: j for j, name in enumerate(website_names)}
+        served = stored.served
+        ranked = [served[i] if i in served else [(positions[name], info) for name, info in candidates]
+                  for i, candidates in enumerate(self._ranked)]
+        comparison = ScoredComparison(self.baseline_df, website_df, self.template_spec, self.matcher,
+                                      tuple(website_names), CandidateMatrix(ranked), self.top_k)
+        stored.record(comparison, ranked)
+        comparison.reports['pipeline'] = dict(self.stats)
+        return comparison
@@ -0,0 +1,140 @@
+import asyncio
+import os
+import threading
+import pytest
+import browser_pool
+from browser_pool import BrowserPool
+
+
+class _FakeBrowser:
+    def __init__(self, kind):
+        self.kind = kind
+        self.connected = True
+        self.closed = False
+
+    def is_connected(self):
+        return self.connected
+
+    async def close(self):
+        self.closed = True
+        self.connected = False
+
+
+class _FakePlaywright:
+    async def stop(self):
+        pass
+
+
+@pytest.fixture
+def launched():
+    return []
+
+
+@pytest.fixture
+def make_pool(launched):
+    pools = []
+
+    def factory(**kwargs):
+        async def launch(playwright, browser_type, headless):
+            browser = _FakeBrowser(browser_type)
+            launched.append(browser)
+            return browser
+
+        async def start_playwright():
+            return _FakePlaywright()
+
+        kwargs.setdefault("memory_probe", lambda pids: 0)
+        pool = BrowserPool(launch=launch, start_playwright=start_playwright, **kwargs)
+        pools.append(pool)
+        return pool
+
+    yield factory
+    for pool in pools:
+        pool.close()
+
+
+async def _which(browser):
+    return browser
+
+
+def test_browser_is_reused_across_jobs(make_pool, launched):
+    pool = make_pool(size=1, max_uses=10)
+    first = asyncio.run(pool.run("firefox", True, _which))
+    second = asyncio.run(pool.run("firefox", True, _which))
+    assert first is second
+    assert len(launched) == 1
+    assert pool.stats["reused"] == 1
+
+
+def test_browser_recycled_after_max_uses(make_pool, launched):
+    pool = make_pool(size=1, max_uses=2)
+    for _ in range(3):
+        asyncio.run(pool.run("firefox", True, _which))
+    assert len(launched) == 2
+    assert launched[0].closed
+
+
+def test_disconnected_browser_is_replaced(make_pool, launched):
+    pool = make_pool(size=1, max_uses=10)
+    first = asyncio.run(pool.run("firefox", True, _which))
+    first.connected = False
+    second = asyncio.run(pool.run("firefox", True, _which))
+    assert second is not first
+
+
+def test_memory_threshold_recycles_browser(make_pool, launched):
+    pool = make_pool(size=1, max_uses=10, max_memory_mb=100, memory_probe=lambda pids: 500)
+    asyncio.run(pool.run("firefox", True, _which))
+    assert launched[0].closed
+
+
+def test_memory_probe_only_sees_pooled_browser_processes(make_pool, launched, monkeypatch, capsys):
+    # Driver 10 launches browser 100 + i (with a renderer under it) for each launch. A matcher
+    # worker (50 + i) starts during every launch, and another scrape's browser (60, under
+    # driver 20) during the first
+    me = os.getpid()
+
+    def descendants():
+        parents = {10: me, 20: me}
+        for i in range(len(launched)):
+            parents.update({100 + i: 10, 200 + i: 100 + i, 50 + i: me})
+        if launched:
+            parents[60] = 20
+        return parents
+
+    monkeypatch.setattr(browser_pool, "_descendants", descendants)
+    probed = []
+    pool = make_pool(size=2, max_uses=10, max_memory_mb=100,
+                     memory_probe=lambda pids: probed.append(sorted(pids)) or 0)
+    asyncio.run(pool.run("firefox", True, _which))
+    asyncio.run(pool.run("chromium", True, _which))
+    # The first launch can't tell the two drivers apart, so its browser goes untracked
+    assert probed == [[], [101]]
+    assert capsys.readouterr().out.count("couldn't find a launched browser's processes") == 1
+
+
+def test_untracked_browsers_are_reported_once(make_pool, launched, capsys):
+    pool = make_pool(size=1, max_uses=1, max_memory_mb=100)
+    for _ in range(3):
+        asyncio.run(pool.run("firefox", True, _which))
+    assert capsys.readouterr().out.count("couldn't find a launched browser's processes") == 1
+
+
+def test_jobs_from_several_threads_share_the_size_limit(make_pool, launched):
+    pool = make_pool(size=2, max_uses=100)
+    active, peak = [0], [0]
+
+    async def job(browser):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.02)
+        active[0] -= 1
+        return browser
+
+    threads = [threading.Thread(target=lambda: asyncio.run(pool.run("firefox", True, job))) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak[0] <= 2
+    assert len(launched) <= 2
@@ -0,0 +1,76 @@
+import pandas as pd
+import pytest
+from candidate_index import CandidateIndex
+from enhanced_matching import EnhancedCompanyMatcher
+
+
+@pytest.fixture
+def matcher():
+    return EnhancedCompanyMatcher()
+
+
+@pytest.fixture
+def website_df():
+    return pd.DataFrame({"Company": [
+        "ACWA Power Company", "Saudi Telecom Company", "Red Sea Global", "Elm Company", "Co LLC",
+    ]})
+
+
+def _candidate_names(matcher, index, website_df, *names):
+    positions = index.candidates(*(matcher.name_forms(n) for n in names))
+    return None if positions is None else [website_df["Company"][j] for j in positions]
+
+
+def test_shared_token_trigram_and_initials_make_candidates(matcher, website_df):
+    index = CandidateIndex(matcher.build_catalog(website_df))
+    assert _candidate_names(matcher, index, website_df, "Acwa") == ["ACWA Power Company"]
+    # Typo shares a trigram but no token
+    assert "Red Sea Global" in _candidate_names(matcher, index, website_df, "Red Sae Globl")
+    # "st" is the initials of "saudi telecom"
+    assert _candidate_names(matcher, index, website_df, "ST") == ["Saudi Telecom Company"]
+
+
+def test_no_candidates_falls_back_to_full_scan(matcher, website_df):
+    index = CandidateIndex(matcher.build_catalog(website_df))
+    assert index.candidates(matcher.name_forms("Xyz"), matcher.name_forms(None)) is None
+    assert index.stats["full_scans"] == 1
+    assert index.stats["pairs_scored"] == len(website_df)
+
+    strict = CandidateIndex(matcher.build_catalog(website_df), recall_safety=False)
+    assert strict.candidates(matcher.name_forms("Xyz")) == []
+
+
+def test_pruning_is_counted(matcher, website_df):
+    index = CandidateIndex(matcher.build_catalog(website_df))
+    index.candidates(matcher.name_forms("Elm"))
+    assert index.stats["pairs_scored"] + index.stats["pairs_skipped"] == len(website_df)
+    assert index.stats["pairs_skipped"] > 0
+    assert "pruned" in index.summary()
+
+
+@pytest.mark.parametrize("cr_name, brand_name", [
+    ("Acwa Power", "ACWA"),
+    ("Power Co Bank STC", None),  # acronym match on an all-generic website name
+    ("Red Sea Global Co", "RSG"),
+    ("Unknown Entity", "Nothing Alike"),
+    ("Glo Tel", None),  # below the threshold, the best score is on a pruned name
+])
+def test_blocked_search_finds_the_full_scan_best_match(matcher, website_df, cr_name, brand_name):
+    catalog = matcher.build_catalog(website_df)
+    index = CandidateIndex(catalog)
+    row = pd.Series({"CR Name": cr_name, "Brand Name": brand_name})
+    full, full_info = matcher.find_best_match(row, website_df, catalog)
+    blocked, blocked_info = matcher.find_best_match(row, website_df, catalog, candidates=index)
+    assert blocked_info == full_info
+    assert (blocked is None) == (full is None)
+    if full is not None:
+        assert blocked.name == full.name
+
+
+def test_row_below_the_threshold_is_rescanned(matcher, website_df):
+    catalog = matcher.build_catalog(website_df)
+    index = CandidateIndex(catalog)
+    ranked = matcher.ranked_match_positions("Glo Tel", None, catalog, 1, candidates=index)
+    assert ranked == matcher.ranked_match_positions("Glo Tel", None, catalog, 1)
+    assert index.stats["rescans"] == 1
+    assert index.stats["pairs_scored"] == len(website_df) and index.stats["pairs_skipped"] == 0
@@ -0,0 +1,58 @@
+import pandas as pd
+
+from candidate_matrix import DUPLICATE_CLAIM, CandidateMatrix
+from enhanced_matching import enhanced_compare_companies
+from template_spec import TemplateSpec
+
+
+def _info(score, match_type="fuzzy"):
+    return {"score": score, "match_type": match_type, "confidence": "high", "matched_field": "CR Name"}
+
+
+def test_matrix_is_stored_row_by_row():
+    matrix = CandidateMatrix([[(2, _info(98)), (0, _info(91))], [], [(1, _info(40))]])
+    assert len(matrix) == 3
+    assert matrix.indptr.tolist() == [0, 2, 2, 3]
+    assert matrix.positions.tolist() == [2, 0, 1]
+    assert matrix.row(0) == [(2, _info(98)), (0, _info(91))]
+    assert matrix.best() == [(2, _info(98)), (None, {"score": 0, "match_type": "none", "confidence": "none"}),
+                             (1, _info(40))]
+
+
+def test_highest_claimant_wins_and_others_fall_back_to_runner_ups():
+    matrix = CandidateMatrix([
+        [(0, _info(92)), (1, _info(91))],   # both candidates taken by stronger claims
+        [(0, _info(100))],                  # strongest claim on company 0
+        [(0, _info(95)), (1, _info(93))],   # loses company 0, takes its runner-up
+        [(3, _info(60))],                   # below threshold: kept as-is
+    ])
+    assigned = matrix.assign_one_to_one(min_score=90)
+    assert assigned[0] == (None, DUPLICATE_CLAIM)
+    assert assigned[1] == (0, _info(100))
+    assert assigned[2] == (1, _info(93))
+    assert assigned[3] == (3, _info(60))
+    assert matrix.runner_ups(assigned, 90) == [[(0, _info(92)), (1, _info(91))], [], [(0, _info(95))], []]
+
+
+def test_equal_scores_go_to_the_earlier_baseline_row():
+    matrix = CandidateMatrix([[(0, _info(100))], [(0, _info(100))]])
+    assert matrix.assign_one_to_one(min_score=90) == [(0, _info(100)), (None, DUPLICATE_CLAIM)]
+
+
+def test_duplicate_baseline_rows_claim_a_website_company_once():
+    spec = TemplateSpec(kind="legacy", name_field="CR Name", brand_field="Brand Name",
+                        portfolio_field=None, ecosystem_field=None)
+    website_df = pd.DataFrame({"Company": ["ACWA Power", "Neom Company", "Red Sea Global"]})
+    baseline_df = pd.DataFrame({
+        "CR Name": ["Acwa Power Co", "ACWA POWER", "Red Sea Global"],
+        "Brand Name": ["", "", ""],
+    })
+    results, unmatched = enhanced_compare_companies(baseline_df, website_df, spec)
+    assert results["Website Name"].tolist() == ["ACWA Power", "", "Red Sea Global", "Neom Company"]
+    assert results["Match Type"].tolist()[1] == "duplicate_claim"
+    assert results["Status"].tolist() == ["OK", "Add", "OK", "Remove"]
+    assert results["Runner-up Matches"].tolist()[:2] == ["", "ACWA Power (100)"]
+    assert unmatched["Company"].tolist() == ["Neom Company"]
+
+    independent, _ = enhanced_compare_companies(baseline_df, website_df, spec, assignment="independent")
+    assert independent["Website Name"].tolist()[:2] == ["ACWA Power", "ACWA Power"]
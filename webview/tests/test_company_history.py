@@ -0,0 +1,92 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from results_analyzer import HistoricalTracker, ResultsSummarizer, company_key
+
+
+def _run(statuses):
+    """Results with one row per (cr_name, website_name, status); '' cr_name is a Remove row."""
+    return pd.DataFrame([
+        {"CR Name": cr, "Brand Name": "", "Website Name": website, "Match Score": 100 if cr and website else 0,
+         "PC exist in website": "Yes" if website else "No", "Status": status}
+        for cr, website, status in statuses
+    ])
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    tracker = HistoricalTracker(str(tmp_path / "history.db"))
+    tracker.save_comparison_run(_run([
+        ("ACWA Power Company", "ACWA Power", "OK"),
+        ("Elm Co.", "", "Add"),
+        ("", "Neom", "Remove"),
+    ]), "q1.xlsx", 2, {})
+    tracker.save_comparison_run(_run([
+        ("ACWA POWER COMPANY", "ACWA Power", "Requires update"),
+        ("Elm Company", "Elm", "OK"),
+        ("Red Sea Global", "", "Add"),
+    ]), "q2.xlsx", 2, {})
+    return tracker
+
+
+def test_spellings_of_a_name_share_one_company(tracker):
+    assert company_key("ACWA Power Company") == company_key("acwa power co")
+    acwa = tracker.find_company("Acwa Power Co")
+    total, entries = tracker.get_company_timeline(acwa["company_id"])
+    assert acwa["name"] == "ACWA Power Company"
+    assert total == 2
+    assert [(e["run_id"], e["cr_name"], e["status"]) for e in entries] == [
+        (2, "ACWA POWER COMPANY", "Requires update"), (1, "ACWA Power Company", "OK"),
+    ]
+    assert entries[0]["baseline_file"] == "q2.xlsx"
+    assert tracker.get_company_timeline(acwa["company_id"], limit=1, offset=1)[1][0]["run_id"] == 1
+    assert tracker.find_company("Unknown Holding") is None
+
+
+def test_status_changes_between_runs(tracker):
+    changes = tracker.get_status_changes()
+    assert (changes["from_run_id"], changes["to_run_id"], changes["total"]) == (1, 2, 4)
+    assert [(c["name"], c["previous_status"], c["status"]) for c in changes["changes"]] == [
+        ("ACWA Power Company", "OK", "Requires update"),
+        ("Elm Co.", "Add", "OK"),
+        ("Neom", "Remove", None),
+        ("Red Sea Global", None, "Add"),
+    ]
+    page = tracker.get_status_changes(1, 2, limit=2, offset=2)
+    assert [c["name"] for c in page["changes"]] == ["Neom", "Red Sea Global"]
+    assert tracker.get_status_changes(2, 2)["total"] == 0
+    assert tracker.get_status_changes(1, 9) is None
+
+
+def test_names_are_stored_once(tracker):
+    tracker.save_comparison_run(_run([("Elm Company", "Elm", "OK")]), "q3.xlsx", 1, {})
+    conn = sqlite3.connect(tracker.db_path)
+    assert conn.execute("SELECT COUNT(*) FROM company_names").fetchone()[0] == 6
+    assert conn.execute("SELECT COUNT(*) FROM companies").fetchone()[0] == 4
+    conn.close()
+
+
+def test_history_endpoints(tmp_path, monkeypatch):
+    import app as webapp
+
+    summarizer = ResultsSummarizer(str(tmp_path / "history.db"))
+    for statuses in ([("Elm Co", "Elm", "OK")], [("Elm Co", "", "Add")]):
+        summarizer.tracker.save_comparison_run(_run(statuses), "b.xlsx", 1, {})
+    # Started first, so the first request doesn't replace the patched summarizer
+    webapp.init_services()
+    monkeypatch.setattr(webapp, "summarizer", summarizer)
+    client = webapp.app.test_client()
+
+    body = client.get("/history/companies/timeline?name=ELM%20COMPANY&per_page=1").get_json()
+    assert (body["company"]["name"], body["total"], len(body["entries"])) == ("Elm Co", 2, 1)
+    assert body["entries"][0]["status"] == "Add"
+    assert client.get(f"/history/companies/timeline?company_id={body['company']['company_id']}").status_code == 200
+    assert client.get("/history/companies/timeline?name=Nobody").status_code == 404
+    assert client.get("/history/companies/timeline").status_code == 400
+    assert client.get("/history/companies/timeline?name=Elm&page=0").status_code == 400
+
+    body = client.get("/history/changes").get_json()
+    assert body["changes"] == [{"company_id": 1, "name": "Elm Co", "previous_status": "OK", "status": "Add"}]
+    assert client.get("/history/changes?from_run=5").status_code == 404
@@ -110,3 +110,31 @@ def test_unmatched_website_companies_get_remove_status(new_spec, website_df):
     remove_rows = results[results["Status"] == "Remove"]
     assert len(remove_rows) == 2  # Neom Company + AccorInvest Group
     assert len(unmatched) == 2
+
+
+def test_result_columns_and_remove_rows_are_laid_out_in_order(new_spec, website_df):
+    baseline = pd.DataFrame([
+        {"CR Name": "Neom Company", "Brand Name": "NEOM", "Portfolio": "Strategic", "Ecosystem": "Neom"},
+        {"CR Name": "Brand New Co", "Brand Name": "BRAND NEW", "Portfolio": "Vision", "Ecosystem": None},
+    ])
+    results, unmatched = enhanced_compare_companies(baseline, website_df, new_spec)
+    assert list(results.columns) == [
+        "CR Name", "Brand Name", "Website Name",
+        "Portfolio", "Website Portfolio", "Portfolio Match",
+        "Ecosystem", "Website Ecosystem", "Ecosystem Match",
+        "Match Score", "Match Type", "Match Confidence", "Matched Field", "Runner-up Matches",
+        "PC exist in website", "Status",
+    ]
+    assert results["Status"].tolist() == ["OK", "Add", "Remove", "Remove"]
+    assert results["Website Name"].tolist() == ["Neom Company", "", "ACWA Power", "AccorInvest Group"]
+    assert results["Match Score"].tolist()[0] == 100
+    assert results["Match Score"].tolist()[2:] == [0, 0]
+    assert list(unmatched.columns) == ["Company", "Portfolio", "Ecosystem"]
+    assert unmatched["Company"].tolist() == ["ACWA Power", "AccorInvest Group"]
+
+
+def test_empty_baseline_lists_every_website_company_for_removal(legacy_spec, website_df):
+    baseline = pd.DataFrame(columns=["CR Name", "Brand Name"])
+    results, unmatched = enhanced_compare_companies(baseline, website_df, legacy_spec)
+    assert results["Status"].tolist() == ["Remove"] * 3
+    assert len(unmatched) == 3
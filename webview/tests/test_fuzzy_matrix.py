@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+from enhanced_matching import EnhancedCompanyMatcher
+from fuzzy_matrix import FuzzyScoreMatrix
+
+
+NAMES = [
+    "acwa power", "acwa", "saudi arabian mining", "arabian mining", "red sea global",
+    "the red sea development", "riyad capital", "riyadh capitals", "stc", "ab", "",
+    "national water development authority of saudi arabia", "elm",
+]
+
+
+@pytest.fixture
+def matcher():
+    return EnhancedCompanyMatcher()
+
+
+def test_matrix_cells_equal_per_pair_fuzzy_fallback(matcher):
+    choices = NAMES + ["acwa power"]  # duplicate choice keeps its own column
+    matrix = FuzzyScoreMatrix(NAMES, choices, workers=1)
+    for query in NAMES:
+        row = matrix.row(query)
+        assert len(row) == len(choices)
+        for website, cell in zip(choices, row):
+            result = matcher.score_forms(matcher.name_forms(query), matcher.name_forms(website))
+            expected = result['score'] if result['match_type'] in ('fuzzy', 'too_short', 'length_mismatch') else None
+            if expected is not None:
+                assert cell == expected, (query, website)
+
+
+def test_guards_zero_short_and_mismatched_lengths():
+    matrix = FuzzyScoreMatrix(["ab", "acwa power"], ["abc", "national water development authority of saudi arabia"])
+    assert matrix.row("ab").tolist() == [0.0, 0.0]
+    assert matrix.row("acwa power")[1] == 0.0
+
+
+def test_unknown_query_has_no_row():
+    assert FuzzyScoreMatrix(["acwa"], ["acwa power"]).row("neom") is None
+
+
+def test_compare_with_matrix_matches_per_pair_scoring(matcher):
+    website_df = pd.DataFrame({"Company": ["Riyadh Capitals", "Arabian Mining Co", "Red Sea Global"]})
+    baseline_row = pd.Series({"CR Name": "Riyad Capital Company", "Brand Name": "Red Sea Glob"})
+    catalog = matcher.build_catalog(website_df)
+    fuzzy = FuzzyScoreMatrix([matcher.normalize_company_name(n) for n in baseline_row], catalog.normalized)
+
+    best, info = matcher.find_best_match(baseline_row, website_df, catalog, fuzzy)
+    expected_best, expected_info = matcher.find_best_match(baseline_row, website_df)
+    assert best.name == expected_best.name
+    assert info == expected_info
@@ -0,0 +1,98 @@
+import sqlite3
+import threading
+
+import pandas as pd
+import pytest
+
+from history_db import HistoryDatabase
+from results_analyzer import HistoricalTracker
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = HistoryDatabase(str(tmp_path / "history.db"))
+    database.write(lambda conn: conn.execute("CREATE TABLE t (value INTEGER)"))
+    yield database
+    database.close()
+
+
+def test_write_returns_result_and_commits(db):
+    assert db.write(lambda conn: conn.execute("INSERT INTO t VALUES (1)").lastrowid) == 1
+    with db.read() as conn:
+        assert conn.execute("SELECT value FROM t").fetchall() == [(1,)]
+
+
+def test_failed_write_is_rolled_back_and_raised(db):
+    def fail(conn):
+        conn.execute("INSERT INTO t VALUES (1)")
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        db.write(fail)
+    db.write(lambda conn: conn.execute("INSERT INTO t VALUES (2)"))
+    with db.read() as conn:
+        assert conn.execute("SELECT value FROM t").fetchall() == [(2,)]
+
+
+def test_each_thread_reads_on_its_own_connection(db):
+    with db.read() as first, db.read() as again:
+        assert first is again
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(db.read().__enter__()))
+    thread.start()
+    thread.join()
+    assert seen[0] is not first
+    assert db.stats["read_connections"] == 2
+
+
+def test_readers_are_not_blocked_by_an_open_write(db):
+    db.write(lambda conn: conn.execute("INSERT INTO t VALUES (1)"))
+    started, release = threading.Event(), threading.Event()
+
+    def slow_write(conn):
+        conn.execute("INSERT INTO t VALUES (2)")
+        started.set()
+        release.wait(5)
+
+    writer = threading.Thread(target=db.write, args=(slow_write,))
+    writer.start()
+    started.wait(5)
+    with db.read() as conn:
+        # The uncommitted row isn't visible, and the read doesn't wait for it
+        assert conn.execute("SELECT value FROM t").fetchall() == [(1,)]
+    release.set()
+    writer.join()
+    with db.read() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 2
+
+
+def test_trackers_for_one_file_share_a_database(tmp_path):
+    path = str(tmp_path / "history.db")
+    assert HistoricalTracker(path).db is HistoricalTracker(path).db
+
+
+def test_concurrent_jobs_save_and_read_history(tmp_path):
+    tracker = HistoricalTracker(str(tmp_path / "history.db"))
+    results = pd.DataFrame({"CR Name": ["A", "B", ""], "Status": ["OK", "Add", "Remove"], "Match Score": [100, 0, 0],
+                            "PC exist in website": ["Yes", "No", "Yes"]})
+    run_ids, errors = [], []
+
+    def job():
+        try:
+            for _ in range(5):
+                run_ids.append(tracker.save_comparison_run(results, "b.xlsx", 3, {}))
+                tracker.get_run_aggregates(limit=3)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=job) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sorted(run_ids) == list(range(1, 41))
+    conn = sqlite3.connect(tracker.db_path)
+    assert conn.execute("SELECT COUNT(*) FROM company_history").fetchone()[0] == 120
+    conn.close()
@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+from enhanced_matching import EnhancedCompanyMatcher, enhanced_compare_companies
+from match_cascade import MatchCascade
+from template_spec import TemplateSpec
+
+
+WEBSITE = [
+    "ACWA Power Company", "Saudi Arabian Mining Company", "Red Sea Global", "STC Bank",
+    "National Water Development Authority", "Riyadh Capitals", "The Elm Company", "Co LLC",
+    "Jeddah Real Estate Development", "Acwa Power",
+]
+
+BASELINE = [
+    # (CR Name, Brand Name): one row per strategy, plus ties and misses
+    ("Acwa Power Co.", None),                         # exact_normalized, tie broken by first row
+    ("Elm", "ELM"),                                   # core_exact ("the elm" vs "elm")
+    ("STC", "Saudi Telecom"),                         # acronym_match
+    ("Saudi Arabian Mining Ventures", None),          # substring
+    ("Water Development National Authority", None),   # token_based
+    ("Riyad Capital", "Red Sea Glob"),                # fuzzy on both fields
+    ("Power Co Bank STC", None),                      # acronym on an all-generic website name
+    ("Xyzzy", ""),                                    # nothing
+    (None, None),
+]
+
+
+@pytest.fixture
+def matcher():
+    return EnhancedCompanyMatcher()
+
+
+def test_cascade_matches_pairwise_find_best_match(matcher):
+    website_df = pd.DataFrame({"Company": WEBSITE})
+    catalog = matcher.build_catalog(website_df)
+    matches = MatchCascade(catalog).best_matches(
+        [matcher.name_forms(cr) for cr, _ in BASELINE],
+        [matcher.name_forms(brand) for _, brand in BASELINE],
+    )
+    seen_types = set()
+    for (cr, brand), (position, info) in zip(BASELINE, matches):
+        expected, expected_info = matcher.find_best_match(
+            pd.Series({"CR Name": cr, "Brand Name": brand}), website_df, catalog)
+        assert info == expected_info, (cr, brand)
+        assert position == (expected.name if expected is not None else None), (cr, brand)
+        seen_types.add(info["match_type"])
+    assert seen_types == {"exact_normalized", "core_exact", "acronym_match", "substring",
+                          "token_based", "fuzzy", "none"}
+
+
+def test_hash_join_hit_still_loses_to_an_earlier_fuzzy_100(matcher):
+    # partial_ratio gives row 0 a fuzzy 100; the exact hit on row 1 only ties it
+    website_df = pd.DataFrame({"Company": ["Acwa Powe Xyz Abcdef", "Acwa Powe"]})
+    matches = MatchCascade(matcher.build_catalog(website_df)).best_matches(
+        [matcher.name_forms("Acwa Powe")], [matcher.name_forms(None)])
+    assert matches[0][0] == 0
+    assert matches[0][1]["match_type"] == "fuzzy"
+    expected, expected_info = matcher.find_best_match(
+        pd.Series({"CR Name": "Acwa Powe", "Brand Name": None}), website_df)
+    assert matches[0] == (expected.name, expected_info)
+
+
+def test_both_drivers_build_the_same_report():
+    spec = TemplateSpec(kind="legacy", name_field="CR Name", brand_field="Brand Name",
+                        portfolio_field=None, ecosystem_field=None)
+    website_df = pd.DataFrame({"Company": WEBSITE})
+    baseline_df = pd.DataFrame([{"CR Name": cr, "Brand Name": brand} for cr, brand in BASELINE])
+    cascade = enhanced_compare_companies(baseline_df, website_df, spec, driver="cascade")
+    pairwise = enhanced_compare_companies(baseline_df, website_df, spec, driver="pairwise")
+    pd.testing.assert_frame_equal(cascade[0], pairwise[0])
+    pd.testing.assert_frame_equal(cascade[1], pairwise[1])
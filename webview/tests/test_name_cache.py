@@ -0,0 +1,83 @@
+import time
+
+import pandas as pd
+import pytest
+
+from enhanced_matching import enhanced_compare_companies
+from name_cache import NameResolutionCache, cache_key
+from template_spec import TemplateSpec
+
+
+@pytest.fixture
+def spec():
+    return TemplateSpec(
+        kind="new", name_field="CR Name", brand_field="Brand Name",
+        portfolio_field="Portfolio", ecosystem_field="Ecosystem",
+    )
+
+
+def _website_df():
+    return pd.DataFrame([
+        {"Company": "ACWA Power", "Portfolio": "Vision", "Ecosystem": "Energy"},
+        {"Company": "Neom Company", "Portfolio": "Strategic", "Ecosystem": "Neom"},
+        {"Company": "Saudi Arabian Mining Company", "Portfolio": "Vision", "Ecosystem": "Mining"},
+    ])
+
+
+def _baseline_df():
+    return pd.DataFrame([
+        {"CR Name": "Acwa Power Company", "Brand Name": "ACWA POWER", "Portfolio": "Vision", "Ecosystem": "Energy"},
+        {"CR Name": "Saudi Arabian Minig Co", "Brand Name": "MAADEN", "Portfolio": "Vision", "Ecosystem": "Mining"},
+        {"CR Name": "Brand New Co", "Brand Name": "BRAND NEW", "Portfolio": "Vision", "Ecosystem": None},
+    ])
+
+
+def test_second_run_reuses_resolutions_with_identical_results(tmp_path, spec):
+    cache = NameResolutionCache(db_path=str(tmp_path / "history.db"), ttl_days=30)
+    first, first_unmatched = enhanced_compare_companies(_baseline_df(), _website_df(), spec, name_cache=cache)
+    assert first.attrs["name_cache"] == {"hits": 0, "misses": 3, "stale": 0, "stored": 2, "evicted": 0}
+    assert len(cache) == 2
+
+    second, second_unmatched = enhanced_compare_companies(_baseline_df(), _website_df(), spec, name_cache=cache)
+    assert second.attrs["name_cache"] == {"hits": 2, "misses": 1, "stale": 0, "stored": 0, "evicted": 0}
+    pd.testing.assert_frame_equal(second, first)
+    pd.testing.assert_frame_equal(second_unmatched, first_unmatched)
+
+
+def test_cached_target_missing_from_scrape_is_rescored(tmp_path, spec):
+    cache = NameResolutionCache(db_path=str(tmp_path / "history.db"), ttl_days=30)
+    enhanced_compare_companies(_baseline_df(), _website_df(), spec, name_cache=cache)
+
+    website_df = _website_df().iloc[1:].reset_index(drop=True)  # ACWA Power delisted
+    results, _ = enhanced_compare_companies(_baseline_df(), website_df, spec, name_cache=cache)
+    assert results.attrs["name_cache"]["hits"] == 1
+    assert results.attrs["name_cache"]["stale"] == 1
+    uncached, _ = enhanced_compare_companies(_baseline_df(), website_df, spec)
+    pd.testing.assert_frame_equal(results, uncached)
+
+
+def test_other_matcher_version_is_ignored_and_evicted(tmp_path, spec):
+    db_path = str(tmp_path / "history.db")
+    enhanced_compare_companies(_baseline_df(), _website_df(), spec,
+                               name_cache=NameResolutionCache(db_path=db_path, ttl_days=30, version="old"))
+    cache = NameResolutionCache(db_path=db_path, ttl_days=30, version="new")
+    results, _ = enhanced_compare_companies(_baseline_df().iloc[:1], _website_df(), spec, name_cache=cache)
+    assert results.attrs["name_cache"]["hits"] == 0
+    # ACWA's entry is rewritten under the new version, Ma'aden's is evicted
+    assert results.attrs["name_cache"]["stored"] == 1
+    assert results.attrs["name_cache"]["evicted"] == 1
+    assert len(cache) == 1
+
+
+def test_unused_entries_expire(tmp_path):
+    cache = NameResolutionCache(db_path=str(tmp_path / "history.db"), ttl_days=30)
+    info = {"score": 93.5, "match_type": "fuzzy", "confidence": "high", "matched_field": "CR Name"}
+    runner_up = dict(info, score=91.0)
+    cache.record([(cache_key("a", "b"), [("A B", info), ("A Bee", runner_up), ("Gone", runner_up)])], [])
+    hits, stale = cache.lookup([cache_key("a", "b")], ["X", "A B", "A Bee"])
+    assert hits == {0: [(1, info), (2, runner_up)]} and stale == 0
+
+    expired = NameResolutionCache(db_path=cache.db_path, ttl_days=1 / 86400)
+    time.sleep(1.1)
+    assert expired.record([], []) == 1
+    assert len(expired) == 0
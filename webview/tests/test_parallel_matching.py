@@ -0,0 +1,58 @@
+import pandas as pd
+from enhanced_matching import enhanced_compare_companies
+import parallel_matching
+from parallel_matching import resolve_processes
+from template_spec import TemplateSpec
+
+
+def _frames():
+    website_df = pd.DataFrame({
+        "Company": ["ACWA Power", "Neom Company", "Red Sea Global", "Saudi Arabian Mining", "STC Bank"],
+        "Portfolio": ["Vision", "Strategic", "Vision", "Financial", None],
+        "Ecosystem": ["Energy", "Neom", None, "Mining", "Telecom"],
+    })
+    names = ["Acwa Power Co", "NEOM", "Red Sea Glob", "Maaden", "STC", "Unknown Holding", None, "Arabian Mining"]
+    baseline_df = pd.DataFrame({
+        "CR Name": names * 3,
+        "Brand Name": list(reversed(names)) * 3,
+        "Portfolio": ["Vision", "Strategic"] * 12,
+        "Ecosystem": ["Energy", None, "Neom"] * 8,
+    })
+    spec = TemplateSpec(kind="new", name_field="CR Name", brand_field="Brand Name",
+                        portfolio_field="Portfolio", ecosystem_field="Ecosystem")
+    return baseline_df, website_df, spec
+
+
+def test_process_pool_gives_the_serial_results_in_order(monkeypatch):
+    monkeypatch.setattr("enhanced_matching.MATCH_PARALLEL_MIN_ROWS", 0)
+    baseline_df, website_df, spec = _frames()
+    serial = enhanced_compare_companies(baseline_df, website_df, spec, processes=0)
+    for driver in ("cascade", "pairwise"):
+        parallel = enhanced_compare_companies(baseline_df, website_df, spec, driver=driver, processes=2)
+        pd.testing.assert_frame_equal(parallel[0], serial[0])
+        pd.testing.assert_frame_equal(parallel[1], serial[1])
+
+
+def test_small_baselines_stay_in_process(monkeypatch):
+    calls = []
+    monkeypatch.setattr("enhanced_matching.parallel_best_matches", lambda *a: calls.append(a))
+    baseline_df, website_df, spec = _frames()
+    enhanced_compare_companies(baseline_df, website_df, spec, processes=4)
+    assert calls == []
+
+
+def test_resolve_processes():
+    assert resolve_processes(0) == 0
+    assert resolve_processes(3) == 3
+    assert resolve_processes(-1) >= 1
+
+
+def test_pool_is_kept_between_comparisons(monkeypatch):
+    monkeypatch.setattr("enhanced_matching.MATCH_PARALLEL_MIN_ROWS", 0)
+    baseline_df, website_df, spec = _frames()
+    first = enhanced_compare_companies(baseline_df, website_df, spec, processes=2)
+    pool = parallel_matching._pool
+    # Another website list: workers load the new catalog rather than reuse the old one
+    second = enhanced_compare_companies(baseline_df, website_df.iloc[::-1].reset_index(drop=True), spec, processes=2)
+    assert parallel_matching._pool is pool
+    assert first[0]["Website Name"].tolist() == second[0]["Website Name"].tolist()
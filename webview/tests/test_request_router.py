@@ -0,0 +1,77 @@
+import pytest
+from config import ROUTE_POLICY
+from request_router import RoutePolicy
+
+
+@pytest.fixture
+def policy():
+    return RoutePolicy.from_config(ROUTE_POLICY)
+
+
+def test_main_frame_navigation_is_never_blocked(policy):
+    assert policy.block_reason("https://challenges.cloudflare.com/x", "document", main_frame=True) is None
+    assert policy.block_reason("https://unknown.example/", "document", main_frame=True) is None
+
+
+def test_subframe_documents_follow_the_domain_rules(policy):
+    assert policy.block_reason("https://www.googletagmanager.com/ns.html", "document") == "domain"
+    assert policy.block_reason("https://unknown.example/embed", "document") == "third_party"
+    assert policy.block_reason("https://challenges.cloudflare.com/turnstile", "document") is None
+
+
+def test_heavy_resource_types_blocked_even_on_site_domain(policy):
+    assert policy.block_reason("https://www.pif.gov.sa/logo.png", "image") == "type"
+    assert policy.block_reason("https://www.pif.gov.sa/font.woff2", "font") == "type"
+
+
+def test_site_scripts_and_search_xhr_allowed(policy):
+    assert policy.block_reason("https://www.pif.gov.sa/app.js", "script") is None
+    assert policy.block_reason("https://www.pif.gov.sa/sxa/search/results/?p=9", "xhr") is None
+    assert policy.block_reason("https://consent.cookiebot.com/uc.js", "script") is None
+
+
+def test_blocklisted_and_third_party_hosts(policy):
+    assert policy.block_reason("https://www.googletagmanager.com/gtm.js", "script") == "domain"
+    assert policy.block_reason("https://cdn.some-widget.io/w.js", "script") == "third_party"
+
+
+def test_third_party_allowed_when_not_blocking_them():
+    policy = RoutePolicy(block_resource_types=frozenset({"image"}))
+    assert policy.block_reason("https://cdn.some-widget.io/w.js", "script") is None
+
+
+class _Frame:
+    def __init__(self, parent_frame=None):
+        self.parent_frame = parent_frame
+
+
+class _Request:
+    def __init__(self, url, resource_type, frame):
+        self.url, self.resource_type, self.frame = url, resource_type, frame
+
+
+class _Route:
+    def __init__(self, request):
+        self.request = request
+        self.outcome = None
+
+    async def continue_(self):
+        self.outcome = "continued"
+
+    async def abort(self, error_code):
+        self.outcome = "aborted"
+
+
+def test_router_lets_the_page_through_but_not_a_blocked_iframe(policy):
+    import asyncio
+    from request_router import RequestRouter
+
+    router = RequestRouter(policy)
+    top = _Frame()
+    page = _Route(_Request("https://www.pif.gov.sa/en/", "document", top))
+    iframe = _Route(_Request("https://www.googletagmanager.com/ns.html", "document", _Frame(parent_frame=top)))
+    for route in (page, iframe):
+        asyncio.run(router._handle(route))
+    assert (page.outcome, iframe.outcome) == ("continued", "aborted")
+    assert router.summary()["blocked_by_reason"] == {"domain": 1}
+    assert router.summary()["allowed_bytes"] == 0
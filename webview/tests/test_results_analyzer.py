@@ -84,3 +84,76 @@ def test_new_db_schema_includes_portfolio_and_ecosystem_columns(tmp_summarizer):
     conn.close()
     for needed in ("portfolio", "website_portfolio", "ecosystem", "website_ecosystem"):
         assert needed in cols
+
+
+def test_saved_rows_match_results(tmp_summarizer):
+    import sqlite3
+    results = _new_results().drop(columns=["Ecosystem"])
+    run_id = tmp_summarizer.tracker.save_comparison_run(results, "new.xlsx", 5, {})
+    conn = sqlite3.connect(tmp_summarizer.tracker.db_path)
+    rows = conn.execute(
+        "SELECT run_id, cr_name, website_portfolio, ecosystem, match_score, status FROM company_history_named ORDER BY id"
+    ).fetchall()
+    conn.close()
+    assert rows == [
+        (run_id, "A", "Vision", None, 100.0, "OK"),
+        (run_id, "B", "Strategic", None, 100.0, "Requires update"),
+        (run_id, "C", "Vision", None, 100.0, "Requires update"),
+    ]
+
+
+def test_older_database_is_migrated(tmp_path):
+    import sqlite3
+    from results_analyzer import HistoricalTracker
+    db = str(tmp_path / "history.db")
+    conn = sqlite3.connect(db)
+    conn.executescript("""
+        CREATE TABLE comparison_runs (id INTEGER PRIMARY KEY AUTOINCREMENT, run_date TEXT NOT NULL,
+            baseline_file TEXT NOT NULL, total_baseline_companies INTEGER, total_website_companies INTEGER,
+            summary_stats TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        CREATE TABLE company_history (id INTEGER PRIMARY KEY AUTOINCREMENT, run_id INTEGER, cr_name TEXT,
+            brand_name TEXT, website_name TEXT, match_score REAL, status TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        INSERT INTO comparison_runs (run_date, baseline_file) VALUES ('2024-01-01 00:00:00', 'old.xlsx');
+        INSERT INTO company_history (run_id, cr_name, status) VALUES (1, 'A', 'OK');
+    """)
+    conn.close()
+
+    tracker = HistoricalTracker(db_path=db)
+    tracker.save_comparison_run(_new_results(), "new.xlsx", 5, {})
+    HistoricalTracker(db_path=db)  # reopening is a no-op
+
+    old_run, new_run = tracker.get_run_aggregates(limit=5)[::-1]
+    assert (old_run["total_rows"], old_run["ok"], old_run["portfolio_mismatches"]) == (1, 1, None)
+    assert new_run["portfolio_mismatches"] == 1
+
+    conn = sqlite3.connect(db)
+    indexes = {row[1] for row in conn.execute("PRAGMA index_list(company_history)")}
+    assert {"idx_company_history_run_id", "idx_company_history_company"} <= indexes
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("SELECT COUNT(*) FROM company_history WHERE ecosystem = 'Neom'").fetchone()[0] == 2
+    assert conn.execute("SELECT COUNT(*) FROM company_history").fetchone()[0] == 4
+    conn.close()
+
+
+def test_history_compares_with_the_previous_run(tmp_summarizer, new_spec):
+    first = tmp_summarizer.save_and_summarize(_new_results(), "q1.xlsx", 5, new_spec)
+    assert first['historical_comparison']['has_historical_data'] is False
+
+    fixed = _new_results()
+    fixed.loc[1, ["Portfolio Match", "Status"]] = ["Yes", "OK"]
+    second = tmp_summarizer.save_and_summarize(fixed, "q2.xlsx", 5, new_spec)
+    third = tmp_summarizer.save_and_summarize(fixed, "q3.xlsx", 5, new_spec)
+
+    changes = second['historical_comparison']['changes']
+    assert second['historical_comparison']['previous_run_id'] == first['run_id']
+    assert changes['ok'] == {'current': 2, 'previous': 1, 'change': 1, 'trend': 'same'}
+    assert changes['portfolio_mismatches']['change'] == -1
+    assert second['historical_comparison']['overall_trend'] == 'improving'
+    assert third['historical_comparison']['previous_run_id'] == second['run_id']
+    assert third['historical_comparison']['overall_trend'] == 'stable'
+
+    runs = tmp_summarizer.tracker.get_run_aggregates(limit=10)
+    assert [run['run_id'] for run in runs] == [third['run_id'], second['run_id'], first['run_id']]
+    assert runs[-1]['portfolio_mismatches'] == 1 and runs[-1]['requires_update'] == 2
+    assert tmp_summarizer.tracker.get_run_aggregates(limit=1, before_run_id=second['run_id'])[0]['baseline_file'] == "q1.xlsx"
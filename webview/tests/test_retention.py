@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import time
+
+import pandas as pd
+import pytest
+
+from results_analyzer import HistoricalTracker
+from retention import RetentionManager, RetentionPolicy
+
+
+def _results(i):
+    return pd.DataFrame({
+        "CR Name": [f"Company {i}", "Elm Co", ""],
+        "Brand Name": ["", None, ""],
+        "Website Name": [f"Company {i}", "Elm", "Neom"],
+        "Match Score": [100, 90, 0],
+        "PC exist in website": ["Yes", "Yes", "Yes"],
+        "Status": ["OK", "Requires update", "Remove"],
+    })
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    tracker = HistoricalTracker(str(tmp_path / "history.db"))
+    for i in range(4):
+        tracker.save_comparison_run(_results(i), f"q{i}.xlsx", 3, {})
+    return tracker
+
+
+def test_old_runs_keep_aggregates_and_move_detail_to_archive(tracker, tmp_path):
+    before = tracker.export_run_detail(1)
+    manager = RetentionManager(tracker, uploads_dir=str(tmp_path / "uploads"), archive_dir=str(tmp_path / "archive"),
+                               policy=RetentionPolicy(detail_runs=2, uploads_quota_mb=0, uploads_max_age_days=0))
+
+    report = manager.enforce()
+    assert report["history"]["archived_runs"] == [1, 2]
+    assert report["history"]["deleted_rows"] == 6
+    archived = pd.read_parquet(tmp_path / "archive" / "run_1.parquet")
+    pd.testing.assert_frame_equal(archived, before)
+    assert archived["baseline_file"].tolist() == ["q0.xlsx"] * 3
+    assert sorted(os.listdir(tmp_path / "archive")) == ["run_1.parquet", "run_2.parquet"]
+
+    conn = sqlite3.connect(tracker.db_path)
+    assert conn.execute("SELECT DISTINCT run_id FROM company_history ORDER BY run_id").fetchall() == [(3,), (4,)]
+    assert conn.execute("SELECT COUNT(*) FROM company_names WHERE cr_name = 'Company 0'").fetchone()[0] == 0
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    conn.close()
+    assert len(tracker.get_run_aggregates(limit=10)) == 4
+    elm = tracker.find_company("Elm Company")
+    assert [entry["run_id"] for entry in tracker.get_company_timeline(elm["company_id"])[1]] == [4, 3]
+
+    assert manager.enforce()["history"]["archived_runs"] == []
+
+
+def test_uploads_are_trimmed_oldest_first(tracker, tmp_path):
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    now = time.time()
+    for name, age_hours in (("old_baseline.xlsx", 72), ("results_old.xlsx", 48), ("results_kept.xlsx", 30),
+                            ("error_page.html", 24), ("results_new.xlsx", 0)):
+        path = uploads / name
+        path.write_bytes(b"x" * 400_000)
+        os.utime(path, (now - age_hours * 3600, now - age_hours * 3600))
+
+    manager = RetentionManager(tracker, uploads_dir=str(uploads), archive_dir=str(tmp_path / "archive"),
+                               policy=RetentionPolicy(detail_runs=0, uploads_quota_mb=1, uploads_max_age_days=0))
+    report = manager.enforce(protected=[str(uploads / "results_kept.xlsx")])["uploads"]
+
+    # 2 MB against a 1 MB quota: the three oldest unprotected files go; the fresh one stays regardless
+    assert sorted(os.listdir(uploads)) == ["results_kept.xlsx", "results_new.xlsx"]
+    assert report["removed_files"] == 3
+    assert report["remaining_bytes"] == 800_000
+
+
+def test_uploads_past_their_age_are_removed(tracker, tmp_path):
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    stale, fresh = uploads / "stale.xlsx", uploads / "fresh.xlsx"
+    for path, age_days in ((stale, 10), (fresh, 2)):
+        path.write_bytes(b"x")
+        os.utime(path, (time.time() - age_days * 86400,) * 2)
+
+    manager = RetentionManager(tracker, uploads_dir=str(uploads), archive_dir=str(tmp_path / "archive"),
+                               policy=RetentionPolicy(detail_runs=0, uploads_quota_mb=0, uploads_max_age_days=7))
+    manager.enforce()
+    assert os.listdir(uploads) == ["fresh.xlsx"]
+
+
+def test_archived_pages_are_returned_to_the_file_system(tmp_path):
+    tracker = HistoricalTracker(str(tmp_path / "history.db"))
+    run = pd.concat([_results(i) for i in range(1000)], ignore_index=True)
+    for _ in range(3):
+        tracker.save_comparison_run(run, "b.xlsx", 3, {})
+
+    manager = RetentionManager(tracker, uploads_dir=str(tmp_path / "uploads"), archive_dir=str(tmp_path / "archive"),
+                               policy=RetentionPolicy(detail_runs=1, uploads_quota_mb=0, uploads_max_age_days=0))
+    assert manager.enforce()["history"]["freed_pages"] > 0
+    conn = sqlite3.connect(tracker.db_path)
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    conn.close()
@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+
+from enhanced_matching import enhanced_compare_companies
+from row_match_store import RowMatchStore, baseline_row_hashes
+from template_spec import TemplateSpec
+
+
+@pytest.fixture
+def spec():
+    return TemplateSpec(
+        kind="new", name_field="CR Name", brand_field="Brand Name",
+        portfolio_field="Portfolio", ecosystem_field="Ecosystem",
+    )
+
+
+def _website_df():
+    return pd.DataFrame([
+        {"Company": "ACWA Power", "Portfolio": "Vision", "Ecosystem": "Energy"},
+        {"Company": "Neom Company", "Portfolio": "Strategic", "Ecosystem": "Neom"},
+        {"Company": "Saudi Arabian Mining Company", "Portfolio": "Vision", "Ecosystem": "Mining"},
+    ])
+
+
+def _baseline_df():
+    return pd.DataFrame([
+        {"CR Name": "Acwa Power Company", "Brand Name": "ACWA POWER", "Portfolio": "Vision", "Ecosystem": "Energy"},
+        {"CR Name": "Saudi Arabian Minig Co", "Brand Name": "MAADEN", "Portfolio": "Vision", "Ecosystem": "Mining"},
+        {"CR Name": "Brand New Co", "Brand Name": "BRAND NEW", "Portfolio": "Vision", "Ecosystem": None},
+    ])
+
+
+def test_row_hashes_cover_name_brand_portfolio_and_ecosystem():
+    baseline = _baseline_df()
+    hashes = baseline_row_hashes(baseline)
+    assert len(set(hashes)) == 3
+    assert baseline_row_hashes(baseline.assign(Extra="ignored")) == hashes
+    edited = baseline.copy()
+    edited.loc[2, "Ecosystem"] = "Tourism"
+    assert baseline_row_hashes(edited)[:2] == hashes[:2]
+    assert baseline_row_hashes(edited)[2] != hashes[2]
+
+
+def test_edited_rows_are_the_only_ones_rematched(tmp_path, spec):
+    store = RowMatchStore(db_path=str(tmp_path / "history.db"))
+    first, _ = enhanced_compare_companies(_baseline_df(), _website_df(), spec, row_store=store)
+    assert first.attrs["row_reuse"]["reused"] == 0
+
+    # The analyst fixes the Ma'aden row so it now claims Neom Company instead
+    edited = _baseline_df()
+    edited.loc[1, ["CR Name", "Brand Name"]] = ["Neom Company", "NEOM"]
+    edited.loc[1, ["Portfolio", "Ecosystem"]] = ["Strategic", "Neom"]
+    results, unmatched = enhanced_compare_companies(edited, _website_df(), spec, row_store=store)
+    assert results.attrs["row_reuse"]["reused"] == 2
+    assert results.attrs["row_reuse"]["rematched"] == 1
+
+    fresh, fresh_unmatched = enhanced_compare_companies(edited, _website_df(), spec)
+    pd.testing.assert_frame_equal(results, fresh)
+    pd.testing.assert_frame_equal(unmatched, fresh_unmatched)
+    assert results.loc[results["Status"] == "Remove", "Website Name"].tolist() == ["Saudi Arabian Mining Company"]
+
+
+def test_new_snapshot_rematches_everything(tmp_path, spec):
+    store = RowMatchStore(db_path=str(tmp_path / "history.db"))
+    enhanced_compare_companies(_baseline_df(), _website_df(), spec, row_store=store)
+    website_df = _website_df().iloc[::-1].reset_index(drop=True)
+    results, _ = enhanced_compare_companies(_baseline_df(), website_df, spec, row_store=store)
+    assert results.attrs["row_reuse"]["reused"] == 0
+    fresh, _ = enhanced_compare_companies(_baseline_df(), website_df, spec)
+    pd.testing.assert_frame_equal(results, fresh)
@@ -0,0 +1,169 @@
+import asyncio
+import compare
+
+
+class _FakePage:
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakeContext:
+    def __init__(self):
+        self.pages = []
+
+    async def new_page(self):
+        page = _FakePage(f"extra-{len(self.pages)}")
+        self.pages.append(page)
+        return page
+
+
+def _patch_scraper(monkeypatch, active, peak):
+    async def fake_prepare(page, headless, timeout, waits, consent_given=False):
+        pass
+
+    async def fake_scrape(page, panel_selector, value, waits):
+        active.add(page.name)
+        peak.append(len(active))
+        await asyncio.sleep(0.01)
+        active.discard(page.name)
+        return [f"{value} Co"]
+
+    monkeypatch.setattr(compare, "_prepare_page", fake_prepare)
+    monkeypatch.setattr(compare, "_scrape_with_facet", fake_scrape)
+
+
+def test_concurrent_facets_return_in_job_order(monkeypatch):
+    active, peak = set(), []
+    _patch_scraper(monkeypatch, active, peak)
+    jobs = [("panel", f"Facet {i}") for i in range(7)]
+    context = _FakeContext()
+
+    results = asyncio.run(compare._scrape_facets(
+        context, _FakePage("main"), jobs, headless=True, timeout=1000, concurrency=3, waits=None,
+    ))
+
+    assert results == [[f"Facet {i} Co"] for i in range(7)]
+    assert max(peak) <= 3
+    assert len(context.pages) == 2
+    assert all(p.closed for p in context.pages)
+
+
+def test_concurrency_one_stays_on_main_page(monkeypatch):
+    active, peak = set(), []
+    _patch_scraper(monkeypatch, active, peak)
+    context = _FakeContext()
+
+    results = asyncio.run(compare._scrape_facets(
+        context, _FakePage("main"), [("panel", "A"), ("panel", "B")],
+        headless=True, timeout=1000, concurrency=1, waits=None,
+    ))
+
+    assert results == [["A Co"], ["B Co"]]
+    assert context.pages == []
+
+
+def test_each_finished_facet_is_reported(monkeypatch):
+    active, peak = set(), []
+    _patch_scraper(monkeypatch, active, peak)
+    reported = []
+    jobs = [("panel", f"Facet {i}") for i in range(5)]
+
+    asyncio.run(compare._scrape_facets(
+        _FakeContext(), _FakePage("main"), jobs, headless=True, timeout=1000, concurrency=2, waits=None,
+        on_result=lambda index, names: reported.append((index, names)),
+    ))
+
+    assert sorted(reported) == [(i, [f"Facet {i} Co"]) for i in range(5)]
+
+
+def test_extra_page_that_fails_to_load_leaves_its_facets_to_the_others(monkeypatch):
+    active, peak = set(), []
+    _patch_scraper(monkeypatch, active, peak)
+
+    async def failing_prepare(page, headless, timeout, waits, consent_given=False):
+        if page.name == "extra-0":
+            raise TimeoutError("challenge not cleared")
+
+    monkeypatch.setattr(compare, "_prepare_page", failing_prepare)
+    context = _FakeContext()
+    jobs = [("panel", f"Facet {i}") for i in range(4)]
+
+    results = asyncio.run(compare._scrape_facets(
+        context, _FakePage("main"), jobs, headless=True, timeout=1000, concurrency=3, waits=None,
+    ))
+
+    assert results == [[f"Facet {i} Co"] for i in range(4)]
+    assert all(page.closed for page in context.pages)
+
+
+class _ResponseContext:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            raise TimeoutError("no search response")
+        return False
+
+
+class _ApiPage:
+    def expect_response(self, predicate, timeout):
+        return _ResponseContext()
+
+
+def _patch_facet_api(monkeypatch, click_error, list_changes):
+    unchecked = []
+
+    class _Target:
+        async def click(self):
+            if click_error:
+                raise RuntimeError("element detached")
+
+    async def fake_target(page, selector):
+        return _Target()
+
+    async def fake_read(page):
+        return {"first_name": "A"}
+
+    async def fake_stale(page):
+        pass
+
+    def fake_changed(page, before):
+        async def condition(timeout):
+            if not list_changes:
+                raise TimeoutError
+        return condition
+
+    async def fake_uncheck(page, selector, waits, await_response=False):
+        unchecked.append(selector)
+
+    monkeypatch.setattr(compare, "_facet_click_target", fake_target)
+    monkeypatch.setattr(compare, "_read_result_list", fake_read)
+    monkeypatch.setattr(compare, "mark_list_stale", fake_stale)
+    monkeypatch.setattr(compare, "list_changed", fake_changed)
+    monkeypatch.setattr(compare, "_uncheck_facet", fake_uncheck)
+    return unchecked
+
+
+def _scrape_api():
+    return asyncio.run(compare._scrape_with_facet_api(_ApiPage(), "panel", "Vision", compare.WaitEngine()))
+
+
+def test_failed_facet_click_leaves_the_facet_alone(monkeypatch):
+    unchecked = _patch_facet_api(monkeypatch, click_error=True, list_changes=False)
+    assert _scrape_api() is None
+    assert unchecked == []
+
+
+def test_missing_response_unchecks_only_an_applied_facet(monkeypatch):
+    unchecked = _patch_facet_api(monkeypatch, click_error=False, list_changes=False)
+    assert _scrape_api() is None
+    assert unchecked == []
+
+    unchecked = _patch_facet_api(monkeypatch, click_error=False, list_changes=True)
+    assert _scrape_api() is None
+    assert len(unchecked) == 1
@@ -0,0 +1,38 @@
+from urllib.parse import parse_qs, urlsplit
+from search_api import card_name, full_result_url, parse_search_payload
+
+
+def _result(title, name="item"):
+    return {
+        "Id": "x", "Name": name,
+        "Html": f'<a href="/x"><div class="card"><h4 class="investmentTitle field-title">{title}</h4>'
+                f'<h5>Sector</h5></div></a>',
+    }
+
+
+def test_card_name_reads_h4_text_and_decodes_entities():
+    assert card_name(_result("  Saudi  Aramco &amp; Co ")) == "Saudi Aramco & Co"
+
+
+def test_card_name_falls_back_to_name_field():
+    assert card_name({"Html": "<div>no title</div>", "Name": "ACWA Power"}) == "ACWA Power"
+
+
+def test_parse_search_payload_returns_names_and_count():
+    payload = {"Count": 42, "Index": 0, "Results": [_result("ACWA Power"), _result("Neom")]}
+    assert parse_search_payload(payload) == (["ACWA Power", "Neom"], 42)
+
+
+def test_parse_search_payload_rejects_other_shapes():
+    assert parse_search_payload(None) is None
+    assert parse_search_payload({"Results": []}) is None
+    assert parse_search_payload({"facets": [], "Count": 3}) is None
+
+
+def test_full_result_url_requests_every_hit_from_offset_zero():
+    url = "https://example.test/sxa/search/results/?s={A}&itemid={B}&sig=&portfolio=Vision%20Portfolio&p=9&e=18"
+    query = parse_qs(urlsplit(full_result_url(url, 120)).query, keep_blank_values=True)
+    assert query["p"] == ["120"]
+    assert query["e"] == ["0"]
+    assert query["portfolio"] == ["Vision Portfolio"]
+    assert query["sig"] == [""]
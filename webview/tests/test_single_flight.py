@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def _run_in_threads(flight, fn, callers=3):
+    """Start `callers` threads, each with its own event loop, calling flight.run."""
+    results, errors, waited = [], [], []
+
+    def worker():
+        try:
+            results.append(asyncio.run(flight.run("site", fn, on_wait=lambda: waited.append(1))))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(callers)]
+    return threads, results, errors, waited
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    async def scrape():
+        calls.append(1)
+        started.set()
+        await asyncio.to_thread(release.wait)
+        return "website_df"
+
+    threads, results, errors, waited = _run_in_threads(flight, scrape)
+    threads[0].start()
+    assert started.wait(5)
+    for t in threads[1:]:
+        t.start()
+    while flight.stats['shared'] < 2:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert calls == [1]
+    assert not errors
+    assert sorted(results) == [("website_df", False), ("website_df", True), ("website_df", True)]
+    assert len(waited) == 2
+    assert not flight.in_flight("site")
+
+
+def test_leader_exception_reaches_followers():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    async def scrape():
+        started.set()
+        await asyncio.to_thread(release.wait)
+        raise RuntimeError("Cloudflare block")
+
+    threads, results, errors, _ = _run_in_threads(flight, scrape, callers=2)
+    threads[0].start()
+    assert started.wait(5)
+    threads[1].start()
+    while flight.stats['shared'] < 1:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert not results
+    assert [str(e) for e in errors] == ["Cloudflare block", "Cloudflare block"]
+
+
+def test_sequential_calls_run_again():
+    flight = SingleFlight()
+    calls = []
+
+    async def scrape():
+        calls.append(1)
+        return len(calls)
+
+    assert asyncio.run(flight.run("site", scrape)) == (1, False)
+    assert asyncio.run(flight.run("site", scrape)) == (2, False)
+    with pytest.raises(ValueError):
+        asyncio.run(flight.run("site", _raise_value_error))
+    assert not flight.in_flight("site")
+
+
+async def _raise_value_error():
+    raise ValueError("boom")
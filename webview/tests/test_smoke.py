@@ -4,3 +4,28 @@ def test_imports():
     import enhanced_matching
     import results_analyzer
     assert callable(app.app)
+
+
+def test_importing_the_app_starts_no_services():
+    import runpy
+    from pathlib import Path
+    # What a spawned matcher worker does with the script that started the app
+    namespace = runpy.run_path(str(Path(__file__).resolve().parent.parent / "app.py"), run_name="__mp_main__")
+    assert namespace["summarizer"] is None and namespace["browser_pool"] is None
+
+
+def test_first_request_starts_the_services():
+    import app
+    assert app.app.test_client().get("/summary/unknown").status_code == 404
+    assert app.summarizer is not None and app.scrape_flight is not None
+
+
+def test_bad_scrape_mode_is_rejected_before_the_upload_is_saved(tmp_path, monkeypatch):
+    import io
+    import app
+    monkeypatch.setitem(app.app.config, "UPLOAD_FOLDER", str(tmp_path))
+    response = app.app.test_client().post("/upload", data={
+        "file": (io.BytesIO(b"not read"), "baseline.xlsx"), "scrape_mode": "carrier-pigeon",
+    }, content_type="multipart/form-data")
+    assert response.status_code == 400
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,61 @@
+import os
+import time
+
+import pandas as pd
+
+from snapshot_cache import WebsiteSnapshotCache, snapshot_fingerprint
+
+
+def _website_df():
+    return pd.DataFrame({
+        "Company Name": ["Saudi Aramco", "STC", "Ma'aden"],
+        "Sector": ["Energy", "Telecom", "Mining"],
+        "Ecosystem": ["Energy", None, "Mining"],
+    })
+
+
+def test_put_then_get_returns_memory_copy(tmp_path):
+    cache = WebsiteSnapshotCache(cache_dir=str(tmp_path), ttl_seconds=3600)
+    stored = cache.put(_website_df())
+    snapshot = cache.get()
+    assert snapshot.source == "memory"
+    assert snapshot.snapshot_id == stored.snapshot_id
+    pd.testing.assert_frame_equal(snapshot.website_df, _website_df())
+    # Callers get their own copy
+    snapshot.website_df.loc[0, "Company Name"] = "changed"
+    assert cache.get().website_df.loc[0, "Company Name"] == "Saudi Aramco"
+
+
+def test_snapshot_older_than_max_age_is_a_miss(tmp_path):
+    cache = WebsiteSnapshotCache(cache_dir=str(tmp_path), ttl_seconds=3600)
+    cache.put(_website_df())
+    time.sleep(0.05)
+    assert cache.get(max_age_seconds=0) is None
+    assert cache.get(max_age_seconds=60) is not None
+
+
+def test_ttl_caps_requested_max_age(tmp_path):
+    cache = WebsiteSnapshotCache(cache_dir=str(tmp_path), ttl_seconds=0)
+    cache.put(_website_df())
+    time.sleep(0.05)
+    assert cache.get(max_age_seconds=3600) is None
+
+
+def test_new_cache_reloads_latest_file_from_disk(tmp_path):
+    WebsiteSnapshotCache(cache_dir=str(tmp_path)).put(_website_df())
+    second = _website_df().iloc[:2]
+    WebsiteSnapshotCache(cache_dir=str(tmp_path)).put(second)
+    assert len(os.listdir(tmp_path)) == 1
+
+    snapshot = WebsiteSnapshotCache(cache_dir=str(tmp_path)).get()
+    assert snapshot.source == "disk"
+    assert snapshot.snapshot_id == snapshot_fingerprint(second)
+    pd.testing.assert_frame_equal(snapshot.website_df, second.reset_index(drop=True))
+
+
+def test_unreadable_file_is_ignored(tmp_path):
+    cache = WebsiteSnapshotCache(cache_dir=str(tmp_path))
+    cache.put(_website_df())
+    for name in os.listdir(tmp_path):
+        (tmp_path / name).write_bytes(b"not parquet")
+    assert WebsiteSnapshotCache(cache_dir=str(tmp_path)).get() is None
@@ -0,0 +1,59 @@
+import json
+import time
+
+import pytest
+
+from storage_state import StorageStateStore, has_consent
+
+
+def _state(clearance_expires=None, consent=True):
+    cookies = []
+    if clearance_expires is not None:
+        cookies.append({"name": "cf_clearance", "value": "x", "expires": clearance_expires})
+    if consent:
+        cookies.append({"name": "CookieConsent", "value": "y", "expires": -1})
+    return {"cookies": cookies, "origins": []}
+
+
+def test_saved_state_round_trips(tmp_path):
+    store = StorageStateStore("firefox", state_dir=str(tmp_path), ttl_seconds=3600)
+    state = _state(clearance_expires=time.time() + 600)
+    store.save(state)
+    assert store.load() == state
+
+
+def test_failed_save_keeps_the_previous_state_and_no_temp_file(tmp_path):
+    store = StorageStateStore("firefox", state_dir=str(tmp_path), ttl_seconds=3600)
+    state = _state()
+    store.save(state)
+    with pytest.raises(TypeError):
+        store.save({"cookies": [object()]})
+    assert store.load() == state
+    assert [p.name for p in tmp_path.iterdir()] == ["firefox.json"]
+
+
+def test_state_past_ttl_is_discarded(tmp_path):
+    store = StorageStateStore("firefox", state_dir=str(tmp_path), ttl_seconds=3600)
+    with open(store.path, "w") as f:
+        json.dump({"saved_at": time.time() - 7200, "state": _state()}, f)
+    assert store.load() is None
+    assert not (tmp_path / "firefox.json").exists()
+
+
+def test_expired_clearance_cookie_invalidates_state(tmp_path):
+    store = StorageStateStore("firefox", state_dir=str(tmp_path), ttl_seconds=3600)
+    store.save(_state(clearance_expires=time.time() - 1))
+    assert store.load() is None
+
+
+def test_corrupt_state_file_is_discarded(tmp_path):
+    store = StorageStateStore("chromium", state_dir=str(tmp_path))
+    (tmp_path / "chromium.json").write_text("{not json")
+    assert store.load() is None
+    assert not (tmp_path / "chromium.json").exists()
+
+
+def test_has_consent():
+    assert has_consent(_state()) is True
+    assert has_consent(_state(consent=False)) is False
+    assert has_consent(None) is False
@@ -0,0 +1,136 @@
+import asyncio
+import threading
+
+import pandas as pd
+import pytest
+
+from enhanced_matching import score_comparison
+from name_cache import NameResolutionCache
+from row_match_store import RowMatchStore
+from scrape_stream import FacetEvent, ScrapeStream
+from stream_matching import StreamingMatcher
+from template_spec import TemplateSpec
+
+
+@pytest.fixture
+def spec():
+    return TemplateSpec(
+        kind="new", name_field="CR Name", brand_field="Brand Name",
+        portfolio_field="Portfolio", ecosystem_field="Ecosystem",
+    )
+
+
+def _website_df():
+    names = sorted([
+        "ACWA Power", "ACWA Power Renewables", "Neom Company", "Red Sea Global",
+        "Saudi Arabian Mining Company", "Saudi Telecom Company", "STC Bank", "Elm Company",
+    ])
+    return pd.DataFrame({"Company": names, "Portfolio": "Vision", "Ecosystem": None})
+
+
+def _baseline_df():
+    return pd.DataFrame({
+        "CR Name": ["Acwa Power Co", "ACWA POWER", "Red Sea Glob", "STC", "Maaden", "Elm", "Unknown Holding"],
+        "Brand Name": ["", "ACWA", "RSG", "Saudi Telecom", "Saudi Arabian Mining", "", None],
+        "Portfolio": "Vision",
+        "Ecosystem": None,
+    })
+
+
+async def _stream(baseline_df, spec, website_df, batches, **stores):
+    stream = ScrapeStream()
+    matcher = StreamingMatcher(baseline_df, spec, **stores)
+    consumer = asyncio.create_task(matcher.consume(stream))
+    for kind, names in batches:
+        stream.publish(FacetEvent(kind, f"{kind} facet", tuple(names)))
+        await asyncio.sleep(0.01)
+    stream.close()
+    await consumer
+    return matcher, await matcher.finish(website_df, "snapshot-1")
+
+
+def test_streamed_matching_equals_scoring_the_whole_list(spec):
+    website_df = _website_df()
+    names = website_df["Company"].tolist()
+    batches = [("portfolio", names[5:]), ("portfolio", names[1:3]), ("ecosystem", names[2:4])]  # names[0] and names[4] never streamed
+    matcher, streamed = asyncio.run(_stream(_baseline_df(), spec, website_df, batches))
+
+    assert matcher.stats == {"batches": 3, "streamed_companies": 6, "reconciled_companies": 2,
+                             "skipped_rows": 0}
+    expected = score_comparison(_baseline_df(), website_df, spec)
+    assert ([streamed.candidates.row(i) for i in range(len(_baseline_df()))]
+            == [expected.candidates.row(i) for i in range(len(_baseline_df()))])
+    results, unmatched = streamed.evaluate()
+    expected_results, expected_unmatched = expected.evaluate()
+    pd.testing.assert_frame_equal(results, expected_results)
+    pd.testing.assert_frame_equal(unmatched, expected_unmatched)
+    assert results.attrs["pipeline"]["streamed_companies"] == 6
+
+
+def test_list_the_stream_did_not_see_is_scored_from_scratch(spec):
+    website_df = _website_df()
+    batches = [("portfolio", ["Some Company Dropped In The Merge"] + website_df["Company"].tolist())]
+    _, streamed = asyncio.run(_stream(_baseline_df(), spec, website_df, batches))
+    assert "pipeline" not in streamed.reports
+    pd.testing.assert_frame_equal(streamed.evaluate()[0], score_comparison(_baseline_df(), website_df, spec).evaluate()[0])
+
+
+def test_stored_rows_skip_streamed_scoring_and_new_matches_are_recorded(tmp_path, spec):
+    db_path = str(tmp_path / "history.db")
+    website_df = _website_df()
+    names = website_df["Company"].tolist()
+    batches = [("portfolio", names[:4]), ("ecosystem", names[4:])]
+    expected = score_comparison(_baseline_df(), website_df, spec).evaluate()[0]
+
+    stores = {"name_cache": NameResolutionCache(db_path=db_path, ttl_days=30),
+              "row_store": RowMatchStore(db_path=db_path)}
+    first, scored = asyncio.run(_stream(_baseline_df(), spec, website_df, batches, **stores))
+    assert first.stats["skipped_rows"] == 0
+    assert scored.reports["row_reuse"] == {"snapshot_id": "snapshot-1", "reused": 0, "rematched": 7}
+    pd.testing.assert_frame_equal(scored.evaluate()[0], expected)
+
+    edited = _baseline_df()
+    edited.loc[6, "CR Name"] = "Neom"
+    second, rescored = asyncio.run(_stream(edited, spec, website_df, batches, **stores))
+    # Six unchanged rows in the row store, and the edited one's names are new to the cache
+    assert second.stats["skipped_rows"] == 6
+    assert rescored.reports["row_reuse"] == {"snapshot_id": "snapshot-1", "reused": 6, "rematched": 1}
+    assert rescored.reports["name_cache"]["misses"] == 1
+    pd.testing.assert_frame_equal(rescored.evaluate()[0],
+                                  score_comparison(edited, website_df, spec).evaluate()[0])
+
+
+def test_rows_left_out_for_another_snapshot_are_scored_at_finish(tmp_path, spec):
+    row_store = RowMatchStore(db_path=str(tmp_path / "history.db"))
+    website_df = _website_df()
+    batches = [("portfolio", website_df["Company"].tolist())]
+    asyncio.run(_stream(_baseline_df(), spec, website_df, batches, row_store=row_store))
+
+    async def finish_on_new_snapshot():
+        stream = ScrapeStream()
+        matcher = StreamingMatcher(_baseline_df(), spec, row_store=row_store)
+        consumer = asyncio.create_task(matcher.consume(stream))
+        stream.publish(FacetEvent("portfolio", "portfolio facet", tuple(website_df["Company"])))
+        stream.close()
+        await consumer
+        return matcher, await matcher.finish(website_df, "snapshot-2")
+
+    matcher, scored = asyncio.run(finish_on_new_snapshot())
+    assert matcher.stats["skipped_rows"] == 7
+    assert scored.reports["row_reuse"] == {"snapshot_id": "snapshot-2", "reused": 0, "rematched": 7}
+    pd.testing.assert_frame_equal(scored.evaluate()[0], score_comparison(_baseline_df(), website_df, spec).evaluate()[0])
+
+
+def test_events_can_be_published_from_another_thread():
+    async def main():
+        stream = ScrapeStream()
+        publisher = threading.Thread(target=lambda: [stream.publish(FacetEvent("portfolio", str(i), (str(i),)))
+                                                     for i in range(3)] and stream.close())
+        publisher.start()
+        received = []
+        while (batch := await stream.next_batch()) is not None:
+            received.extend(event.facet for event in batch)
+        publisher.join()
+        return received
+
+    assert asyncio.run(main()) == ["0", "1", "2"]
@@ -0,0 +1,116 @@
+import pandas as pd
+import pytest
+
+from enhanced_matching import enhanced_compare_companies, score_comparison
+from template_spec import TemplateSpec
+
+
+@pytest.fixture
+def spec():
+    return TemplateSpec(
+        kind="new", name_field="CR Name", brand_field="Brand Name",
+        portfolio_field="Portfolio", ecosystem_field="Ecosystem",
+    )
+
+
+def _frames():
+    website_df = pd.DataFrame([
+        {"Company": "ACWA Power", "Portfolio": "Vision", "Ecosystem": "Energy"},
+        {"Company": "Saudi Arabian Mining Company", "Portfolio": "Vision", "Ecosystem": "Mining"},
+        {"Company": "Neom Company", "Portfolio": "Strategic", "Ecosystem": "Neom"},
+    ])
+    baseline_df = pd.DataFrame([
+        {"CR Name": "Acwa Power Company", "Brand Name": "ACWA POWER", "Portfolio": "Vision", "Ecosystem": "Energy"},
+        {"CR Name": "Saudi Arabian Minig Co", "Brand Name": "", "Portfolio": "Vision", "Ecosystem": "Minning"},
+    ])
+    return baseline_df, website_df
+
+
+def test_default_evaluation_is_the_comparison_report(spec):
+    baseline_df, website_df = _frames()
+    results, unmatched = score_comparison(baseline_df, website_df, spec).evaluate()
+    expected, expected_unmatched = enhanced_compare_companies(baseline_df, website_df, spec)
+    pd.testing.assert_frame_equal(results, expected)
+    pd.testing.assert_frame_equal(unmatched, expected_unmatched)
+
+
+def test_raising_fuzzy_threshold_turns_weak_matches_into_add_and_remove(spec):
+    baseline_df, website_df = _frames()
+    scored = score_comparison(baseline_df, website_df, spec)
+    before, _ = scored.evaluate()
+    fuzzy_score = before.loc[1, "Match Score"]
+    assert before.loc[1, "Status"] != "Add" and fuzzy_score < 100
+
+    after, unmatched = scored.evaluate(fuzzy_threshold=fuzzy_score + 1)
+    assert after["Status"].tolist()[:2] == ["OK", "Add"]
+    assert after.loc[1, "Match Score"] == fuzzy_score
+    assert sorted(unmatched["Company"]) == ["Neom Company", "Saudi Arabian Mining Company"]
+
+
+def test_sector_and_exact_thresholds_are_reapplied(spec):
+    baseline_df, website_df = _frames()
+    scored = score_comparison(baseline_df, website_df, spec)
+    strict, _ = scored.evaluate(sector_threshold=100)
+    lenient, _ = scored.evaluate(sector_threshold=50, exact_match_threshold=50)
+    assert strict.loc[1, "Ecosystem Match"] == "No"
+    assert lenient.loc[1, "Ecosystem Match"] == "Yes"
+    assert lenient.loc[1, "Status"] == "OK"
+    assert strict.loc[1, "Status"] == "Requires update"
+
+
+def test_unknown_threshold_is_rejected(spec):
+    baseline_df, website_df = _frames()
+    with pytest.raises(ValueError):
+        score_comparison(baseline_df, website_df, spec).evaluate(name_threshold=80)
+
+
+def test_whatif_endpoint_reports_changed_rows(spec):
+    import app as webapp
+
+    baseline_df, website_df = _frames()
+    scored = score_comparison(baseline_df, website_df, spec)
+    results, _ = scored.evaluate()
+    webapp.processing_results["whatif-test"] = {
+        "status": "complete", "scored": scored, "baseline_file": "baseline.xlsx",
+        "baseline_status": results["Status"].iloc[:2].tolist(),
+    }
+    try:
+        client = webapp.app.test_client()
+        response = client.get("/whatif/whatif-test?fuzzy_threshold=100")
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body["thresholds"]["fuzzy_threshold"] == 100
+        assert body["summary"]["status_breakdown"]["missing_from_website"] == 1
+        assert [row["cr_name"] for row in body["changed_rows"]] == ["Saudi Arabian Minig Co"]
+        assert client.get("/whatif/whatif-test?fuzzy_threshold=high").status_code == 400
+        assert client.get("/whatif/missing").status_code == 404
+    finally:
+        del webapp.processing_results["whatif-test"]
+
+
+def test_least_recently_used_scores_are_dropped(spec, monkeypatch):
+    import app as webapp
+
+    monkeypatch.setattr(webapp, "WHATIF_KEEP_RESULTS", 2)
+    baseline_df, website_df = _frames()
+    scored = score_comparison(baseline_df, website_df, spec)
+    job_ids = [f"lru-test-{i}" for i in range(3)]
+    try:
+        client = webapp.app.test_client()
+        for job_id in job_ids:
+            webapp.processing_results[job_id] = {
+                "status": "complete", "scored": scored, "baseline_file": "baseline.xlsx",
+                "baseline_status": ["OK", "OK"],
+            }
+            webapp._touch_scored(job_id)
+            if job_id == job_ids[1]:
+                # Using the first job's scores makes the second the least recently used
+                assert client.get(f"/whatif/{job_ids[0]}").status_code == 200
+        assert client.get(f"/whatif/{job_ids[1]}").status_code == 404
+        assert "scored" not in webapp.processing_results[job_ids[1]]
+        assert client.get(f"/whatif/{job_ids[0]}").status_code == 200
+        assert client.get(f"/whatif/{job_ids[2]}").status_code == 200
+    finally:
+        for job_id in job_ids:
+            webapp.processing_results.pop(job_id, None)
+            webapp._scored_jobs.pop(job_id, None)
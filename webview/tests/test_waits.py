@@ -0,0 +1,43 @@
+import asyncio
+from waits import WaitEngine
+
+
+def test_until_returns_as_soon_as_condition_holds():
+    engine = WaitEngine(timeouts={"facet_applied": 5000})
+
+    async def condition(timeout):
+        await asyncio.sleep(0.01)
+
+    assert asyncio.run(engine.until("facet_applied", condition)) is True
+    label, elapsed, satisfied = engine.records[0]
+    assert label == "facet_applied"
+    assert satisfied is True
+    assert elapsed < 1000
+
+
+def test_until_records_timeout_without_raising():
+    engine = WaitEngine(timeouts={"page_turned": 20})
+
+    async def condition(timeout):
+        assert timeout == 20
+        raise TimeoutError("condition never held")
+
+    assert asyncio.run(engine.until("page_turned", condition)) is False
+    assert engine.summary()["page_turned"]["timeouts"] == 1
+
+
+def test_collect_cancels_pending_armed_wait():
+    engine = WaitEngine()
+
+    async def never(timeout):
+        await asyncio.sleep(10)
+
+    async def run():
+        task = engine.start("search_response", never)
+        await asyncio.sleep(0)
+        return await engine.collect(task)
+
+    assert asyncio.run(run()) is False
+    stats = engine.summary()["search_response"]
+    assert stats["count"] == 1
+    assert stats["timeouts"] == 1
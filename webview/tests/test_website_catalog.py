@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+from enhanced_matching import EnhancedCompanyMatcher
+
+
+@pytest.fixture
+def matcher():
+    return EnhancedCompanyMatcher()
+
+
+@pytest.fixture
+def website_df():
+    return pd.DataFrame({"Company": ["ACWA Power Company", "The Red Sea Development Co.", "STC", None]})
+
+
+def test_catalog_lines_up_with_website_rows(matcher, website_df):
+    catalog = matcher.build_catalog(website_df)
+    assert len(catalog) == 4
+    assert catalog.normalized == ("acwa power", "the red sea development", "stc", "")
+    assert catalog.core[1] == "red sea development"
+    assert catalog.forms[1].meaningful == {"the", "red", "sea", "development"}
+
+
+def test_normalization_strips_stacked_suffixes(matcher):
+    assert matcher.normalize_company_name("Saudi Mining Holding Company Ltd.") == "saudi mining"
+    assert matcher.extract_core_name("The Bank of Riyadh") == "bank riyadh"
+
+
+@pytest.mark.parametrize("baseline, website", [
+    ("ACWA POWER", "Acwa Power Company"),
+    ("Red Sea Development", "The Red Sea Development Co."),
+    ("STC", "STC Bank"),
+    ("Saudi Arabian Mining", "Saudi Arabian Mining Ventures"),
+    ("Saudi Real Estate Jeddah", "Jeddah Real Estate Saudi Fund"),
+    ("Riyad Capital", "Riyadh Capitals"),
+    ("ab", "Abc Company"),
+])
+def test_score_forms_matches_calculate_match_score(matcher, baseline, website):
+    expected = matcher.calculate_match_score(baseline, website)
+    assert matcher.score_forms(matcher.name_forms(baseline), matcher.name_forms(website)) == expected
+
+
+def test_find_best_match_with_catalog_returns_website_row(matcher, website_df):
+    catalog = matcher.build_catalog(website_df)
+    baseline_row = pd.Series({"CR Name": "Red Sea Development Company", "Brand Name": "RSG"})
+    best, info = matcher.find_best_match(baseline_row, website_df, catalog)
+    assert best["Company"] == "The Red Sea Development Co."
+    assert info["match_type"] == "core_exact"
+    # Without a catalog, find_best_match builds one itself
+    uncached, uncached_info = matcher.find_best_match(baseline_row, website_df)
+    assert uncached.name == best.name
+    assert uncached_info == info
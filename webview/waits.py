@@ -0,0 +1,167 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from config import WAIT_TIMEOUTS
+from search_api import is_search_request
+
+# A condition is a factory that takes the wait's upper bound (ms) and returns
+# an awaitable that completes as soon as the condition holds. Playwright's own
+# wait_* calls fit this shape and raise on timeout.
+Condition = Callable[[int], Awaitable]
+
+# Attribute used to tag the current list/pager nodes before an interaction so
+# we can tell when the page has replaced them.
+_STALE_ATTR = "data-pc-stale"
+
+_MARK_STALE_JS = """
+([selector, attr]) => {
+    document.querySelectorAll(selector).forEach(el => el.setAttribute(attr, ''));
+}
+"""
+
+_LIST_CHANGED_JS = """
+([before, attr]) => {
+    const list = document.querySelector('ul.search-result-list');
+    if (!list) return false;
+    const items = list.querySelectorAll('li');
+    const first = document.querySelector('ul.search-result-list li a h4');
+    const firstName = first ? first.innerText : "";
+    if (firstName !== before.first_name || items.length !== before.count) return true;
+    // Same content, but re-rendered: none of the tagged items survive
+    return items.length > 0 && !list.querySelector(`li[${attr}]`);
+}
+"""
+
+_PAGER_RENDERED_JS = """
+(attr) => !document.querySelector(`ul.page-selector-list li[${attr}]`)
+"""
+
+_FIRST_CARD_CHANGED_JS = """
+(before) => {
+    const first = document.querySelector('ul.search-result-list li a h4');
+    return (first ? first.innerText : "") !== before;
+}
+"""
+
+_PAGE_SETTLED_JS = """
+(cookieSelector) => {
+    if (document.querySelector('ul.search-result-list')) return true;
+    if (document.querySelector(cookieSelector)) return true;
+    const text = document.documentElement.innerHTML.toLowerCase();
+    return text.includes('cloudflare') && (text.includes('challenge') || text.includes('checking'));
+}
+"""
+
+
+class WaitEngine:
+    """Runs bounded, event-driven waits and records how long each one really took.
+
+    Every wait has a label; its upper bound comes from WAIT_TIMEOUTS (or the
+    `timeouts` override). A wait that hits its bound is recorded as unsatisfied
+    rather than raising, so callers decide what a timeout means.
+    """
+
+    def __init__(self, timeouts: Dict[str, int] = None):
+        self.timeouts = dict(WAIT_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+        self.records: List[Tuple[str, float, bool]] = []
+
+    async def until(self, label: str, condition: Condition) -> bool:
+        """Wait for `condition` up to the label's bound. Returns True if it held."""
+        start = time.monotonic()
+        try:
+            await condition(self.timeouts[label])
+            satisfied = True
+        except asyncio.CancelledError:
+            self._record(label, start, False)
+            raise
+        except Exception:
+            satisfied = False
+        self._record(label, start, satisfied)
+        return satisfied
+
+    def start(self, label: str, condition: Condition) -> asyncio.Task:
+        """Arm a wait now (e.g. for a response) and collect it later with `collect`."""
+        return asyncio.ensure_future(self.until(label, condition))
+
+    async def collect(self, task: asyncio.Task) -> bool:
+        """Return an armed wait's outcome, cancelling it if it is still pending."""
+        if not task.done():
+            task.cancel()
+        try:
+            return await task
+        except asyncio.CancelledError:
+            return False
+
+    def _record(self, label: str, start: float, satisfied: bool):
+        self.records.append((label, (time.monotonic() - start) * 1000, satisfied))
+
+    def summary(self) -> Dict[str, Dict]:
+        """Per-label count, total/max wait in ms, and how many hit their bound."""
+        stats: Dict[str, Dict] = {}
+        for label, elapsed, satisfied in self.records:
+            entry = stats.setdefault(label, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'timeouts': 0})
+            entry['count'] += 1
+            entry['total_ms'] += elapsed
+            entry['max_ms'] = max(entry['max_ms'], elapsed)
+            if not satisfied:
+                entry['timeouts'] += 1
+        for entry in stats.values():
+            entry['total_ms'] = round(entry['total_ms'])
+            entry['max_ms'] = round(entry['max_ms'])
+        return stats
+
+    def print_summary(self):
+        for label, entry in sorted(self.summary().items()):
+            print(f"  wait {label}: {entry['count']}× total {entry['total_ms']}ms, "
+                  f"max {entry['max_ms']}ms, {entry['timeouts']} hit bound")
+
+
+async def mark_list_stale(page):
+    """Tag the current result items and pager links so re-renders can be detected."""
+    await page.evaluate(_MARK_STALE_JS, ['ul.search-result-list li, ul.page-selector-list li', _STALE_ATTR])
+
+
+def list_changed(page, before: dict) -> Condition:
+    """The result list shows different cards than `before`, or was re-rendered.
+
+    `before` is a `_read_result_list` snapshot; call `mark_list_stale` before
+    the interaction so a re-render with identical content still counts.
+    """
+    sentinel = {'first_name': before['first_name'], 'count': before['count']}
+    return lambda timeout: page.wait_for_function(
+        _LIST_CHANGED_JS, arg=[sentinel, _STALE_ATTR], polling='raf', timeout=timeout,
+    )
+
+
+def first_card_changed(page, before_name: str) -> Condition:
+    """The first card's name differs from `before_name` (pagination turned)."""
+    return lambda timeout: page.wait_for_function(
+        _FIRST_CARD_CHANGED_JS, arg=before_name, polling='raf', timeout=timeout,
+    )
+
+
+def pager_rendered(page) -> Condition:
+    """None of the pager links tagged by `mark_list_stale` remain."""
+    return lambda timeout: page.wait_for_function(
+        _PAGER_RENDERED_JS, arg=_STALE_ATTR, polling='raf', timeout=timeout,
+    )
+
+
+def search_response(page) -> Condition:
+    """A search XHR/fetch request to SEARCH_API_PATH has finished loading."""
+    return lambda timeout: page.wait_for_event('requestfinished', predicate=is_search_request, timeout=timeout)
+
+
+def page_settled(page, cookie_selector: str) -> Condition:
+    """After navigation: the company list, the cookie banner or a challenge page is present."""
+    return lambda timeout: page.wait_for_function(
+        _PAGE_SETTLED_JS, arg=cookie_selector, polling=100, timeout=timeout,
+    )
+
+
+def selector_state(page, selector: str, state: str = 'visible') -> Condition:
+    """A selector reaches the given state ('visible', 'hidden', 'attached', ...)."""
+    return lambda timeout: page.wait_for_selector(selector, state=state, timeout=timeout)
@@ -0,0 +1,42 @@
+from typing import Callable, Iterable, Tuple
+
+# Words that never make two names "the same company" on their own
+GENERIC_WORDS = frozenset({'company', 'group', 'holding', 'corp', 'inc', 'ltd', 'limited', 'co', 'investment'})
+# Words dropped when reducing a normalized name to its core
+FILLER_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'of', 'for', 'in', 'on', 'at'})
+
+
+class NameForms:
+    """Every derived form of one company name the matching strategies need."""
+    __slots__ = ('normalized', 'core', 'core_words', 'core_words_upper', 'tokens', 'meaningful')
+
+    def __init__(self, normalized: str):
+        self.normalized = normalized
+        self.core_words = tuple(w for w in normalized.split() if w not in FILLER_WORDS)
+        self.core = ' '.join(self.core_words)
+        self.core_words_upper = frozenset(w.upper() for w in self.core_words)
+        self.tokens = frozenset(normalized.split())
+        self.meaningful = self.tokens - GENERIC_WORDS
+
+
+class WebsiteCatalog:
+    """Name forms of every website company, computed once per comparison.
+
+    Entries line up with the rows of the website_df the catalog was built
+    from, so position `j` in any of the tuples is row `j` of that frame.
+    """
+    __slots__ = ('names', 'forms', 'normalized', 'core')
+
+    def __init__(self, names: Tuple, forms: Tuple[NameForms, ...]):
+        self.names = names
+        self.forms = forms
+        self.normalized = tuple(f.normalized for f in forms)
+        self.core = tuple(f.core for f in forms)
+
+    @classmethod
+    def build(cls, names: Iterable, name_forms: Callable[[object], NameForms]) -> 'WebsiteCatalog':
+        names = tuple(names)
+        return cls(names, tuple(name_forms(name) for name in names))
+
+    def __len__(self) -> int:
+        return len(self.forms)